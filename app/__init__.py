@@ -7,11 +7,35 @@ from app.extensions import db, migrate
 def create_app(config_name=os.environ.get("FLASK_ENV", "development")) -> Flask:
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    from app.utils.jinja_cache import init_bytecode_cache, precompile_templates
+    init_bytecode_cache(app)
     
     db.init_app(app)
     migrate.init_app(app, db)
     from app.extensions import login_manager
     login_manager.init_app(app)
+    from app.utils.analytics import metric_aggregator
+    metric_aggregator.init_app(app)
+    from app.utils.audit_log import audit_log_writer
+    audit_log_writer.init_app(app)
+    from app.repository.email.smtp_pool import smtp_pool
+    smtp_pool.init_app(app)
+    from app.repository.email.async_smtp_pool import async_smtp_pool
+    async_smtp_pool.init_app(app)
+    from app.repository.email.template_cache import notification_template_cache
+    notification_template_cache.init_app(app)
+    from app.utils.sequences import sequence_allocator
+    sequence_allocator.init_app(app)
+    from app.repository.booking.reference import booking_reference_generator
+    booking_reference_generator.init_app(app)
+    from app.repository.finance.fee_engine import fee_engine
+    fee_engine.init_app(app)
+    from app.repository.finance.fee_waivers import fee_waiver_evaluator
+    fee_waiver_evaluator.init_app(app)
+    from app.repository.reporting.rollups import rollup_tracker
+    rollup_tracker.init_app(app)
     
     register_blueprints(app)
+    if app.config.get('JINJA_PRECOMPILE_ON_STARTUP', True):
+        precompile_templates(app)
     return app
\ No newline at end of file
@@ -15,6 +15,53 @@ class BaseConfig:
 
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+    CELERY_IMPORTS = ('app.repository.email.tasks', 'app.repository.booking.tasks')
+    # Email queues: run dedicated workers so a marketing blast never sits in front of a password reset, e.g.
+    #   celery -A celery_worker.celery worker -Q email_transactional
+    #   celery -A celery_worker.celery worker -Q email_bulk --prefetch-multiplier 1
+    MAIL_TRANSACTIONAL_QUEUE = os.environ.get('MAIL_TRANSACTIONAL_QUEUE', 'email_transactional')
+    MAIL_BULK_QUEUE = os.environ.get('MAIL_BULK_QUEUE', 'email_bulk')
+    CELERY_ROUTES = {
+        'app.repository.email.tasks.send_async_email': {'queue': MAIL_TRANSACTIONAL_QUEUE},
+        'app.repository.email.tasks.send_transactional_email': {'queue': MAIL_TRANSACTIONAL_QUEUE},
+        'app.repository.email.tasks.send_bulk_email_batch': {'queue': MAIL_BULK_QUEUE},
+    }
+    CELERYBEAT_SCHEDULE = {
+        'release-expired-booking-holds': {
+            'task': 'app.repository.booking.tasks.release_expired_holds',
+            'schedule': float(os.environ.get('BOOKING_HOLD_SWEEP_INTERVAL', 30)),
+        },
+        'reconcile-expired-booking-holds': {
+            'task': 'app.repository.booking.tasks.release_expired_holds',
+            'schedule': float(os.environ.get('BOOKING_HOLD_RECONCILE_INTERVAL', 600)),
+            'kwargs': {'use_index': False},
+        },
+        'purge-email-deliveries': {
+            'task': 'app.repository.email.tasks.purge_email_deliveries',
+            'schedule': float(os.environ.get('MAIL_DEDUP_PURGE_INTERVAL', 3600)),
+        },
+    }
+
+    # Invoice/transaction numbers reserved per database round trip; unused ones are skipped when a process exits
+    SEQUENCE_BLOCK_SIZE = int(os.environ.get('SEQUENCE_BLOCK_SIZE', 100))
+
+    # Scrambles booking reference codes (defaults to SECRET_KEY); must not change once codes are issued
+    BOOKING_REFERENCE_KEY = os.environ.get('BOOKING_REFERENCE_KEY')
+
+    # Upper bound on how long a process quotes with fee rules edited elsewhere when Redis is unavailable
+    FEE_RULES_REFRESH_INTERVAL = float(os.environ.get('FEE_RULES_REFRESH_INTERVAL', 300))
+
+    # How long Redis answers repeats of a payment idempotency key (the database record is permanent), and
+    # how long concurrent repeats wait on an in-flight request before processing it themselves
+    PAYMENT_IDEMPOTENCY_TTL = int(os.environ.get('PAYMENT_IDEMPOTENCY_TTL', 86400))
+    PAYMENT_IDEMPOTENCY_LOCK_TTL = int(os.environ.get('PAYMENT_IDEMPOTENCY_LOCK_TTL', 30))
+
+    # Daily/monthly booking and revenue rollups are updated in the transaction of every booking/payment
+    # change; after turning this back on, run backfill-rollups
+    REPORTING_ROLLUPS_ENABLED = os.environ.get('REPORTING_ROLLUPS_ENABLED', 'True') == 'True'
+
+    # Shared cache/coordination tier; features fall back to process-local state when unset
+    REDIS_URL = os.environ.get('REDIS_URL')
 
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
@@ -22,3 +69,64 @@ class BaseConfig:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
+    MAIL_TIMEOUT = float(os.environ.get('MAIL_TIMEOUT', 30))
+
+    # Per-worker SMTP session pool: idle sessions kept, recycle limits and NOOP probe interval
+    MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE', 2))
+    MAIL_POOL_MAX_MESSAGES = int(os.environ.get('MAIL_POOL_MAX_MESSAGES', 100))
+    MAIL_POOL_MAX_AGE = float(os.environ.get('MAIL_POOL_MAX_AGE', 300))
+    MAIL_POOL_HEALTH_CHECK_INTERVAL = float(os.environ.get('MAIL_POOL_HEALTH_CHECK_INTERVAL', 30))
+
+    # 'async' sends single messages through an aiosmtplib pool shared by all threads of a worker process;
+    # use it with a threaded worker pool (--pool threads --concurrency N). MAIL_ASYNC_POOL_SIZE caps sessions per server.
+    MAIL_SENDER_MODE = os.environ.get('MAIL_SENDER_MODE', 'sync')
+    MAIL_ASYNC_POOL_SIZE = int(os.environ.get('MAIL_ASYNC_POOL_SIZE', 8))
+
+    # Upper bound on how long a worker can keep using a template edited elsewhere when Redis is unavailable
+    NOTIFICATION_TEMPLATE_REFRESH_INTERVAL = float(os.environ.get('NOTIFICATION_TEMPLATE_REFRESH_INTERVAL', 300))
+
+    # Queue only the email name and user id for transactional emails and render in the worker
+    MAIL_RENDER_IN_WORKER = os.environ.get('MAIL_RENDER_IN_WORKER', 'True') == 'True'
+
+    # Provider sending limit shared by all workers (messages/second per SMTP host, 0 = unlimited) and
+    # its burst size. Bulk batches wait for tokens; transactional mail takes them without waiting.
+    MAIL_RATE_LIMIT = float(os.environ.get('MAIL_RATE_LIMIT', 0))
+    MAIL_RATE_BURST = float(os.environ.get('MAIL_RATE_BURST', 10))
+
+    # Window in which a repeated send of the same email (retry or duplicate enqueue) is dropped, and how long
+    # an in-progress claim survives a crashed worker. MAIL_DEDUP_TTL=0 disables deduplication.
+    MAIL_DEDUP_TTL = int(os.environ.get('MAIL_DEDUP_TTL', 3600))
+    MAIL_DEDUP_PENDING_TTL = int(os.environ.get('MAIL_DEDUP_PENDING_TTL', 600))
+
+    # Compiled Jinja templates are shared on disk (default: <instance>/jinja_cache) and email templates are
+    # compiled at startup, so the first email after a deploy doesn't pay for compilation
+    JINJA_BYTECODE_CACHE = os.environ.get('JINJA_BYTECODE_CACHE', 'True') == 'True'
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR')
+    JINJA_PRECOMPILE_ON_STARTUP = os.environ.get('JINJA_PRECOMPILE_ON_STARTUP', 'True') == 'True'
+
+    # Bulk sends: recipients per batch task, and follow-up attempts for temporarily failed addresses
+    MAIL_BULK_BATCH_SIZE = int(os.environ.get('MAIL_BULK_BATCH_SIZE', 50))
+    MAIL_BULK_MAX_ATTEMPTS = int(os.environ.get('MAIL_BULK_MAX_ATTEMPTS', 4))
+    MAIL_BULK_RETRY_DELAY = int(os.environ.get('MAIL_BULK_RETRY_DELAY', 60))
+
+    ANALYTICS_FLUSH_INTERVAL = float(os.environ.get('ANALYTICS_FLUSH_INTERVAL', 10))
+    ANALYTICS_FLUSH_THRESHOLD = int(os.environ.get('ANALYTICS_FLUSH_THRESHOLD', 500))
+
+    AUDIT_LOG_QUEUE_SIZE = int(os.environ.get('AUDIT_LOG_QUEUE_SIZE', 10000))
+    AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 200))
+    AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 2))
+    AUDIT_LOG_OVERFLOW_POLICY = os.environ.get('AUDIT_LOG_OVERFLOW_POLICY', 'caller_runs')
+    AUDIT_LOG_BLOCK_TIMEOUT = float(os.environ.get('AUDIT_LOG_BLOCK_TIMEOUT', 0.5))
+
+    FLIGHT_SEARCH_CACHE_TTL = int(os.environ.get('FLIGHT_SEARCH_CACHE_TTL', 120))
+    FLIGHT_SEARCH_PARTIAL_CACHE_TTL = int(os.environ.get('FLIGHT_SEARCH_PARTIAL_CACHE_TTL', 15))
+    FLIGHT_SEARCH_DEADLINE = float(os.environ.get('FLIGHT_SEARCH_DEADLINE', 8.0))
+    FLIGHT_SUPPLIER_MAX_WORKERS = int(os.environ.get('FLIGHT_SUPPLIER_MAX_WORKERS', 16))
+    # Running calls allowed per supplier; calls past the search deadline keep a worker until the supplier answers
+    FLIGHT_SUPPLIER_MAX_IN_FLIGHT = int(os.environ.get('FLIGHT_SUPPLIER_MAX_IN_FLIGHT', 4))
+    FLIGHT_FAKE_SUPPLIER_LATENCY = float(os.environ.get('FLIGHT_FAKE_SUPPLIER_LATENCY', 0.0))
+
+    PACKAGE_DETAIL_CACHE_TTL = int(os.environ.get('PACKAGE_DETAIL_CACHE_TTL', 300))
+    PACKAGE_SEARCH_CACHE_TTL = int(os.environ.get('PACKAGE_SEARCH_CACHE_TTL', 60))
+
+    BOOKING_HOLD_TTL = int(os.environ.get('BOOKING_HOLD_TTL', 900))
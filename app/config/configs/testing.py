@@ -5,4 +5,13 @@ class TestingConfig(BaseConfig):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
-    SECRET_KEY = 'test-secret-key'
\ No newline at end of file
+    SECRET_KEY = 'test-secret-key'
+    REDIS_URL = None
+
+    # Metrics and audit logs are flushed explicitly in tests rather than by background threads
+    ANALYTICS_FLUSH_INTERVAL = 0
+    AUDIT_LOG_FLUSH_INTERVAL = 0
+
+    # Tests exercise the bytecode cache against a temporary directory of their own
+    JINJA_BYTECODE_CACHE = False
+    JINJA_PRECOMPILE_ON_STARTUP = False
@@ -1 +1,5 @@
-from app.manage.commands.create_superuser import create_superuser
\ No newline at end of file
+from app.manage.commands.create_superuser import create_superuser
+from app.manage.commands.reindex_packages import reindex_packages
+from app.manage.commands.precompile_templates import precompile_templates
+from app.manage.commands.rebuild_booking_balances import rebuild_booking_balances
+from app.manage.commands.backfill_rollups import backfill_rollups
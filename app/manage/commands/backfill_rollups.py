@@ -0,0 +1,13 @@
+from flask.cli import with_appcontext
+from app.repository.reporting import ReportingService
+from app.extensions import db
+import click
+
+@click.command("backfill-rollups")
+@click.option("--batch-size", default=1000, show_default=True, help="Bookings/payments read per query.")
+@with_appcontext
+def backfill_rollups(batch_size: int) -> None:
+    """Rebuilds the daily and monthly booking/revenue rollups from history."""
+    result = ReportingService(db.session).backfill_rollups(batch_size)
+    click.echo(f"Aggregated {result['bookings']} bookings and {result['payments']} payments into "
+               f"{result['booking_rollups']} booking and {result['revenue_rollups']} revenue rollup rows")
@@ -0,0 +1,12 @@
+from flask import current_app
+from flask.cli import with_appcontext
+from app.utils.jinja_cache import EMAIL_TEMPLATE_PREFIX, precompile_templates as precompile
+import click
+
+@click.command("precompile-templates")
+@click.option("--prefix", default=EMAIL_TEMPLATE_PREFIX, show_default=True, help="Only templates under this path.")
+@with_appcontext
+def precompile_templates(prefix: str) -> None:
+    """Fills the Jinja bytecode cache, e.g. as a deploy/build step."""
+    compiled = precompile(current_app._get_current_object(), prefix)
+    click.echo(f"Precompiled {compiled} templates")
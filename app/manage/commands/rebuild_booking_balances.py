@@ -0,0 +1,12 @@
+from flask.cli import with_appcontext
+from app.repository.finance import FinanceService
+from app.extensions import db
+import click
+
+@click.command("rebuild-booking-balances")
+@click.option("--batch-size", default=500, show_default=True, help="Bookings recomputed per transaction.")
+@with_appcontext
+def rebuild_booking_balances(batch_size: int) -> None:
+    """Recomputes booking balances from the ledger, posting entries for payments that predate it."""
+    processed = FinanceService(db.session).rebuild_booking_balances(batch_size)
+    click.echo(f"Rebuilt balances for {processed} bookings")
@@ -0,0 +1,12 @@
+from flask.cli import with_appcontext
+from app.repository.package import PackageService
+from app.extensions import db
+import click
+
+@click.command("reindex-packages")
+@click.option("--batch-size", default=500, show_default=True, help="Packages indexed per transaction.")
+@with_appcontext
+def reindex_packages(batch_size: int) -> None:
+    """Rebuilds the package full-text search index from scratch."""
+    indexed = PackageService(db.session).rebuild_search_index(batch_size)
+    click.echo(f"Indexed {indexed} packages")
@@ -1,5 +1,9 @@
-from app.manage.commands import create_superuser
+from app.manage.commands import create_superuser, reindex_packages, precompile_templates, rebuild_booking_balances, backfill_rollups
 
 def register_cli_commands(app):
     app.cli.add_command(create_superuser)
+    app.cli.add_command(reindex_packages)
+    app.cli.add_command(precompile_templates)
+    app.cli.add_command(rebuild_booking_balances)
+    app.cli.add_command(backfill_rollups)
 
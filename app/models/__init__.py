@@ -2,13 +2,16 @@ from app.models.base import BaseModel
 from app.models.user import User
 from app.models.company import Company
 from app.models.user_preference import UserPreference
-from app.models.booking import Booking
+from app.models.booking import Booking, BookingHold
 from app.models.passenger import Passenger
-from app.models.flight_booking import FlightBooking, Flight
+from app.models.flight_booking import FlightBooking, Flight, FlightInstance, FlightSeat
 from app.models.package import Package, PackageItinerary, PackageInclusion
 from app.models.package_booking import PackageBooking, CustomItinerary, CustomItineraryItem
-from app.models.payment import Payment, Invoice, SubscriptionPlan, UserSubscription
+from app.models.payment import Payment, Invoice, PaymentIdempotencyKey, SubscriptionPlan, UserSubscription
 from app.models.service_fee import ServiceFeeRule
-from app.models.notification import Notification, NotificationTemplate
+from app.models.notification import Notification, NotificationTemplate, EmailDelivery
 from app.models.analytics import AnalyticsMetric
 from app.models.audit_log import AuditLog
+from app.models.sequence import NumberSequence
+from app.models.ledger import BookingLedgerEntry, BookingBalance
+from app.models.reporting import BookingRollup, RevenueRollup
@@ -3,6 +3,9 @@ from app.models.base import BaseModel
 
 class AnalyticsMetric(BaseModel):
     __tablename__ = 'analytics_metrics'
+    __table_args__ = (
+        db.UniqueConstraint('metric_name', 'date_dimension', 'category', 'dimension_key', name='uq_analytics_metric_dimensions'),
+    )
     
     metric_name = db.Column(db.String(100), nullable=False, index=True)
     date_dimension = db.Column(db.Date, nullable=False, index=True)
@@ -10,8 +13,9 @@ class AnalyticsMetric(BaseModel):
     value = db.Column(db.Float, default=0.0)
     count = db.Column(db.Integer, default=0)
     
-    category = db.Column(db.String(50)) 
-    dimension_key = db.Column(db.String(100))
+    # Empty string rather than NULL so the unique constraint (and ON CONFLICT upserts) match ungrouped metrics
+    category = db.Column(db.String(50), nullable=False, default='')
+    dimension_key = db.Column(db.String(100), nullable=False, default='')
 
     def __repr__(self):
         return f"<AnalyticsMetric {self.metric_name} on {self.date_dimension}>"
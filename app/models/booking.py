@@ -4,8 +4,12 @@ from app.models.enums import BookingStatus, BookingType
 
 class Booking(BaseModel):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # Keyset pagination of a user's bookings, newest first
+        db.Index('ix_bookings_user_created', 'user_id', 'created_at', 'id'),
+    )
 
-    reference_code = db.Column(db.String(12), unique=True, nullable=False, index=True)
+    reference_code = db.Column(db.String(20), unique=True, nullable=False, index=True)
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     
     status = db.Column(db.Enum(BookingStatus), default=BookingStatus.PENDING, nullable=False)
@@ -16,12 +20,27 @@ class Booking(BaseModel):
     
     notes = db.Column(db.Text)
     
-    passengers = db.relationship('Passenger', backref='booking', lazy='dynamic', cascade="all, delete-orphan")
-    payments = db.relationship('Payment', backref='booking', lazy='dynamic')
-    invoices = db.relationship('Invoice', backref='booking', lazy='dynamic')
+    # Plain collections (not lazy='dynamic') so GetBookingDetail can eager-load them
+    passengers = db.relationship('Passenger', backref='booking', cascade="all, delete-orphan", order_by='Passenger.created_at')
+    payments = db.relationship('Payment', backref='booking', order_by='Payment.created_at')
+    invoices = db.relationship('Invoice', backref='booking', order_by='Invoice.created_at')
     
+    flight_bookings = db.relationship('FlightBooking', backref='booking', cascade="all, delete-orphan", order_by='FlightBooking.created_at')
     package_booking = db.relationship('PackageBooking', backref='booking', uselist=False, cascade="all, delete-orphan")
+    hold = db.relationship('BookingHold', backref='booking', uselist=False, cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Booking {self.reference_code} ({self.status})>"
 
+
+class BookingHold(BaseModel):
+    """Time-boxed claim on a booking's seats while checkout and payment complete."""
+    __tablename__ = 'booking_holds'
+
+    booking_id = db.Column(db.String(36), db.ForeignKey('bookings.id'), unique=True, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    seats = db.relationship('FlightSeat', backref='hold', lazy='dynamic', passive_deletes=True)
+
+    def __repr__(self):
+        return f"<BookingHold {self.booking_id} until {self.expires_at}>"
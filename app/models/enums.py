@@ -61,6 +61,11 @@ class TripType(BaseEnum):
     ROUND_TRIP = "round_trip"
     MULTI_CITY = "multi_city"
 
+class SeatStatus(BaseEnum):
+    AVAILABLE = "available"
+    HELD = "held"
+    RESERVED = "reserved"
+
 class TravelClass(BaseEnum):
     ECONOMY = "economy"
     PREMIUM_ECONOMY = "premium_economy"
@@ -132,3 +137,15 @@ class Gender(BaseEnum):
     NON_BINARY = "non_binary"
     OTHER = "other"
     PREFER_NOT_TO_SAY = "prefer_not_to_say"
+
+class EmailDeliveryStatus(BaseEnum):
+    PENDING = "pending"
+    SENT = "sent"
+
+class LedgerEntryType(BaseEnum):
+    PAYMENT = "payment"
+    REFUND = "refund"
+
+class RollupPeriod(BaseEnum):
+    DAY = "day"
+    MONTH = "month"
@@ -1,6 +1,6 @@
 from app.extensions import db
 from app.models.base import BaseModel
-from app.models.enums import TravelClass, BookingStatus
+from app.models.enums import TravelClass, BookingStatus, SeatStatus
 
 class FlightBooking(BaseModel):
     __tablename__ = 'flight_bookings'
@@ -11,7 +11,7 @@ class FlightBooking(BaseModel):
     eticket_number = db.Column(db.String(50))
     cabin_class = db.Column(db.Enum(TravelClass), default=TravelClass.ECONOMY)
     
-    segments = db.relationship('Flight', backref='flight_booking', lazy='dynamic', cascade="all, delete-orphan")
+    segments = db.relationship('Flight', backref='flight_booking', cascade="all, delete-orphan", order_by='Flight.departure_time')
 
     def __repr__(self):
         return f"<FlightBooking {self.pnr_reference}>"
@@ -21,6 +21,7 @@ class Flight(BaseModel):
     __tablename__ = 'flights'
     
     flight_booking_id = db.Column(db.String(36), db.ForeignKey('flight_bookings.id'), nullable=False)
+    flight_instance_id = db.Column(db.String(36), db.ForeignKey('flight_instances.id'), index=True)
     
     carrier_code = db.Column(db.String(3), nullable=False)
     flight_number = db.Column(db.String(10), nullable=False)
@@ -41,4 +42,51 @@ class Flight(BaseModel):
     seat_assignment = db.Column(db.String(10))
 
     def __repr__(self):
-        return f"<Flight {self.carrier_code}{self.flight_number} {self.departure_airport_code}->{self.arrival_airport_code}>"
\ No newline at end of file
+        return f"<Flight {self.carrier_code}{self.flight_number} {self.departure_airport_code}->{self.arrival_airport_code}>"
+
+
+class FlightInstance(BaseModel):
+    """A single operated departure (carrier + flight number + departure time) that owns a seat inventory."""
+    __tablename__ = 'flight_instances'
+    __table_args__ = (
+        db.UniqueConstraint('carrier_code', 'flight_number', 'departure_time', name='uq_flight_instance'),
+    )
+
+    carrier_code = db.Column(db.String(3), nullable=False)
+    flight_number = db.Column(db.String(10), nullable=False)
+
+    departure_airport_code = db.Column(db.String(3), nullable=False)
+    arrival_airport_code = db.Column(db.String(3), nullable=False)
+
+    departure_time = db.Column(db.DateTime, nullable=False)
+    arrival_time = db.Column(db.DateTime, nullable=False)
+
+    # Set once a seat map is loaded; until then seats are created as they are reserved
+    seat_map_loaded = db.Column(db.Boolean, default=False, nullable=False)
+
+    seats = db.relationship('FlightSeat', backref='flight_instance', lazy='dynamic', cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<FlightInstance {self.carrier_code}{self.flight_number} {self.departure_time}>"
+
+
+class FlightSeat(BaseModel):
+    __tablename__ = 'flight_seats'
+    __table_args__ = (
+        db.UniqueConstraint('flight_instance_id', 'seat_number', name='uq_flight_seat'),
+        db.Index('ix_flight_seats_instance_status', 'flight_instance_id', 'status'),
+    )
+
+    flight_instance_id = db.Column(db.String(36), db.ForeignKey('flight_instances.id'), nullable=False)
+    seat_number = db.Column(db.String(10), nullable=False)
+    cabin_class = db.Column(db.Enum(TravelClass), default=TravelClass.ECONOMY)
+
+    status = db.Column(db.Enum(SeatStatus), default=SeatStatus.AVAILABLE, nullable=False)
+    flight_id = db.Column(db.String(36), db.ForeignKey('flights.id'), nullable=True)
+    hold_id = db.Column(db.String(36), db.ForeignKey('booking_holds.id'), nullable=True, index=True)
+
+    # Bumped on every state change; reservations are compare-and-set updates guarded by status
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<FlightSeat {self.seat_number} ({self.status})>"
@@ -0,0 +1,43 @@
+from app.extensions import db
+from app.models.base import BaseModel
+from app.models.enums import LedgerEntryType
+
+class BookingLedgerEntry(BaseModel):
+    """Append-only money movement on a booking; never updated or deleted."""
+    __tablename__ = 'booking_ledger_entries'
+    __table_args__ = (
+        # Rebuilds aggregate per booking
+        db.Index('ix_booking_ledger_entries_booking', 'booking_id', 'created_at'),
+    )
+
+    booking_id = db.Column(db.String(36), db.ForeignKey('bookings.id'), nullable=False)
+    # One entry per payment/refund record, so backfills can't post it twice
+    payment_id = db.Column(db.String(36), db.ForeignKey('payments.id'), unique=True)
+    # Refunds: the payment being refunded, whose refunds may not add up to more than it
+    source_payment_id = db.Column(db.String(36), db.ForeignKey('payments.id'), index=True)
+
+    entry_type = db.Column(db.Enum(LedgerEntryType), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    currency = db.Column(db.String(3), default='USD')
+
+    def __repr__(self):
+        return f"<BookingLedgerEntry {self.booking_id} {self.entry_type} {self.amount}>"
+
+
+class BookingBalance(BaseModel):
+    """Running totals of a booking's ledger, updated in the same transaction as each entry."""
+    __tablename__ = 'booking_balances'
+
+    booking_id = db.Column(db.String(36), db.ForeignKey('bookings.id'), unique=True, nullable=False)
+    currency = db.Column(db.String(3), default='USD')
+
+    amount_paid = db.Column(db.Float, nullable=False, default=0.0)
+    amount_refunded = db.Column(db.Float, nullable=False, default=0.0)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def net_paid(self) -> float:
+        return round(self.amount_paid - self.amount_refunded, 2)
+
+    def __repr__(self):
+        return f"<BookingBalance {self.booking_id} paid={self.amount_paid} refunded={self.amount_refunded}>"
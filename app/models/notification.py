@@ -1,6 +1,6 @@
 from app.extensions import db
 from app.models.base import BaseModel
-from app.models.enums import NotificationType, NotificationPriority
+from app.models.enums import NotificationType, NotificationPriority, EmailDeliveryStatus
 
 class Notification(BaseModel):
     __tablename__ = "notifications"
@@ -33,4 +33,16 @@ class NotificationTemplate(BaseModel):
     is_active = db.Column(db.Boolean, default=True)
 
     def __repr__(self):
-        return f"<NotificationTemplate {self.name} ({self.trigger_event})>"
\ No newline at end of file
+        return f"<NotificationTemplate {self.name} ({self.trigger_event})>"
+
+
+class EmailDelivery(BaseModel):
+    """Delivery record for one dedup key; the database fallback when Redis is unavailable."""
+    __tablename__ = "email_deliveries"
+
+    dedup_key = db.Column(db.String(64), unique=True, nullable=False)
+    status = db.Column(db.Enum(EmailDeliveryStatus), nullable=False, default=EmailDeliveryStatus.PENDING)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<EmailDelivery {self.dedup_key} {self.status}>"
@@ -1,9 +1,15 @@
 from app.extensions import db
 from app.models.base import BaseModel
 from app.models.enums import ActivityType
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 
 class Package(BaseModel):
     __tablename__ = 'packages'
+    __table_args__ = (
+        db.Index('ix_packages_search_vector', 'search_vector', postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
     
     title = db.Column(db.String(100), nullable=False)
     slug = db.Column(db.String(120), unique=True, index=True)
@@ -16,6 +22,9 @@ class Package(BaseModel):
     is_active = db.Column(db.Boolean, default=True)
     featured_image_url = db.Column(db.String(255))
     gallery_urls = db.Column(db.JSON) 
+
+    # Weighted full-text document maintained by PackageSearchIndex (Postgres only)
+    search_vector = deferred(db.Column(db.Text().with_variant(TSVECTOR(), 'postgresql'), nullable=True))
     
     itinerary = db.relationship('PackageItinerary', backref='package', lazy='dynamic', cascade="all, delete-orphan", order_by="PackageItinerary.day_number")
     inclusions = db.relationship('PackageInclusion', backref='package', lazy='dynamic', cascade="all, delete-orphan")
@@ -24,6 +33,15 @@ class Package(BaseModel):
         return f"<Package {self.title} ({self.slug})>"
 
 
+# SQLite has no tsvector; package search there goes through an FTS5 table kept in step by PackageSearchIndex
+PACKAGE_SEARCH_FTS5_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS package_search "
+    "USING fts5(package_id UNINDEXED, title, description, locations, tokenize='porter unicode61')"
+)
+event.listen(Package.__table__, 'after_create', DDL(PACKAGE_SEARCH_FTS5_DDL).execute_if(dialect='sqlite'))
+event.listen(Package.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS package_search").execute_if(dialect='sqlite'))
+
+
 class PackageItinerary(BaseModel):
     __tablename__ = 'package_itineraries'
     
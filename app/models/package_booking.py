@@ -33,7 +33,7 @@ class CustomItinerary(BaseModel):
     notes = db.Column(db.Text)
     approved_by_user = db.Column(db.Boolean, default=False)
     
-    items = db.relationship('CustomItineraryItem', backref='custom_itinerary', lazy='dynamic', cascade="all, delete-orphan")
+    items = db.relationship('CustomItineraryItem', backref='custom_itinerary', cascade="all, delete-orphan", order_by='(CustomItineraryItem.day_number, CustomItineraryItem.time)')
 
     def __repr__(self):
         return f"<CustomItinerary {self.title}>"
@@ -43,6 +43,18 @@ class Invoice(BaseModel):
         return f"<Invoice {self.invoice_number} - {self.total_amount} {self.currency}>"
 
 
+class PaymentIdempotencyKey(BaseModel):
+    """The payment a client idempotency key produced; the durable record behind the Redis lookup."""
+    __tablename__ = 'payment_idempotency_keys'
+
+    key = db.Column(db.String(255), unique=True, nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    payment_id = db.Column(db.String(36), db.ForeignKey('payments.id'), nullable=False)
+
+    def __repr__(self):
+        return f"<PaymentIdempotencyKey {self.key} -> {self.payment_id}>"
+
+
 class SubscriptionPlan(BaseModel):
     __tablename__ = 'subscription_plans'
     
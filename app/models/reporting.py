@@ -0,0 +1,43 @@
+from app.extensions import db
+from app.models.base import BaseModel
+from app.models.enums import BookingStatus, BookingType, PaymentStatus, RollupPeriod
+
+class BookingRollup(BaseModel):
+    """Bookings created per day/month, booking type, status and currency."""
+    __tablename__ = 'booking_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('period', 'period_start', 'booking_type', 'status', 'currency', name='uq_booking_rollup_dimensions'),
+    )
+
+    period = db.Column(db.Enum(RollupPeriod), nullable=False)
+    period_start = db.Column(db.Date, nullable=False, index=True)
+    booking_type = db.Column(db.Enum(BookingType), nullable=False)
+    status = db.Column(db.Enum(BookingStatus), nullable=False)
+    # Empty string rather than NULL so the unique constraint (and ON CONFLICT upserts) match
+    currency = db.Column(db.String(3), nullable=False, default='')
+
+    booking_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<BookingRollup {self.period} {self.period_start} {self.booking_type} {self.status}: {self.booking_count}>"
+
+
+class RevenueRollup(BaseModel):
+    """Payment amounts per day/month (of payment), booking type, payment status and currency."""
+    __tablename__ = 'revenue_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('period', 'period_start', 'booking_type', 'status', 'currency', name='uq_revenue_rollup_dimensions'),
+    )
+
+    period = db.Column(db.Enum(RollupPeriod), nullable=False)
+    period_start = db.Column(db.Date, nullable=False, index=True)
+    booking_type = db.Column(db.Enum(BookingType), nullable=False)
+    status = db.Column(db.Enum(PaymentStatus), nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default='')
+
+    payment_count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<RevenueRollup {self.period} {self.period_start} {self.booking_type} {self.status}: {self.amount}>"
@@ -0,0 +1,13 @@
+from app.extensions import db
+from app.models.base import BaseModel
+
+class NumberSequence(BaseModel):
+    __tablename__ = 'number_sequences'
+
+    # e.g. "INV", "TXN", "REF"
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    # First value not yet handed out in a block
+    next_value = db.Column(db.BigInteger, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<NumberSequence {self.name} next={self.next_value}>"
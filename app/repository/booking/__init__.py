@@ -6,5 +6,8 @@ from app.repository.booking.exceptions import (
     InvalidBookingStatus,
     DatabaseError,
     BookingAlreadyExists,
-    PaymentRequired
+    PaymentRequired,
+    HoldNotFound,
+    HoldExpired,
+    InvalidBookingQuery
 )
@@ -25,3 +25,15 @@ class BookingAlreadyExists(BookingServiceException):
 class PaymentRequired(BookingServiceException):
     """Raised when an action requires a completed payment"""
     pass
+
+class HoldNotFound(BookingServiceException):
+    """Raised when a booking has no active hold"""
+    pass
+
+class HoldExpired(BookingServiceException):
+    """Raised when confirming a hold whose time has run out"""
+    pass
+
+class InvalidBookingQuery(BookingServiceException):
+    """Raised when a booking listing filter or pagination cursor is invalid"""
+    pass
@@ -0,0 +1,47 @@
+from datetime import datetime
+from app.utils.redis_client import get_redis
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HoldIndex:
+    """
+    Expiry index of active booking holds kept in a Redis sorted set
+    (member = hold id, score = expiry timestamp), so the sweeper finds expired
+    holds with one ZRANGEBYSCORE instead of scanning the database.
+
+    The booking_holds table stays the source of truth. Every method degrades to
+    a no-op / None when Redis is unavailable and callers fall back to querying
+    booking_holds.expires_at.
+    """
+    KEY = "booking_holds:expiry"
+
+    def __init__(self, redis=None) -> None:
+        self.redis = redis if redis is not None else get_redis()
+
+    def add(self, hold_id: str, expires_at: datetime) -> None:
+        if self.redis is None:
+            return
+        try:
+            self.redis.zadd(self.KEY, {hold_id: expires_at.timestamp()})
+        except Exception as e:
+            logger.warning(f"Failed to index hold {hold_id}: {e}")
+
+    def remove(self, hold_ids: list[str]) -> None:
+        if self.redis is None or not hold_ids:
+            return
+        try:
+            self.redis.zrem(self.KEY, *hold_ids)
+        except Exception as e:
+            logger.warning(f"Failed to remove {len(hold_ids)} holds from index: {e}")
+
+    def expired(self, now: datetime, limit: int) -> list[str] | None:
+        """Returns up to `limit` hold ids whose expiry is <= now, or None if the index is unavailable."""
+        if self.redis is None:
+            return None
+        try:
+            members = self.redis.zrangebyscore(self.KEY, "-inf", now.timestamp(), start=0, num=limit)
+        except Exception as e:
+            logger.warning(f"Hold index lookup failed, falling back to database: {e}")
+            return None
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
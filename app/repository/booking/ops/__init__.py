@@ -1,5 +1,7 @@
 from app.repository.booking.ops.create import CreateBooking
-from app.repository.booking.ops.get import GetBookingByID, GetBookingByReference, GetUserBookings
+from app.repository.booking.ops.get import GetBookingByID, GetBookingByReference, GetUserBookings, StreamUserBookings
+from app.repository.booking.ops.detail import GetBookingDetail, GetBookingDetails
 from app.repository.booking.ops.update_status import UpdateBookingStatus
 from app.repository.booking.ops.add_passenger import AddPassengerToBooking
 from app.repository.booking.ops.cancel import CancelBooking
+from app.repository.booking.ops.hold import HoldSeat, ConfirmHold, ReleaseExpiredHolds
@@ -3,36 +3,40 @@ from app.models.enums import BookingStatus, BookingType
 from app.extensions import db
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-import uuid
+from app.repository.booking.reference import BookingReferenceGenerator, booking_reference_generator
 from app.repository.booking.exceptions import BookingAlreadyExists, DatabaseError
 
 class CreateBooking:
-    def __init__(self, db: Session) -> None:
+    # Generated references are unique; a clash can only be with a legacy random
+    # reference, so a couple of fresh codes is plenty
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, db: Session, references: BookingReferenceGenerator = None) -> None:
         self.db = db
+        self.references = references or booking_reference_generator
 
     def execute(self, user_id: str, booking_type: str, currency: str = "USD", notes: str = None) -> Booking:
-        try:
-            reference_code = f"THRIVE-{uuid.uuid4().hex[:8].upper()}" # TODO: Implement booking reference code generator util
-            
-            new_booking = Booking(
-                reference_code=reference_code,
-                user_id=user_id,
-                booking_type=BookingType(booking_type),
-                currency=currency,
-                notes=notes,
-                status=BookingStatus.PENDING
-            )
-            
-            self.db.add(new_booking)
-            self.db.commit()
-            self.db.refresh(new_booking)
-            return new_booking
-            
-        except ValueError as e:
-            raise 
-        except IntegrityError:
-            self.db.rollback()
-            raise BookingAlreadyExists("Booking reference already exists.")
-        except SQLAlchemyError as e:
-            self.db.rollback()
-            raise DatabaseError(f"Database error while creating booking: {str(e)}") from e
+        booking_type = BookingType(booking_type)
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            try:
+                new_booking = Booking(
+                    reference_code=self.references.next_code(self.db),
+                    user_id=user_id,
+                    booking_type=booking_type,
+                    currency=currency,
+                    notes=notes,
+                    status=BookingStatus.PENDING
+                )
+
+                self.db.add(new_booking)
+                self.db.commit()
+                self.db.refresh(new_booking)
+                return new_booking
+
+            except IntegrityError:
+                self.db.rollback()
+                if attempt == self.MAX_ATTEMPTS:
+                    raise BookingAlreadyExists("Booking reference already exists.")
+            except SQLAlchemyError as e:
+                self.db.rollback()
+                raise DatabaseError(f"Database error while creating booking: {str(e)}") from e
@@ -0,0 +1,53 @@
+from app.models import Booking, FlightBooking, PackageBooking, CustomItinerary
+from sqlalchemy.orm import Session, selectinload, joinedload
+from sqlalchemy.exc import SQLAlchemyError
+from app.repository.booking.exceptions import BookingNotFound, DatabaseError
+
+# Loads the full itinerary graph in one statement per relationship level,
+# independent of how many passengers, segments or items the bookings have:
+# bookings, passengers, flight bookings, segments, package booking joined with
+# its custom itinerary, itinerary items, payments and invoices.
+DETAIL_LOAD_OPTIONS = (
+    selectinload(Booking.passengers),
+    selectinload(Booking.flight_bookings).selectinload(FlightBooking.segments),
+    selectinload(Booking.package_booking)
+        .joinedload(PackageBooking.custom_itinerary)
+        .selectinload(CustomItinerary.items),
+    selectinload(Booking.payments),
+    selectinload(Booking.invoices),
+)
+
+class GetBookingDetail:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def execute(self, booking_id: str) -> Booking:
+        try:
+            booking = self.db.query(Booking).options(*DETAIL_LOAD_OPTIONS).filter(Booking.id == booking_id).first()
+            if not booking:
+                raise BookingNotFound(f"Booking with ID {booking_id} not found")
+            return booking
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Database error while fetching booking detail: {str(e)}") from e
+
+
+class GetBookingDetails:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def execute(self, booking_ids: list[str]) -> list[Booking]:
+        """
+        Bulk variant of GetBookingDetail; the query count does not grow with the
+        number of bookings. Returns bookings in the order requested and skips
+        IDs that do not exist.
+        """
+        booking_ids = list(dict.fromkeys(booking_ids))
+        if not booking_ids:
+            return []
+        try:
+            bookings = self.db.query(Booking).options(*DETAIL_LOAD_OPTIONS).filter(Booking.id.in_(booking_ids)).all()
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Database error while fetching booking details: {str(e)}") from e
+
+        by_id = {booking.id: booking for booking in bookings}
+        return [by_id[booking_id] for booking_id in booking_ids if booking_id in by_id]
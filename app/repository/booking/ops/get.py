@@ -1,7 +1,11 @@
 from app.models import Booking
-from sqlalchemy.orm import Session
+from app.models.enums import BookingStatus, BookingType
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, Query
 from sqlalchemy.exc import SQLAlchemyError
-from app.repository.booking.exceptions import BookingNotFound, DatabaseError
+from app.repository.booking.exceptions import BookingNotFound, DatabaseError, InvalidBookingStatus, InvalidBookingQuery
+from app.utils.pagination import Page, encode_cursor, decode_cursor
+from typing import Iterator
 
 class GetBookingByID:
     def __init__(self, db: Session) -> None:
@@ -30,12 +34,82 @@ class GetBookingByReference:
             raise DatabaseError(f"Database error while fetching booking: {str(e)}") from e
 
 class GetUserBookings:
+    """
+    Lists a user's bookings newest first with keyset pagination on
+    (created_at, id), served by the ix_bookings_user_created index. Each page
+    costs one index range scan regardless of how deep the caller has paged.
+    """
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+
     def __init__(self, db: Session) -> None:
         self.db = db
 
-    def execute(self, user_id: str) -> list[Booking]:
+    def execute(self, user_id: str, limit: int = DEFAULT_LIMIT, cursor: str = None, status: str = None, booking_type: str = None) -> Page:
+        limit = max(1, min(limit or self.DEFAULT_LIMIT, self.MAX_LIMIT))
         try:
-            bookings = self.db.query(Booking).filter_by(user_id=user_id).all()
-            return bookings
+            query = self.filtered_query(user_id, status, booking_type)
+            if cursor:
+                try:
+                    created_at, booking_id = decode_cursor(cursor, 2)
+                except ValueError:
+                    raise InvalidBookingQuery("Invalid pagination cursor")
+                query = self.after(query, created_at, booking_id)
+
+            # One extra row tells us whether another page exists without a COUNT
+            bookings = query.limit(limit + 1).all()
+            next_cursor = None
+            if len(bookings) > limit:
+                bookings = bookings[:limit]
+                next_cursor = encode_cursor(bookings[-1].created_at, bookings[-1].id)
+            return Page(items=bookings, next_cursor=next_cursor)
+
         except SQLAlchemyError as e:
             raise DatabaseError(f"Database error while fetching user bookings: {str(e)}") from e
+
+    def filtered_query(self, user_id: str, status: str = None, booking_type: str = None) -> Query:
+        query = self.db.query(Booking).filter(Booking.user_id == user_id)
+        if status:
+            try:
+                query = query.filter(Booking.status == BookingStatus(status))
+            except ValueError:
+                raise InvalidBookingStatus(f"Invalid status: {status}")
+        if booking_type:
+            try:
+                query = query.filter(Booking.booking_type == BookingType(booking_type))
+            except ValueError:
+                raise InvalidBookingQuery(f"Invalid booking type: {booking_type}")
+        return query.order_by(Booking.created_at.desc(), Booking.id.desc())
+
+    @staticmethod
+    def after(query: Query, created_at, booking_id: str) -> Query:
+        return query.filter(or_(
+            Booking.created_at < created_at,
+            and_(Booking.created_at == created_at, Booking.id < booking_id)
+        ))
+
+
+class StreamUserBookings:
+    """
+    Yields every matching booking for exports, walking the same keyset as
+    GetUserBookings in fixed-size batches so memory stays flat and no server
+    cursor is held open between batches.
+    """
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def execute(self, user_id: str, status: str = None, booking_type: str = None, batch_size: int = 500) -> Iterator[Booking]:
+        lister = GetUserBookings(self.db)
+        query = lister.filtered_query(user_id, status, booking_type)
+        last = None
+        while True:
+            try:
+                batch_query = lister.after(query, *last) if last else query
+                batch = batch_query.limit(batch_size).all()
+            except SQLAlchemyError as e:
+                raise DatabaseError(f"Database error while streaming user bookings: {str(e)}") from e
+
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            last = (batch[-1].created_at, batch[-1].id)
@@ -0,0 +1,216 @@
+from app.models import Booking, BookingHold, Flight, FlightSeat
+from app.models.enums import BookingStatus, SeatStatus
+from flask import current_app, has_app_context
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from app.repository.booking.exceptions import BookingNotFound, DatabaseError, InvalidBookingStatus, HoldNotFound, HoldExpired
+from app.repository.booking.hold_index import HoldIndex
+from app.repository.flight.exceptions import FlightServiceException
+from app.repository.flight.ops.reserve import ReserveSeat
+from datetime import datetime, timedelta, timezone
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class HoldSeat:
+    def __init__(self, db: Session, index: HoldIndex = None) -> None:
+        self.db = db
+        self.index = index
+
+    def execute(self, booking_id: str, flight_data: dict, seat_number: str = None, ttl_seconds: int = None) -> BookingHold:
+        """
+        Places a seat on hold for the booking. The first hold starts the clock;
+        further seats held for the same booking share its expiry.
+        """
+        if ttl_seconds is None:
+            ttl_seconds = current_app.config.get('BOOKING_HOLD_TTL', 900) if has_app_context() else 900
+
+        try:
+            booking = self.db.query(Booking).filter_by(id=booking_id).first()
+            if not booking:
+                raise BookingNotFound(f"Booking with ID {booking_id} not found")
+            if booking.status not in (BookingStatus.PENDING, BookingStatus.HELD):
+                raise InvalidBookingStatus(f"Cannot hold seats for a {booking.status.value} booking")
+
+            now = datetime.now(timezone.utc)
+            hold = self.db.query(BookingHold).filter_by(booking_id=booking_id).first()
+            if hold and _as_utc(hold.expires_at) <= now:
+                raise HoldExpired(f"Hold for booking {booking_id} has expired")
+            if not hold:
+                hold = BookingHold(booking_id=booking_id, expires_at=now + timedelta(seconds=ttl_seconds))
+                self.db.add(hold)
+                self.db.flush()
+
+            ReserveSeat(self.db).reserve(booking_id, flight_data, seat_number, hold_id=hold.id)
+            booking.status = BookingStatus.HELD
+
+            self.db.commit()
+            self.db.refresh(hold)
+        except FlightServiceException:
+            self.db.rollback()
+            raise
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise DatabaseError(f"Database error while holding seat: {str(e)}") from e
+
+        (self.index or HoldIndex()).add(hold.id, _as_utc(hold.expires_at))
+        return hold
+
+
+class ConfirmHold:
+    def __init__(self, db: Session, index: HoldIndex = None) -> None:
+        self.db = db
+        self.index = index
+
+    def execute(self, booking_id: str) -> Booking:
+        """Converts a live hold into a confirmed booking using only keyed lookups (booking_id, hold_id)."""
+        try:
+            hold = self.db.query(BookingHold).filter_by(booking_id=booking_id).first()
+            if not hold:
+                raise HoldNotFound(f"No active hold for booking {booking_id}")
+            now = datetime.now(timezone.utc)
+            if _as_utc(hold.expires_at) <= now:
+                raise HoldExpired(f"Hold for booking {booking_id} has expired")
+
+            booking = hold.booking
+            if booking.status != BookingStatus.HELD:
+                raise InvalidBookingStatus(f"Cannot confirm a {booking.status.value} booking from a hold")
+
+            hold_id = hold.id
+            held_seats = self.db.query(func.count(FlightSeat.id)).filter(
+                FlightSeat.hold_id == hold_id,
+                FlightSeat.status == SeatStatus.HELD
+            ).scalar()
+
+            # The expiry is re-checked by the statements themselves: ReleaseExpiredHolds may have freed
+            # the seats (or be freeing them) since the check above
+            live_hold = self.db.query(BookingHold.id).filter(
+                BookingHold.id == hold_id,
+                BookingHold.expires_at > now
+            ).exists()
+            reserved = self.db.query(FlightSeat).filter(
+                FlightSeat.hold_id == hold_id,
+                FlightSeat.status == SeatStatus.HELD,
+                live_hold
+            ).update({
+                FlightSeat.status: SeatStatus.RESERVED,
+                FlightSeat.hold_id: None,
+                FlightSeat.version: FlightSeat.version + 1
+            }, synchronize_session=False)
+            deleted = self.db.query(BookingHold).filter(
+                BookingHold.id == hold_id,
+                BookingHold.expires_at > now
+            ).delete(synchronize_session=False)
+            self.db.expunge(hold)
+
+            if reserved != held_seats or deleted != 1:
+                self.db.rollback()
+                raise HoldExpired(f"Hold for booking {booking_id} expired before it was confirmed")
+
+            booking.status = BookingStatus.CONFIRMED
+            self.db.commit()
+            self.db.refresh(booking)
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise DatabaseError(f"Database error while confirming hold: {str(e)}") from e
+
+        (self.index or HoldIndex()).remove([hold_id])
+        return booking
+
+
+class ReleaseExpiredHolds:
+    def __init__(self, db: Session, index: HoldIndex = None) -> None:
+        self.db = db
+        self.index = index
+
+    def execute(self, batch_size: int = 500, use_index: bool = True) -> int:
+        """
+        Releases expired holds in batches and returns how many were released.
+        Each batch frees its seats, drops their provisional segments and returns
+        the bookings to PENDING with a handful of set-based statements.
+
+        Expired ids come from the Redis index when available; use_index=False
+        (or an unavailable index) scans booking_holds.expires_at instead, which
+        also catches holds that never made it into the index.
+        """
+        index = self.index or HoldIndex()
+        now = datetime.now(timezone.utc)
+        released = 0
+
+        try:
+            while True:
+                candidates = index.expired(now, batch_size) if use_index else None
+
+                if candidates is None:
+                    hold_ids = [row.id for row in self.db.query(BookingHold.id).filter(
+                        BookingHold.expires_at <= now
+                    ).limit(batch_size)]
+                    if not hold_ids:
+                        break
+                    self._release(hold_ids, now)
+                    index.remove(hold_ids)
+                    released += len(hold_ids)
+                    continue
+
+                if not candidates:
+                    break
+
+                rows = self.db.query(BookingHold.id, BookingHold.expires_at).filter(BookingHold.id.in_(candidates)).all()
+                hold_ids = [row.id for row in rows if _as_utc(row.expires_at) <= now]
+                # Not expired according to the database: re-score with the real expiry
+                for row in rows:
+                    if row.id not in hold_ids:
+                        index.add(row.id, _as_utc(row.expires_at))
+
+                if hold_ids:
+                    self._release(hold_ids, now)
+                    released += len(hold_ids)
+
+                # Ids the database no longer knows were confirmed or already released
+                known = {row.id for row in rows}
+                index.remove(hold_ids + [hold_id for hold_id in candidates if hold_id not in known])
+
+                if len(candidates) < batch_size:
+                    break
+
+            return released
+
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise DatabaseError(f"Database error while releasing expired holds: {str(e)}") from e
+
+    def _release(self, hold_ids: list[str], now: datetime) -> None:
+        flight_ids = [row.flight_id for row in self.db.query(FlightSeat.flight_id).filter(
+            FlightSeat.hold_id.in_(hold_ids),
+            FlightSeat.status == SeatStatus.HELD
+        )]
+
+        self.db.query(FlightSeat).filter(
+            FlightSeat.hold_id.in_(hold_ids),
+            FlightSeat.status == SeatStatus.HELD
+        ).update({
+            FlightSeat.status: SeatStatus.AVAILABLE,
+            FlightSeat.flight_id: None,
+            FlightSeat.hold_id: None,
+            FlightSeat.version: FlightSeat.version + 1
+        }, synchronize_session=False)
+
+        if flight_ids:
+            self.db.query(Flight).filter(Flight.id.in_(flight_ids)).delete(synchronize_session=False)
+
+        held_bookings = self.db.query(BookingHold.booking_id).filter(BookingHold.id.in_(hold_ids)).scalar_subquery()
+        self.db.query(Booking).filter(
+            Booking.id.in_(held_bookings),
+            Booking.status == BookingStatus.HELD
+        ).update({Booking.status: BookingStatus.PENDING}, synchronize_session=False)
+
+        self.db.query(BookingHold).filter(
+            BookingHold.id.in_(hold_ids),
+            BookingHold.expires_at <= now
+        ).delete(synchronize_session=False)
+
+        self.db.commit()
@@ -0,0 +1,85 @@
+from app.utils.sequences import SequenceAllocator, sequence_allocator
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+import hashlib
+import hmac
+
+# Crockford base32: no I, L, O or U, so codes survive being read out over the phone
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+PREFIX = "THRIVE-"
+
+
+class BookingReferenceGenerator:
+    """
+    Booking reference codes such as THRIVE-7K3M9QX2.
+
+    Each code encodes a value from the BOOKING_REF hi/lo sequence. Values are
+    unique, so codes are unique, and a process only touches the database once
+    per SEQUENCE_BLOCK_SIZE codes. A keyed Feistel permutation over the
+    40-bit space scrambles the value before encoding, so consecutive bookings
+    get unrelated codes and a code cannot be derived from a neighbour's
+    without the key. The permutation is a bijection, so decode() recovers the
+    sequence value.
+
+    The key must stay fixed once codes are issued; a new key maps future values
+    onto a different permutation that may hit existing codes.
+    """
+    SEQUENCE = "BOOKING_REF"
+    LENGTH = 8
+    ROUNDS = 4
+
+    def __init__(self, key: bytes = b"", allocator: SequenceAllocator = None) -> None:
+        self.key = key
+        self.allocator = allocator or sequence_allocator
+        self.half_bits = self.LENGTH * 5 // 2
+        self.half_mask = (1 << self.half_bits) - 1
+
+    def init_app(self, app) -> None:
+        key = app.config.get('BOOKING_REFERENCE_KEY') or app.config.get('SECRET_KEY') or ""
+        self.key = key.encode() if isinstance(key, str) else key
+        app.extensions['booking_reference_generator'] = self
+
+    def next_code(self, bind: Session | Engine) -> str:
+        return self.encode(self.allocator.next_value(bind, self.SEQUENCE))
+
+    def _round(self, index: int, half: int) -> int:
+        digest = hmac.new(self.key, bytes([index]) + half.to_bytes(4, "big"), hashlib.sha256).digest()
+        return int.from_bytes(digest[:4], "big") & self.half_mask
+
+    def permute(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.half_mask
+        for index in range(self.ROUNDS):
+            left, right = right, left ^ self._round(index, right)
+        return (left << self.half_bits) | right
+
+    def unpermute(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.half_mask
+        for index in reversed(range(self.ROUNDS)):
+            left, right = right ^ self._round(index, left), left
+        return (left << self.half_bits) | right
+
+    def encode(self, value: int) -> str:
+        if not 0 <= value < 1 << (self.LENGTH * 5):
+            raise ValueError(f"Sequence value {value} is outside the reference code space")
+        scrambled = self.permute(value)
+        chars = []
+        for _ in range(self.LENGTH):
+            scrambled, digit = divmod(scrambled, 32)
+            chars.append(ALPHABET[digit])
+        return PREFIX + "".join(reversed(chars))
+
+    def decode(self, code: str) -> int:
+        """The sequence value behind a code; raises ValueError for malformed codes."""
+        body = code.upper().removeprefix(PREFIX)
+        if len(body) != self.LENGTH:
+            raise ValueError(f"Invalid booking reference: {code}")
+        scrambled = 0
+        for char in body:
+            digit = ALPHABET.find(char)
+            if digit < 0:
+                raise ValueError(f"Invalid booking reference: {code}")
+            scrambled = scrambled * 32 + digit
+        return self.unpermute(scrambled)
+
+
+booking_reference_generator = BookingReferenceGenerator()
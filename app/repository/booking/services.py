@@ -1,13 +1,21 @@
 from sqlalchemy.orm import Session
-from app.models import Booking, Passenger
+from typing import Iterator
+from app.models import Booking, BookingHold, Passenger
+from app.utils.pagination import Page
 from app.repository.booking.ops import (
     CreateBooking,
     GetBookingByID,
     GetBookingByReference,
     GetUserBookings,
+    StreamUserBookings,
+    GetBookingDetail,
+    GetBookingDetails,
     UpdateBookingStatus,
     AddPassengerToBooking,
-    CancelBooking
+    CancelBooking,
+    HoldSeat,
+    ConfirmHold,
+    ReleaseExpiredHolds
 )
 
 class BookingService:
@@ -23,8 +31,17 @@ class BookingService:
     def get_booking_by_reference(self, reference_code: str) -> Booking:
         return GetBookingByReference(self.db).execute(reference_code)
     
-    def get_user_bookings(self, user_id: str) -> list[Booking]:
-        return GetUserBookings(self.db).execute(user_id)
+    def get_booking_detail(self, booking_id: str) -> Booking:
+        return GetBookingDetail(self.db).execute(booking_id)
+
+    def get_booking_details(self, booking_ids: list[str]) -> list[Booking]:
+        return GetBookingDetails(self.db).execute(booking_ids)
+
+    def get_user_bookings(self, user_id: str, limit: int = 20, cursor: str = None, status: str = None, booking_type: str = None) -> Page:
+        return GetUserBookings(self.db).execute(user_id, limit, cursor, status, booking_type)
+
+    def stream_user_bookings(self, user_id: str, status: str = None, booking_type: str = None, batch_size: int = 500) -> Iterator[Booking]:
+        return StreamUserBookings(self.db).execute(user_id, status, booking_type, batch_size)
 
     def update_booking_status(self, booking_id: str, new_status: str) -> Booking:
         return UpdateBookingStatus(self.db).execute(booking_id, new_status)
@@ -34,3 +51,12 @@ class BookingService:
         
     def cancel_booking(self, booking_id: str, reason: str = None) -> Booking:
         return CancelBooking(self.db).execute(booking_id, reason)
+
+    def hold_seat(self, booking_id: str, flight_data: dict, seat_number: str = None, ttl_seconds: int = None) -> BookingHold:
+        return HoldSeat(self.db).execute(booking_id, flight_data, seat_number, ttl_seconds)
+
+    def confirm_hold(self, booking_id: str) -> Booking:
+        return ConfirmHold(self.db).execute(booking_id)
+
+    def release_expired_holds(self, batch_size: int = 500, use_index: bool = True) -> int:
+        return ReleaseExpiredHolds(self.db).execute(batch_size, use_index)
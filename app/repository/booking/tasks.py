@@ -0,0 +1,18 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task(ignore_result=True)
+def release_expired_holds(use_index: bool = True, batch_size: int = 500):
+    """
+    Periodic sweep returning expired seat holds to inventory. Scheduled through
+    CELERYBEAT_SCHEDULE; the use_index=False run reconciles against the database.
+    """
+    from app.extensions import db
+    from app.repository.booking.services import BookingService
+
+    released = BookingService(db.session).release_expired_holds(batch_size=batch_size, use_index=use_index)
+    if released:
+        logger.info(f"Released {released} expired booking holds")
+    return released
@@ -0,0 +1,224 @@
+from email.message import Message
+from flask import current_app, has_app_context
+from app.repository.email.smtp_pool import SMTPSettings, is_disconnect
+import asyncio
+import atexit
+import logging
+import os
+import smtplib
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+def translate_error(error: Exception) -> Exception:
+    """
+    Maps aiosmtplib failures onto their smtplib equivalents so callers (retry
+    policy, bulk classification, is_disconnect) behave identically in both
+    sender modes.
+    """
+    import aiosmtplib
+
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return smtplib.SMTPRecipientsRefused({
+            refused.recipient: (refused.code, refused.message.encode()) for refused in error.recipients
+        })
+    if isinstance(error, (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, aiosmtplib.SMTPTimeoutError)):
+        return smtplib.SMTPServerDisconnected(str(error))
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return smtplib.SMTPResponseException(error.code, error.message.encode())
+    if isinstance(error, aiosmtplib.SMTPException):
+        return smtplib.SMTPException(str(error))
+    return error
+
+
+class AsyncPooledConnection:
+    __slots__ = ('smtp', 'created_at', 'last_used', 'messages_sent')
+
+    def __init__(self, smtp) -> None:
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+
+    @property
+    def reused(self) -> bool:
+        return self.last_used > self.created_at
+
+
+class AsyncSMTPPool:
+    """
+    aiosmtplib counterpart of SMTPConnectionPool for high-concurrency workers
+    (e.g. `--pool threads --concurrency 64`).
+
+    One event loop per process runs on a background thread. It owns up to
+    max_size authenticated sessions per SMTP server, and any number of caller
+    threads can have sends in flight over them. send_message() blocks the
+    calling thread only, and send_many() sends a list of messages concurrently.
+
+    Recycling, health checks and the single retry of a dropped reused
+    session mirror SMTPConnectionPool. Errors are raised as smtplib
+    exceptions (see translate_error), so tasks keep their success and
+    retry semantics.
+    """
+
+    def __init__(self, max_size: int = 8, max_messages: int = 100, max_age: float = 300.0,
+                 health_check_interval: float = 30.0) -> None:
+        self.max_size = max_size
+        self.max_messages = max_messages
+        self.max_age = max_age
+        self.health_check_interval = health_check_interval
+        self._start_lock = threading.Lock()
+        self._reset()
+        self.stats = dict.fromkeys(('created', 'reused', 'recycled', 'health_check_failures', 'reconnects'), 0)
+        atexit.register(self.close_all)
+
+    def init_app(self, app) -> None:
+        self.max_size = app.config.get('MAIL_ASYNC_POOL_SIZE', self.max_size)
+        self.max_messages = app.config.get('MAIL_POOL_MAX_MESSAGES', self.max_messages)
+        self.max_age = app.config.get('MAIL_POOL_MAX_AGE', self.max_age)
+        self.health_check_interval = app.config.get('MAIL_POOL_HEALTH_CHECK_INTERVAL', self.health_check_interval)
+        app.extensions['async_smtp_pool'] = self
+
+    def _reset(self) -> None:
+        # Loop-thread state; a forked child starts from scratch (the thread does not survive fork)
+        self._pid = os.getpid()
+        self._loop = None
+        self._idle: dict[SMTPSettings, list[AsyncPooledConnection]] = {}
+        self._slots: dict[SMTPSettings, asyncio.Semaphore] = {}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._start_lock = threading.Lock()
+                self._reset()
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-smtp-pool", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    def send_message(self, settings: SMTPSettings, msg: Message, from_addr: str = None, to_addrs: list = None) -> dict:
+        """Sends one message. Returns the refused-recipients dict, like smtplib."""
+        return self._run(self.send(settings, msg, from_addr, to_addrs))
+
+    def send_many(self, settings: SMTPSettings, messages: list[Message]) -> list:
+        """Sends messages concurrently; each result is a refused-recipients dict or the raised exception."""
+        async def send_all():
+            return await asyncio.gather(*(self.send(settings, msg) for msg in messages), return_exceptions=True)
+        return self._run(send_all())
+
+    async def send(self, settings: SMTPSettings, msg: Message, from_addr: str = None, to_addrs: list = None) -> dict:
+        slots = self._slots.get(settings)
+        if slots is None:
+            slots = self._slots[settings] = asyncio.Semaphore(self.max_size)
+        async with slots:
+            while True:
+                conn = await self._acquire(settings)
+                reused = conn.reused
+                try:
+                    errors, _ = await conn.smtp.send_message(msg, sender=from_addr, recipients=to_addrs)
+                except Exception as e:
+                    await self._close(conn.smtp)
+                    error = translate_error(e)
+                    if reused and is_disconnect(error):
+                        self.stats['reconnects'] += 1
+                        logger.info(f"Pooled SMTP session dropped ({error}); retrying on a fresh connection")
+                        continue
+                    raise error from e
+                conn.messages_sent += 1
+                await self._release(settings, conn)
+                return {recipient: (response.code, response.message.encode()) for recipient, response in errors.items()}
+
+    async def _connect(self, settings: SMTPSettings) -> AsyncPooledConnection:
+        import aiosmtplib
+
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.host, port=settings.port, timeout=settings.timeout, start_tls=settings.use_tls
+        )
+        try:
+            await smtp.connect()
+            if settings.username and settings.password:
+                await smtp.login(settings.username, settings.password)
+        except Exception as e:
+            await self._close(smtp)
+            raise translate_error(e) from e
+        self.stats['created'] += 1
+        return AsyncPooledConnection(smtp)
+
+    def _expired(self, conn: AsyncPooledConnection) -> bool:
+        return conn.messages_sent >= self.max_messages or time.monotonic() - conn.created_at >= self.max_age
+
+    async def _healthy(self, conn: AsyncPooledConnection) -> bool:
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return conn.smtp.is_connected
+        try:
+            response = await conn.smtp.noop()
+            return response.code == 250
+        except Exception:
+            return False
+
+    async def _acquire(self, settings: SMTPSettings) -> AsyncPooledConnection:
+        idle = self._idle.setdefault(settings, [])
+        while idle:
+            conn = idle.pop()
+            if self._expired(conn):
+                self.stats['recycled'] += 1
+                await self._close(conn.smtp)
+            elif not await self._healthy(conn):
+                self.stats['health_check_failures'] += 1
+                await self._close(conn.smtp)
+            else:
+                self.stats['reused'] += 1
+                return conn
+        return await self._connect(settings)
+
+    async def _release(self, settings: SMTPSettings, conn: AsyncPooledConnection) -> None:
+        conn.last_used = time.monotonic()
+        if self._expired(conn):
+            self.stats['recycled'] += 1
+            await self._close(conn.smtp)
+        else:
+            # Bounded by the per-server semaphore, so never more than max_size idle
+            self._idle.setdefault(settings, []).append(conn)
+
+    @staticmethod
+    async def _close(smtp) -> None:
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def close_all(self) -> None:
+        if self._loop is None or self._pid != os.getpid():
+            return
+
+        async def close():
+            connections = [conn for idle in self._idle.values() for conn in idle]
+            self._idle = {}
+            for conn in connections:
+                await self._close(conn.smtp)
+
+        loop = self._loop
+        try:
+            asyncio.run_coroutine_threadsafe(close(), loop).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"Failed to close async SMTP sessions cleanly: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        with self._start_lock:
+            self._reset()
+
+    def idle_count(self) -> int:
+        return sum(len(idle) for idle in self._idle.values())
+
+
+async_smtp_pool = AsyncSMTPPool()
+
+
+def get_async_smtp_pool() -> AsyncSMTPPool:
+    if has_app_context():
+        return current_app.extensions.get('async_smtp_pool', async_smtp_pool)
+    return async_smtp_pool
@@ -0,0 +1,128 @@
+from app.models import EmailDelivery
+from app.models.enums import EmailDeliveryStatus
+from app.utils.redis_client import get_redis
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+def delivery_key(*parts) -> str:
+    """Stable dedup key for one logical email, derived from what identifies it."""
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class EmailDeduplicator:
+    """
+    Records delivery state per dedup key so that task retries and duplicate
+    enqueues of the same email become no-ops within the dedup window.
+
+    A sender first claim()s the key, which only succeeds if nobody has sent or
+    is sending it. It then calls mark_sent() as soon as the server has
+    accepted the message, or release() if the send failed, so a retry can
+    claim it again. A claim left behind by a crashed worker lapses after
+    pending_ttl.
+
+    State lives in Redis when configured, otherwise in the email_deliveries
+    table. Errors in the store fail open: the email is sent rather than lost.
+    """
+    KEY_PREFIX = "email_delivery:"
+
+    def __init__(self, db: Session, ttl: int = 3600, pending_ttl: int = 600) -> None:
+        self.db = db
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+
+    @classmethod
+    def from_config(cls, db: Session, config) -> "EmailDeduplicator":
+        return cls(db, ttl=config.get('MAIL_DEDUP_TTL', 3600), pending_ttl=config.get('MAIL_DEDUP_PENDING_TTL', 600))
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def claim(self, key: str) -> bool:
+        """True if the caller should send this email now."""
+        if not self.enabled:
+            return True
+        client = get_redis()
+        if client is not None:
+            try:
+                return bool(client.set(f"{self.KEY_PREFIX}{key}", EmailDeliveryStatus.PENDING.value, nx=True, ex=self.pending_ttl))
+            except Exception as e:
+                logger.warning(f"Email dedup falling back to the database: {e}")
+        return self._claim_db(key)
+
+    def mark_sent(self, key: str) -> None:
+        if not self.enabled:
+            return
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(f"{self.KEY_PREFIX}{key}", EmailDeliveryStatus.SENT.value, ex=self.ttl)
+                return
+            except Exception as e:
+                logger.warning(f"Email dedup falling back to the database: {e}")
+        self._write_db(
+            update(EmailDelivery).where(EmailDelivery.dedup_key == key).values(
+                status=EmailDeliveryStatus.SENT, expires_at=self._expiry(self.ttl)
+            )
+        )
+
+    def release(self, key: str) -> None:
+        """Gives up a claim after a failed send so the next attempt can take it."""
+        if not self.enabled:
+            return
+        client = get_redis()
+        if client is not None:
+            try:
+                client.delete(f"{self.KEY_PREFIX}{key}")
+                return
+            except Exception as e:
+                logger.warning(f"Email dedup falling back to the database: {e}")
+        self._write_db(
+            delete(EmailDelivery).where(
+                EmailDelivery.dedup_key == key, EmailDelivery.status == EmailDeliveryStatus.PENDING
+            )
+        )
+
+    def purge_expired(self) -> int:
+        """Deletes database records whose window has passed. Redis keys expire on their own."""
+        return self._write_db(delete(EmailDelivery).where(EmailDelivery.expires_at < datetime.now(timezone.utc)))
+
+    @staticmethod
+    def _expiry(seconds: int) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+    def _claim_db(self, key: str) -> bool:
+        try:
+            self.db.add(EmailDelivery(dedup_key=key, expires_at=self._expiry(self.pending_ttl)))
+            self.db.commit()
+            return True
+        except IntegrityError:
+            self.db.rollback()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.warning(f"Email dedup claim failed, sending anyway: {e}")
+            return True
+
+        # The key exists; take it over only if its window has lapsed
+        return self._write_db(
+            update(EmailDelivery).where(
+                EmailDelivery.dedup_key == key, EmailDelivery.expires_at < datetime.now(timezone.utc)
+            ).values(status=EmailDeliveryStatus.PENDING, expires_at=self._expiry(self.pending_ttl)),
+            default=1
+        ) == 1
+
+    def _write_db(self, statement, default: int = 0) -> int:
+        try:
+            rowcount = self.db.execute(statement).rowcount
+            self.db.commit()
+            return rowcount
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.warning(f"Email dedup update failed: {e}")
+            return default
@@ -1,3 +1,5 @@
 from app.repository.email.ops.send import SendEmail
+from app.repository.email.ops.send_bulk import SendBulkEmail
 from app.repository.email.ops.send_template import SendEmailTemplate
 from app.repository.email.ops.render import RenderTemplate
+from app.repository.email.ops.send_transactional import SendTransactionalEmail
@@ -4,9 +4,9 @@ import logging
 logger = logging.getLogger(__name__)
 
 class SendEmail:
-    def execute(self, to_email: str, subject: str, body_html: str, from_email: str = None) -> bool:
+    def execute(self, to_email: str, subject: str, body_html: str, from_email: str = None, dedup_key: str = None) -> bool:
         try:
-            task = send_async_email.delay(to_email, subject, body_html, from_email)
+            task = send_async_email.delay(to_email, subject, body_html, from_email, dedup_key)
             logger.info(f"Email task queued: {task.id}")
             return True
         except Exception as e:
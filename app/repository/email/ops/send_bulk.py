@@ -0,0 +1,32 @@
+from flask import current_app, has_app_context
+from app.repository.email.tasks import send_bulk_email_batch
+from app.repository.email.exceptions import EmailSendingFailed
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SendBulkEmail:
+    DEFAULT_BATCH_SIZE = 50
+
+    def execute(self, recipients: list[str], subject: str, body_html: str, from_email: str = None, batch_size: int = None) -> list[str]:
+        """
+        Splits recipients (deduplicated, order kept) into batches and queues one
+        task per batch. Returns the batch task ids, whose results carry the
+        per-recipient outcome.
+        """
+        if batch_size is None:
+            batch_size = current_app.config.get('MAIL_BULK_BATCH_SIZE', self.DEFAULT_BATCH_SIZE) if has_app_context() else self.DEFAULT_BATCH_SIZE
+        recipients = list(dict.fromkeys(r.strip() for r in recipients if r and r.strip()))
+
+        task_ids = []
+        for start in range(0, len(recipients), batch_size):
+            batch = recipients[start:start + batch_size]
+            try:
+                task = send_bulk_email_batch.delay(batch, subject, body_html, from_email)
+            except Exception as e:
+                logger.error(f"Failed to queue bulk email batch at offset {start}: {str(e)}")
+                raise EmailSendingFailed(f"Queued {len(task_ids)} of {-(-len(recipients) // batch_size)} batches before failing: {str(e)}") from e
+            task_ids.append(task.id)
+
+        logger.info(f"Queued {len(recipients)} recipients in {len(task_ids)} bulk email batches")
+        return task_ids
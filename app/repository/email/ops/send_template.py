@@ -1,26 +1,22 @@
-from app.models import NotificationTemplate
 from sqlalchemy.orm import Session
-from jinja2 import Template
 from app.repository.email.exceptions import TemplateNotFound, TemplateRenderingError, EmailSendingFailed
 from app.repository.email.ops.send import SendEmail
+from app.repository.email.template_cache import NotificationTemplateCache, notification_template_cache
 
 class SendEmailTemplate:
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: Session, cache: NotificationTemplateCache = None) -> None:
         self.db = db
         self.sender = SendEmail()
+        self.cache = cache or notification_template_cache
 
     def execute(self, to_email: str, trigger_event: str, context: dict) -> bool:
-        template = self.db.query(NotificationTemplate).filter_by(trigger_event=trigger_event, is_active=True).first()
+        template = self.cache.get(self.db, trigger_event)
         
         if not template:
             raise TemplateNotFound(f"No active email template found for event: {trigger_event}")
 
         try:
-            subject_tmpl = Template(template.subject_template)
-            subject = subject_tmpl.render(**context)
-            
-            body_tmpl = Template(template.body_html_template)
-            body_html = body_tmpl.render(**context)
+            subject, body_html = template.render(context)
             
             return self.sender.execute(to_email, subject, body_html)
             
@@ -0,0 +1,36 @@
+from flask import current_app
+from app.repository.email.exceptions import TemplateNotFound
+from app.repository.email.ops.render import RenderTemplate
+from app.repository.email.ops.send import SendEmail
+from app.repository.email.tasks import send_transactional_email
+from app.repository.email.transactional import TRANSACTIONAL_EMAILS
+from app.models import User
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SendTransactionalEmail:
+    """
+    Sends one of the TRANSACTIONAL_EMAILS to a user.
+
+    With MAIL_RENDER_IN_WORKER on, only the email name, the user id and the
+    scalar params are queued; the worker loads the user and renders. Otherwise
+    the template is rendered here and the HTML is queued, as before.
+    """
+    def execute(self, email_name: str, user: User, params: dict = None) -> bool:
+        email = TRANSACTIONAL_EMAILS.get(email_name)
+        if email is None:
+            raise TemplateNotFound(f"Unknown transactional email: {email_name}")
+        params = params or {}
+
+        if current_app.config.get('MAIL_RENDER_IN_WORKER', True):
+            try:
+                task = send_transactional_email.delay(email_name, user.id, params)
+                logger.info(f"Transactional email task queued: {task.id}")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to queue transactional email task: {str(e)}")
+                return False
+
+        body = RenderTemplate().execute(email.template, email.build_context(user, params, current_app.config))
+        return SendEmail().execute(user.email, email.subject, body)
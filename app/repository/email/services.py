@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session
+from app.repository.email.template_cache import notification_template_cache
 from app.repository.email.ops import (
     SendEmail,
+    SendBulkEmail,
     SendEmailTemplate,
+    SendTransactionalEmail,
     RenderTemplate
 )
 
@@ -11,8 +14,24 @@ class EmailService:
         self._sender = SendEmail()
         self._renderer = RenderTemplate()
 
-    def send_email(self, to_email: str, subject: str, body_html: str, from_email: str = None) -> bool:
-        return self._sender.execute(to_email, subject, body_html, from_email)
+    def send_email(self, to_email: str, subject: str, body_html: str, from_email: str = None, dedup_key: str = None) -> bool:
+        """Queues the email; sends sharing a dedup_key are delivered once per MAIL_DEDUP_TTL window."""
+        return self._sender.execute(to_email, subject, body_html, from_email, dedup_key)
+
+    def send_bulk_email(self, recipients: list[str], subject: str, body_html: str, from_email: str = None, batch_size: int = None) -> list[str]:
+        """Queues the message for many recipients in batches; returns the batch task ids."""
+        return SendBulkEmail().execute(recipients, subject, body_html, from_email, batch_size)
+
+    def send_event_email(self, to_email: str, trigger_event: str, context: dict) -> bool:
+        """Renders the active NotificationTemplate for trigger_event (cached, compiled once) and queues it."""
+        return SendEmailTemplate(self.db).execute(to_email, trigger_event, context)
+
+    def send_transactional_email(self, email_name: str, user, params: dict = None) -> bool:
+        """Queues a welcome/verification/reset style email; see TRANSACTIONAL_EMAILS."""
+        return SendTransactionalEmail().execute(email_name, user, params)
+
+    def warm_template_cache(self) -> int:
+        return notification_template_cache.warm_up(self.db)
 
     def render_template(self, template_name: str, context: dict) -> str:
         """Renders an email template and returns the HTML string."""
@@ -0,0 +1,231 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.message import Message
+from flask import current_app, has_app_context
+import atexit
+import logging
+import os
+import smtplib
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+def is_disconnect(error: Exception) -> bool:
+    """
+    True for failures meaning the session is gone rather than the server
+    rejecting the message. smtplib's protocol errors subclass OSError, so they
+    are excluded explicitly.
+    """
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+@dataclass(frozen=True)
+class SMTPSettings:
+    host: str
+    port: int
+    username: str = None
+    password: str = None
+    use_tls: bool = True
+    timeout: float = 30.0
+
+    @classmethod
+    def from_config(cls, config) -> "SMTPSettings":
+        return cls(
+            host=config.get('MAIL_SERVER'),
+            port=config.get('MAIL_PORT'),
+            username=config.get('MAIL_USERNAME'),
+            password=config.get('MAIL_PASSWORD'),
+            use_tls=bool(config.get('MAIL_USE_TLS')),
+            timeout=config.get('MAIL_TIMEOUT', 30.0)
+        )
+
+
+class PooledConnection:
+    __slots__ = ('smtp', 'created_at', 'last_used', 'messages_sent')
+
+    def __init__(self, smtp: smtplib.SMTP) -> None:
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+
+    @property
+    def reused(self) -> bool:
+        return self.last_used > self.created_at
+
+
+class SMTPConnectionPool:
+    """
+    Per-process pool of authenticated SMTP sessions, so a worker pays the
+    TCP + STARTTLS + AUTH handshake once per connection instead of per message.
+
+    - Connections idle for longer than health_check_interval are probed with
+      NOOP before reuse and replaced if the probe fails.
+    - Connections are recycled after max_messages sends or max_age seconds,
+      which keeps us under provider per-session limits.
+    - A send that fails because a reused session was dropped is retried once
+      on a fresh connection.
+    - Fork-safe: a child process (Celery prefork) never touches sockets it
+      inherited from its parent; they are dropped, not closed, and the child
+      builds its own connections.
+    """
+
+    def __init__(self, max_size: int = 2, max_messages: int = 100, max_age: float = 300.0,
+                 health_check_interval: float = 30.0) -> None:
+        self.max_size = max_size
+        self.max_messages = max_messages
+        self.max_age = max_age
+        self.health_check_interval = health_check_interval
+        self._lock = threading.Lock()
+        self._idle: dict[SMTPSettings, list[PooledConnection]] = {}
+        self._pid = os.getpid()
+        self.stats = dict.fromkeys(('created', 'reused', 'recycled', 'health_check_failures', 'reconnects'), 0)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.close_all)
+
+    def init_app(self, app) -> None:
+        self.max_size = app.config.get('MAIL_POOL_SIZE', self.max_size)
+        self.max_messages = app.config.get('MAIL_POOL_MAX_MESSAGES', self.max_messages)
+        self.max_age = app.config.get('MAIL_POOL_MAX_AGE', self.max_age)
+        self.health_check_interval = app.config.get('MAIL_POOL_HEALTH_CHECK_INTERVAL', self.health_check_interval)
+        app.extensions['smtp_pool'] = self
+
+    def _after_fork(self) -> None:
+        # The parent still owns these sockets; closing them here would QUIT its sessions
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._pid = os.getpid()
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self._after_fork()
+
+    def _connect(self, settings: SMTPSettings) -> PooledConnection:
+        smtp = smtplib.SMTP(settings.host, settings.port, timeout=settings.timeout)
+        try:
+            if settings.use_tls:
+                smtp.starttls()
+            if settings.username and settings.password:
+                smtp.login(settings.username, settings.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        self._bump('created')
+        return PooledConnection(smtp)
+
+    def _expired(self, conn: PooledConnection) -> bool:
+        return conn.messages_sent >= self.max_messages or time.monotonic() - conn.created_at >= self.max_age
+
+    def _healthy(self, conn: PooledConnection) -> bool:
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return True
+        try:
+            code, _ = conn.smtp.noop()
+            return code == 250
+        except Exception:
+            return False
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def acquire(self, settings: SMTPSettings) -> PooledConnection:
+        self._check_pid()
+        while True:
+            with self._lock:
+                idle = self._idle.get(settings)
+                conn = idle.pop() if idle else None
+            if conn is None:
+                return self._connect(settings)
+            if self._expired(conn):
+                self._bump('recycled')
+                self._close(conn.smtp)
+                continue
+            if not self._healthy(conn):
+                self._bump('health_check_failures')
+                self._close(conn.smtp)
+                continue
+            self._bump('reused')
+            return conn
+
+    def release(self, settings: SMTPSettings, conn: PooledConnection, reusable: bool = True) -> None:
+        conn.last_used = time.monotonic()
+        if self._pid != os.getpid():
+            return
+        if reusable and not self._expired(conn):
+            with self._lock:
+                idle = self._idle.setdefault(settings, [])
+                if len(idle) < self.max_size:
+                    idle.append(conn)
+                    return
+        elif reusable and self._expired(conn):
+            self._bump('recycled')
+        self._close(conn.smtp)
+
+    @contextmanager
+    def connection(self, settings: SMTPSettings):
+        """Yields a pooled PooledConnection; it is discarded instead of returned if the block raises."""
+        conn = self.acquire(settings)
+        try:
+            yield conn
+        except Exception:
+            self.release(settings, conn, reusable=False)
+            raise
+        else:
+            self.release(settings, conn)
+
+    def send_message(self, settings: SMTPSettings, msg: Message, from_addr: str = None, to_addrs: list = None) -> dict:
+        """Sends one message over a pooled session. Returns smtplib's refused-recipients dict."""
+        while True:
+            conn = self.acquire(settings)
+            reused = conn.reused
+            try:
+                refused = conn.smtp.send_message(msg, from_addr, to_addrs)
+            except Exception as e:
+                self.release(settings, conn, reusable=False)
+                # A pooled session the server dropped since its last use; a new
+                # connection failing the same way is a real error
+                if reused and is_disconnect(e):
+                    self._bump('reconnects')
+                    logger.info(f"Pooled SMTP session dropped ({e}); retrying on a fresh connection")
+                    continue
+                raise
+            conn.messages_sent += 1
+            self.release(settings, conn)
+            return refused
+
+    def close_all(self) -> None:
+        if self._pid != os.getpid():
+            return
+        with self._lock:
+            connections = [conn for idle in self._idle.values() for conn in idle]
+            self._idle = {}
+        for conn in connections:
+            self._close(conn.smtp)
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+
+smtp_pool = SMTPConnectionPool()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    if has_app_context():
+        return current_app.extensions.get('smtp_pool', smtp_pool)
+    return smtp_pool
@@ -1,47 +1,237 @@
 from celery import shared_task
-import smtplib
+from celery.signals import worker_process_shutdown
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from flask import current_app
+from app.repository.email.smtp_pool import SMTPSettings, get_smtp_pool, smtp_pool, is_disconnect
+from app.repository.email.async_smtp_pool import async_smtp_pool, get_async_smtp_pool
+from app.repository.email.dedup import EmailDeduplicator, delivery_key
+from app.utils.rate_limit import TokenBucket
+import json
 import logging
+import smtplib
 
 logger = logging.getLogger(__name__)
 
+def build_message(from_email: str, to_email: str, subject: str, body_html: str) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body_html, 'html'))
+    return msg
+
+def get_mail_sender():
+    """The pool single messages go through: smtplib (default) or aiosmtplib, per MAIL_SENDER_MODE."""
+    if current_app.config.get('MAIL_SENDER_MODE', 'sync') == 'async':
+        return get_async_smtp_pool()
+    return get_smtp_pool()
+
+def provider_bucket(settings: SMTPSettings) -> TokenBucket:
+    """The sending-rate bucket for an SMTP provider, shared by all workers."""
+    return TokenBucket(
+        f"smtp:{settings.host}",
+        rate=current_app.config.get('MAIL_RATE_LIMIT', 0),
+        capacity=current_app.config.get('MAIL_RATE_BURST', 10)
+    )
+
+@worker_process_shutdown.connect
+def close_smtp_sessions(**kwargs):
+    # Prefork children exit without running atexit hooks
+    smtp_pool.close_all()
+    async_smtp_pool.close_all()
+
+def _deduplicator():
+    from app.extensions import db
+    return EmailDeduplicator.from_config(db.session, current_app.config)
+
+def _send(settings: SMTPSettings, msg) -> None:
+    provider_bucket(settings).take(force=True)
+    get_mail_sender().send_message(settings, msg)
+
 @shared_task(ignore_result=False, bind=True, max_retries=3, default_retry_delay=60)
-def send_async_email(self, to_email: str, subject: str, body_html: str, from_email: str = None):
+def send_async_email(self, to_email: str, subject: str, body_html: str, from_email: str = None, dedup_key: str = None):
     """
-    Background task to send an email via SMTP.
+    Background task to send an email via SMTP, reusing the worker's pooled session
+    (see get_mail_sender).
+
+    Delivery is idempotent per dedup_key (by default a hash of the message), so
+    a retry after the server accepted the message, or the same email queued
+    twice within MAIL_DEDUP_TTL, is skipped.
     """
-    try:
-        smtp_server = current_app.config.get('MAIL_SERVER')
-        smtp_port = current_app.config.get('MAIL_PORT')
-        smtp_user = current_app.config.get('MAIL_USERNAME')
-        smtp_password = current_app.config.get('MAIL_PASSWORD')
-        use_tls = current_app.config.get('MAIL_USE_TLS')
-        default_sender = current_app.config.get('MAIL_DEFAULT_SENDER')
-
-        if not from_email:
-            from_email = default_sender
-
-        if not all([smtp_server, smtp_port, smtp_user, smtp_password]):
-             logger.warning("Email configuration missing. Email will not be sent.")
-             return "Configuration missing"
-
-        msg = MIMEMultipart()
-        msg['From'] = from_email
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body_html, 'html'))
-
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            if use_tls:
-                server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.send_message(msg)
-            
-        logger.info(f"Email sent successfully to {to_email}")
-        return f"Sent to {to_email}"
+    settings = SMTPSettings.from_config(current_app.config)
+
+    if not from_email:
+        from_email = current_app.config.get('MAIL_DEFAULT_SENDER')
 
+    if not all([settings.host, settings.port, settings.username, settings.password]):
+         logger.warning("Email configuration missing. Email will not be sent.")
+         return "Configuration missing"
+
+    dedup = _deduplicator()
+    dedup_key = dedup_key or delivery_key(to_email, subject, body_html, from_email)
+    if not dedup.claim(dedup_key):
+        logger.info(f"Email to {to_email} already sent or in progress; skipping duplicate")
+        return "Duplicate"
+
+    try:
+        _send(settings, build_message(from_email, to_email, subject, body_html))
     except Exception as e:
+        dedup.release(dedup_key)
         logger.error(f"Failed to send email to {to_email}: {e}")
         self.retry(exc=e)
+    dedup.mark_sent(dedup_key)
+
+    logger.info(f"Email sent successfully to {to_email}")
+    return f"Sent to {to_email}"
+
+@shared_task(ignore_result=False, bind=True, max_retries=3, default_retry_delay=60)
+def send_transactional_email(self, email_name: str, user_id: str, params: dict = None, dedup_key: str = None):
+    """
+    Loads the recipient, renders one of the TRANSACTIONAL_EMAILS and sends it.
+    The payload carries only the email name, the user id and small scalars.
+    Rendering failures are not retried; they would fail the same way again.
+
+    Deduplicated like send_async_email; the default key is the email name,
+    user and params, so a double-clicked form sends one email.
+    """
+    from app.extensions import db
+    from app.models import User
+    from app.repository.email.ops.render import RenderTemplate
+    from app.repository.email.transactional import TRANSACTIONAL_EMAILS
+
+    email = TRANSACTIONAL_EMAILS.get(email_name)
+    if email is None:
+        logger.error(f"Unknown transactional email {email_name}; dropping task")
+        return "Unknown email"
+
+    settings = SMTPSettings.from_config(current_app.config)
+    if not all([settings.host, settings.port, settings.username, settings.password]):
+        logger.warning("Email configuration missing. Email will not be sent.")
+        return "Configuration missing"
+
+    dedup = _deduplicator()
+    dedup_key = dedup_key or delivery_key(email_name, user_id, json.dumps(params or {}, sort_keys=True))
+    if not dedup.claim(dedup_key):
+        logger.info(f"{email_name} email for user {user_id} already sent or in progress; skipping duplicate")
+        return "Duplicate"
+
+    try:
+        user = db.session.get(User, user_id)
+        if user is None:
+            logger.warning(f"User {user_id} no longer exists; {email_name} email not sent")
+            dedup.release(dedup_key)
+            return "User not found"
+        body_html = RenderTemplate().execute(email.template, email.build_context(user, params or {}, current_app.config))
+        to_email = user.email
+    except Exception:
+        dedup.release(dedup_key)
+        raise
+
+    try:
+        _send(settings, build_message(current_app.config.get('MAIL_DEFAULT_SENDER'), to_email, email.subject, body_html))
+    except Exception as e:
+        dedup.release(dedup_key)
+        logger.error(f"Failed to send {email_name} email to {to_email}: {e}")
+        self.retry(exc=e)
+    dedup.mark_sent(dedup_key)
+
+    logger.info(f"{email_name} email sent to {to_email}")
+    return f"Sent to {to_email}"
+
+@shared_task(ignore_result=True)
+def purge_email_deliveries():
+    """Periodic cleanup of lapsed email dedup records kept in the database."""
+    purged = _deduplicator().purge_expired()
+    if purged:
+        logger.info(f"Purged {purged} expired email delivery records")
+    return purged
+
+def _classify(error: Exception, recipient: str) -> tuple[bool, str]:
+    """Returns (permanent, reason) for a failed recipient."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        code, message = error.recipients.get(recipient, (None, b''))
+        reason = f"{code} {message.decode(errors='replace') if isinstance(message, bytes) else message}"
+        return bool(code and code >= 500), reason
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500, f"{error.smtp_code} {error.smtp_error.decode(errors='replace')}"
+    return False, str(error)
+
+@shared_task(ignore_result=False, bind=True)
+def send_bulk_email_batch(self, recipients: list[str], subject: str, body_html: str, from_email: str = None, attempt: int = 1):
+    """
+    Sends one message per recipient over a single pooled SMTP session and
+    reports the outcome per address:
+
+        {"sent": [...], "rejected": {addr: reason}, "deferred": {addr: reason},
+         "attempt": n, "retry_task_id": id | None}
+
+    Permanent (5xx) rejections are final. Temporary failures are re-sent by a
+    follow-up batch containing only those addresses, with linear backoff, until
+    MAIL_BULK_MAX_ATTEMPTS is reached. A dropped session is replaced once per
+    batch so one stale connection doesn't defer the whole batch.
+
+    Each message waits for a token from the provider's bucket, so concurrent
+    batches together stay under MAIL_RATE_LIMIT.
+    """
+    settings = SMTPSettings.from_config(current_app.config)
+    from_email = from_email or current_app.config.get('MAIL_DEFAULT_SENDER')
+    if not all([settings.host, settings.port, settings.username, settings.password]):
+        logger.warning("Email configuration missing. Bulk email will not be sent.")
+        return "Configuration missing"
+
+    report = {"sent": [], "rejected": {}, "deferred": {}, "attempt": attempt, "retry_task_id": None}
+    pool = get_smtp_pool()
+    bucket = provider_bucket(settings)
+    pending = list(recipients)
+    conn = None
+    reconnects_left = 1
+
+    try:
+        conn = pool.acquire(settings)
+        while pending:
+            recipient = pending[0]
+            bucket.acquire()
+            try:
+                conn.smtp.send_message(build_message(from_email, recipient, subject, body_html))
+            except Exception as e:
+                if is_disconnect(e) and reconnects_left:
+                    reconnects_left -= 1
+                    pool.release(settings, conn, reusable=False)
+                    conn = None
+                    conn = pool.acquire(settings)
+                    continue
+                if is_disconnect(e):
+                    raise
+                permanent, reason = _classify(e, recipient)
+                report["rejected" if permanent else "deferred"][recipient] = reason
+            else:
+                conn.messages_sent += 1
+                report["sent"].append(recipient)
+            pending.pop(0)
+    except Exception as e:
+        # The session is unusable: everything not yet attempted is deferred
+        logger.error(f"Bulk email session failed with {len(pending)} recipients left: {e}")
+        for recipient in pending:
+            report["deferred"][recipient] = str(e)
+        if conn is not None:
+            pool.release(settings, conn, reusable=False)
+            conn = None
+    finally:
+        if conn is not None:
+            pool.release(settings, conn)
+
+    max_attempts = current_app.config.get('MAIL_BULK_MAX_ATTEMPTS', 4)
+    if report["deferred"] and attempt < max_attempts:
+        retry = send_bulk_email_batch.apply_async(
+            args=(list(report["deferred"]), subject, body_html, from_email),
+            kwargs={"attempt": attempt + 1},
+            countdown=current_app.config.get('MAIL_BULK_RETRY_DELAY', 60) * attempt
+        )
+        report["retry_task_id"] = retry.id
+
+    logger.info(
+        f"Bulk batch attempt {attempt}: {len(report['sent'])} sent, {len(report['rejected'])} rejected, "
+        f"{len(report['deferred'])} deferred"
+    )
+    return report
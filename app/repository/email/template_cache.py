@@ -0,0 +1,133 @@
+from app.models import NotificationTemplate
+from app.utils.cache import LRUCache
+from app.utils.invalidation import SharedVersion, invalidate_on_change
+from jinja2 import Environment, Template
+from sqlalchemy.orm import Session
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledTemplate:
+    __slots__ = ('template_id', 'updated_at', 'subject', 'body')
+
+    def __init__(self, template_id: str, updated_at, subject: Template, body: Template) -> None:
+        self.template_id = template_id
+        self.updated_at = updated_at
+        self.subject = subject
+        self.body = body
+
+    def render(self, context: dict) -> tuple[str, str]:
+        return self.subject.render(**context), self.body.render(**context)
+
+
+class NotificationTemplateCache:
+    """
+    Process-wide cache of compiled NotificationTemplate subject/body pairs.
+
+    Compiled templates are keyed on (template id, updated_at), so an edited
+    template can never be served from its old compilation. The trigger_event
+    -> template lookup is cached too, making repeat renders free of both DB
+    queries and Jinja compilation. It is dropped:
+      - immediately in this process when a template is inserted, updated or
+        deleted through the ORM (see invalidate_on_change),
+      - in other processes when they notice the shared Redis version bumped
+        once that edit commits (checked at most every version_check_interval
+        seconds),
+      - and in any case after refresh_interval seconds, which bounds
+        staleness when Redis is unavailable.
+    """
+    VERSION_KEY = "notification_templates:version"
+
+    def __init__(self, maxsize: int = 256, refresh_interval: float = 300.0, version_check_interval: float = 1.0) -> None:
+        # Same settings as jinja2.Template's implicit environment, so output is unchanged
+        self.env = Environment()
+        self.refresh_interval = refresh_interval
+        self.version_check_interval = version_check_interval
+        self._compiled = LRUCache(maxsize)
+        self._by_event: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._shared_version = SharedVersion(self.VERSION_KEY, self._drop_events, version_check_interval)
+        self.stats = dict.fromkeys(('hits', 'lookups', 'compiles', 'invalidations'), 0)
+
+    def init_app(self, app) -> None:
+        self.refresh_interval = app.config.get('NOTIFICATION_TEMPLATE_REFRESH_INTERVAL', self.refresh_interval)
+        app.extensions['notification_template_cache'] = self
+
+    def get(self, db: Session, trigger_event: str) -> CompiledTemplate | None:
+        """Returns the compiled active template for trigger_event, or None if there is none."""
+        self._shared_version.sync()
+        now = time.monotonic()
+        with self._lock:
+            cached = self._by_event.get(trigger_event)
+        if cached and now - cached[1] < self.refresh_interval:
+            compiled = self._compiled.get(cached[0])
+            if compiled is not None:
+                self._bump('hits')
+                return compiled
+
+        self._bump('lookups')
+        template = db.query(NotificationTemplate).filter_by(trigger_event=trigger_event, is_active=True).first()
+        if not template:
+            with self._lock:
+                self._by_event.pop(trigger_event, None)
+            return None
+        return self._store(template, now)
+
+    def warm_up(self, db: Session) -> int:
+        """Compiles every active template ahead of traffic. Returns how many were loaded."""
+        now = time.monotonic()
+        templates = db.query(NotificationTemplate).filter_by(is_active=True).all()
+        for template in templates:
+            self._store(template, now)
+        logger.info(f"Warmed {len(templates)} notification templates")
+        return len(templates)
+
+    def invalidate(self, trigger_event: str = None, broadcast: bool = True) -> None:
+        """Drops the event lookup for trigger_event (or all events); compiled templates stay keyed by version."""
+        with self._lock:
+            if trigger_event is None:
+                self._by_event.clear()
+            else:
+                self._by_event.pop(trigger_event, None)
+        self._bump('invalidations')
+        if broadcast:
+            self._shared_version.broadcast()
+
+    def clear(self) -> None:
+        self._drop_events()
+        self._compiled.clear()
+
+    def _drop_events(self) -> None:
+        with self._lock:
+            self._by_event.clear()
+
+    def _store(self, template: NotificationTemplate, now: float) -> CompiledTemplate:
+        key = (template.id, template.updated_at)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = CompiledTemplate(
+                template.id,
+                template.updated_at,
+                self.env.from_string(template.subject_template or ""),
+                self.env.from_string(template.body_html_template or "")
+            )
+            self._bump('compiles')
+            # Entries are immutable per key; expiry is handled by the event map
+            self._compiled.set(key, compiled, ttl=float('inf'))
+        with self._lock:
+            self._by_event[template.trigger_event] = (key, now)
+        return compiled
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+
+notification_template_cache = NotificationTemplateCache()
+
+
+# Everything, not just the edited template's trigger_event: an edit may have moved it to another event
+invalidate_on_change(NotificationTemplate, notification_template_cache.invalidate)
@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+from app.models import User
+
+
+@dataclass(frozen=True)
+class TransactionalEmail:
+    """
+    A user-facing email rendered from a Flask template. build_context turns the
+    recipient plus the small scalar params queued with the task (tokens, never
+    entities) into the template context, so the same definition serves both
+    in-request and in-worker rendering.
+    """
+    template: str
+    subject: str
+    build_context: Callable[[User, dict, dict], dict]
+
+
+def _frontend_url(config: dict) -> str:
+    return config.get('FRONTEND_URL', 'http://localhost:3000')
+
+def _welcome_context(user: User, params: dict, config: dict) -> dict:
+    return {
+        "user": user,
+        "year": datetime.now().year,
+        "dashboard_url": f"{_frontend_url(config)}/dashboard"
+    }
+
+def _verification_context(user: User, params: dict, config: dict) -> dict:
+    token = params["token"]
+    return {
+        "user": user,
+        "token": token,
+        "verification_url": f"{_frontend_url(config)}/verify-email?token={token}&user_id={user.id}",
+        "year": datetime.now().year
+    }
+
+def _password_reset_context(user: User, params: dict, config: dict) -> dict:
+    return {
+        "user": user,
+        "reset_url": f"{_frontend_url(config)}/reset-password?token={params['token']}&email={user.email}",
+        "year": datetime.now().year
+    }
+
+
+TRANSACTIONAL_EMAILS = {
+    "welcome": TransactionalEmail("welcome_email.html", "Welcome to Thrive Travels!", _welcome_context),
+    "verify_email": TransactionalEmail("verify_email.html", "Verify Your Email - Thrive Travels", _verification_context),
+    "password_reset": TransactionalEmail("reset_password.html", "Reset Your Password - Thrive Travels", _password_reset_context),
+}
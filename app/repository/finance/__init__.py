@@ -4,5 +4,6 @@ from app.repository.finance.exceptions import (
     PaymentFailed,
     InvoiceGenerationFailed,
     DatabaseError,
-    InvalidAmount
+    InvalidAmount,
+    IdempotencyKeyReused
 )
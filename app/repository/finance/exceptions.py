@@ -17,3 +17,7 @@ class DatabaseError(FinanceServiceException):
 class InvalidAmount(FinanceServiceException):
     """Raised when payment amount is invalid"""
     pass
+
+class IdempotencyKeyReused(FinanceServiceException):
+    """Raised when an idempotency key is reused for a different payment"""
+    pass
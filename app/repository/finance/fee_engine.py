@@ -0,0 +1,147 @@
+from app.models import ServiceFeeRule
+from app.models.enums import FeeType
+from app.utils.invalidation import SharedVersion, invalidate_on_change
+from sqlalchemy.orm import Session
+import numpy as np
+import threading
+import time
+
+
+class FeeSchedule:
+    """
+    The active rules of one FeeType, compiled into parallel arrays in
+    application order: priority descending, then name. A rule applies when the
+    order amount is at least its min_order_amount; its fee is
+    amount * percent / 100 + fixed, rounded to cents.
+    """
+    __slots__ = ('rule_ids', 'names', 'currencies', 'thresholds', 'percents', 'fixed')
+
+    def __init__(self, rules: list[ServiceFeeRule]) -> None:
+        rules = sorted(rules, key=lambda rule: (-(rule.priority or 0), rule.name, rule.id))
+        self.rule_ids = [rule.id for rule in rules]
+        self.names = [rule.name for rule in rules]
+        self.currencies = [rule.currency for rule in rules]
+        self.thresholds = np.array([rule.min_order_amount or 0.0 for rule in rules], dtype=np.float64)
+        self.percents = np.array([rule.amount_percent or 0.0 for rule in rules], dtype=np.float64)
+        self.fixed = np.array([rule.amount_fixed or 0.0 for rule in rules], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.rule_ids)
+
+    def fee_matrix(self, amounts: np.ndarray) -> np.ndarray:
+        """(len(amounts), len(rules)) matrix of per-rule fees, zero where a rule doesn't apply."""
+        amounts = amounts[:, np.newaxis]
+        fees = np.round(amounts * (self.percents / 100.0) + self.fixed, 2)
+        return np.where(amounts >= self.thresholds, fees, 0.0)
+
+    def quote(self, amount: float) -> list[dict]:
+        fees = self.fee_matrix(np.array([amount], dtype=np.float64))[0]
+        applicable = np.flatnonzero(amount >= self.thresholds)
+        return [
+            {
+                "rule_id": self.rule_ids[i],
+                "description": self.names[i],
+                "amount": float(fees[i]),
+                "currency": self.currencies[i]
+            }
+            for i in applicable
+        ]
+
+    def totals(self, amounts, adjust=None) -> np.ndarray:
+        """
+        Total fees per amount. adjust(flat_amounts, fee_matrix) may return per-fee
+        reductions (e.g. PlanWaivers for this fee type) to subtract first.
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if not len(self):
+            return np.zeros(amounts.shape, dtype=np.float64)
+        flat = amounts.ravel()
+        fees = self.fee_matrix(flat)
+        if adjust is not None:
+            fees = fees - adjust(flat, fees)
+        return np.round(fees.sum(axis=1), 2).reshape(amounts.shape)
+
+
+EMPTY_SCHEDULE = FeeSchedule([])
+
+
+class FeeEngine:
+    """
+    Process-wide, compiled view of the active ServiceFeeRule rows.
+
+    All active rules are loaded in one query and compiled into a FeeSchedule
+    per FeeType; quoting afterwards runs no SQL. The compiled rules are
+    dropped when a rule is inserted, updated or deleted through the ORM
+    (in this process directly, in others through a Redis version bump), and
+    in any case after refresh_interval seconds.
+    """
+    VERSION_KEY = "service_fee_rules:version"
+
+    def __init__(self, refresh_interval: float = 300.0, version_check_interval: float = 1.0) -> None:
+        self.refresh_interval = refresh_interval
+        self.version_check_interval = version_check_interval
+        self._schedules: dict[FeeType, FeeSchedule] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._shared_version = SharedVersion(self.VERSION_KEY, self._drop, version_check_interval)
+        self.stats = dict.fromkeys(('loads', 'invalidations'), 0)
+
+    def init_app(self, app) -> None:
+        self.refresh_interval = app.config.get('FEE_RULES_REFRESH_INTERVAL', self.refresh_interval)
+        app.extensions['fee_engine'] = self
+
+    def schedule(self, db: Session, fee_type: FeeType) -> FeeSchedule:
+        return self._compiled(db).get(fee_type, EMPTY_SCHEDULE)
+
+    def quote(self, db: Session, fee_type: FeeType, amount: float, waivers=None) -> list[dict]:
+        """Applicable fees for one order amount, in priority order, less any subscription waivers."""
+        fees = self.schedule(db, fee_type).quote(amount)
+        if waivers is not None:
+            fees = waivers.apply(fee_type, amount, fees)
+        return fees
+
+    def quote_batch(self, db: Session, fee_type: FeeType, amounts, waivers=None) -> np.ndarray:
+        """
+        Total fees for many order amounts at once (same shape as amounts), e.g.
+        the all-in prices of a search results page. Each total equals the sum
+        of quote() for that amount. Rules in different currencies are summed
+        as-is, like the itemised quote.
+        """
+        adjust = None
+        if waivers is not None:
+            def adjust(flat, fees):
+                return waivers.waivers(fee_type, flat, fees)
+        return self.schedule(db, fee_type).totals(amounts, adjust)
+
+    def invalidate(self, broadcast: bool = True) -> None:
+        self._drop()
+        self.stats['invalidations'] += 1
+        if broadcast:
+            self._shared_version.broadcast()
+
+    def _drop(self) -> None:
+        with self._lock:
+            self._schedules = None
+
+    def _compiled(self, db: Session) -> dict[FeeType, FeeSchedule]:
+        self._shared_version.sync()
+        schedules = self._schedules
+        if schedules is not None and time.monotonic() - self._loaded_at < self.refresh_interval:
+            return schedules
+
+        with self._lock:
+            if self._schedules is not None and time.monotonic() - self._loaded_at < self.refresh_interval:
+                return self._schedules
+            by_type: dict[FeeType, list[ServiceFeeRule]] = {}
+            for rule in db.query(ServiceFeeRule).filter_by(is_active=True):
+                by_type.setdefault(rule.fee_type, []).append(rule)
+            self._schedules = {fee_type: FeeSchedule(rules) for fee_type, rules in by_type.items()}
+            self._loaded_at = time.monotonic()
+            self.stats['loads'] += 1
+            return self._schedules
+
+
+fee_engine = FeeEngine()
+
+
+invalidate_on_change(ServiceFeeRule, fee_engine.invalidate)
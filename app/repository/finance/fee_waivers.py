@@ -0,0 +1,178 @@
+from app.models import SubscriptionPlan, User
+from app.models.enums import FeeType, SubscriptionTier
+from app.utils.invalidation import SharedVersion, invalidate_on_change
+from dataclasses import dataclass
+from sqlalchemy.orm import Session
+import logging
+import numpy as np
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WaiverRule:
+    """
+    One entry of SubscriptionPlan.fee_waiver_rules:
+
+        {"fee_types": ["flight_domestic", "service_fee"],  # omitted = every fee type
+         "waive_percent": 100,                             # share of each fee waived
+         "min_order_amount": 0, "max_order_amount": 5000,  # order amount window, inclusive
+         "max_waiver_amount": 25}                          # cap per fee
+
+    The column holds a list of these (or {"rules": [...]}); the first rule
+    matching a quote decides its waiver.
+    """
+    fee_types: frozenset = None
+    waive_percent: float = 100.0
+    min_order_amount: float = 0.0
+    max_order_amount: float = None
+    max_waiver_amount: float = None
+
+    @classmethod
+    def parse(cls, raw: dict) -> "WaiverRule":
+        fee_types = raw.get("fee_types")
+        if isinstance(fee_types, str):
+            fee_types = [fee_types]
+        return cls(
+            fee_types=frozenset(FeeType(value) for value in fee_types) if fee_types else None,
+            waive_percent=min(100.0, max(0.0, float(raw.get("waive_percent", 100.0)))),
+            min_order_amount=float(raw.get("min_order_amount") or 0.0),
+            max_order_amount=float(raw["max_order_amount"]) if raw.get("max_order_amount") is not None else None,
+            max_waiver_amount=float(raw["max_waiver_amount"]) if raw.get("max_waiver_amount") is not None else None
+        )
+
+    def covers(self, fee_type: FeeType) -> bool:
+        return self.fee_types is None or fee_type in self.fee_types
+
+    def matches(self, amounts: np.ndarray) -> np.ndarray:
+        mask = amounts >= self.min_order_amount
+        if self.max_order_amount is not None:
+            mask &= amounts <= self.max_order_amount
+        return mask
+
+    def waived(self, fees: np.ndarray) -> np.ndarray:
+        waived = np.round(fees * (self.waive_percent / 100.0), 2)
+        if self.max_waiver_amount is not None:
+            waived = np.minimum(waived, self.max_waiver_amount)
+        return waived
+
+
+class PlanWaivers:
+    """A plan's fee_waiver_rules parsed once; malformed entries are logged and skipped."""
+    __slots__ = ('plan_id', 'updated_at', 'rules')
+
+    def __init__(self, plan: SubscriptionPlan) -> None:
+        self.plan_id = plan.id
+        self.updated_at = plan.updated_at
+        raw_rules = plan.fee_waiver_rules or []
+        if isinstance(raw_rules, dict):
+            raw_rules = raw_rules.get("rules", [])
+        self.rules = []
+        for raw in raw_rules:
+            try:
+                self.rules.append(WaiverRule.parse(raw))
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping invalid fee waiver rule {raw!r} on plan {plan.id}: {e}")
+
+    def waivers(self, fee_type: FeeType, amounts: np.ndarray, fee_matrix: np.ndarray) -> np.ndarray:
+        """Per-fee waived amounts for a (len(amounts), rules) fee matrix from FeeSchedule."""
+        waived = np.zeros_like(fee_matrix)
+        undecided = np.ones(amounts.shape, dtype=bool)
+        for rule in self.rules:
+            if not rule.covers(fee_type):
+                continue
+            rows = undecided & rule.matches(amounts)
+            if rows.any():
+                waived[rows] = rule.waived(fee_matrix[rows])
+                undecided &= ~rows
+        return waived
+
+    def apply(self, fee_type: FeeType, amount: float, fees: list[dict]) -> list[dict]:
+        """Reduces itemised fees from FeeSchedule.quote by this plan's waiver, noting what was waived."""
+        if not self.rules or not fees:
+            return fees
+        gross = np.array([[fee["amount"] for fee in fees]], dtype=np.float64)
+        waived = self.waivers(fee_type, np.array([amount], dtype=np.float64), gross)[0]
+        for fee, waived_amount in zip(fees, waived):
+            if waived_amount > 0:
+                fee["waived_amount"] = float(waived_amount)
+                fee["amount"] = round(fee["amount"] - float(waived_amount), 2)
+        return fees
+
+
+class FeeWaiverEvaluator:
+    """
+    Resolves a subscriber's plan to its compiled PlanWaivers without queries.
+
+    Active plans are loaded in one query and indexed by tier; their rules are
+    compiled once per (plan id, updated_at), so an unchanged plan is never
+    re-parsed even when the index reloads. The index is dropped on ORM
+    changes to a plan (broadcast through Redis like FeeEngine) and after
+    refresh_interval seconds.
+    """
+    VERSION_KEY = "subscription_plans:version"
+
+    def __init__(self, refresh_interval: float = 300.0, version_check_interval: float = 1.0) -> None:
+        self.refresh_interval = refresh_interval
+        self.version_check_interval = version_check_interval
+        self._by_tier: dict[SubscriptionTier, PlanWaivers] = None
+        self._compiled: dict[tuple, PlanWaivers] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._shared_version = SharedVersion(self.VERSION_KEY, self._drop, version_check_interval)
+        self.stats = dict.fromkeys(('loads', 'compiles', 'invalidations'), 0)
+
+    def init_app(self, app) -> None:
+        self.refresh_interval = app.config.get('FEE_RULES_REFRESH_INTERVAL', self.refresh_interval)
+        app.extensions['fee_waiver_evaluator'] = self
+
+    def for_user(self, db: Session, user: User) -> PlanWaivers | None:
+        """The waivers of the user's plan, or None without an active paid subscription."""
+        if user is None or user.subscription_tier in (None, SubscriptionTier.NONE) or not user.has_active_subscription():
+            return None
+        return self.for_tier(db, user.subscription_tier)
+
+    def for_tier(self, db: Session, tier: SubscriptionTier) -> PlanWaivers | None:
+        return self._index(db).get(tier)
+
+    def invalidate(self, broadcast: bool = True) -> None:
+        self._drop()
+        self.stats['invalidations'] += 1
+        if broadcast:
+            self._shared_version.broadcast()
+
+    def _drop(self) -> None:
+        with self._lock:
+            self._by_tier = None
+
+    def _index(self, db: Session) -> dict[SubscriptionTier, PlanWaivers]:
+        self._shared_version.sync()
+        by_tier = self._by_tier
+        if by_tier is not None and time.monotonic() - self._loaded_at < self.refresh_interval:
+            return by_tier
+
+        with self._lock:
+            if self._by_tier is not None and time.monotonic() - self._loaded_at < self.refresh_interval:
+                return self._by_tier
+            compiled, by_tier = {}, {}
+            for plan in db.query(SubscriptionPlan).filter_by(is_active=True):
+                key = (plan.id, plan.updated_at)
+                waivers = self._compiled.get(key)
+                if waivers is None:
+                    waivers = PlanWaivers(plan)
+                    self.stats['compiles'] += 1
+                compiled[key] = by_tier[plan.tier] = waivers
+            # Keeping only current versions also drops edited and removed plans
+            self._compiled = compiled
+            self._by_tier = by_tier
+            self._loaded_at = time.monotonic()
+            self.stats['loads'] += 1
+            return by_tier
+
+
+fee_waiver_evaluator = FeeWaiverEvaluator()
+
+
+invalidate_on_change(SubscriptionPlan, fee_waiver_evaluator.invalidate)
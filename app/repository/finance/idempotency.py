@@ -0,0 +1,131 @@
+from app.models import PaymentIdempotencyKey
+from app.utils.redis_client import get_redis
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+import hashlib
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+def request_hash(*parts) -> str:
+    """Fingerprint of the request a key was first used for."""
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class PaymentIdempotency:
+    """
+    Maps client idempotency keys to the payment their first request created.
+
+    The payment_idempotency_keys row is written in the same transaction as the
+    payment, so its unique constraint is what guarantees at most one payment
+    per key. Redis sits in front of it: completed keys are answered from
+    there, and a short-lived claim makes concurrent requests with the same key
+    wait for the first one's result instead of all racing to the database.
+    Without Redis every request goes to the table and the losers of the race
+    read the winner's row after their insert fails.
+    """
+    KEY_PREFIX = "payment_idempotency:"
+    PENDING = "pending"
+
+    def __init__(self, db: Session, ttl: int = 86400, lock_ttl: int = 30, poll_interval: float = 0.05) -> None:
+        self.db = db
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        # key -> value of the claim this instance holds, so release() only drops its own
+        self._claims: dict[str, bytes] = {}
+
+    @classmethod
+    def from_config(cls, db: Session, config) -> "PaymentIdempotency":
+        return cls(db, ttl=config.get('PAYMENT_IDEMPOTENCY_TTL', 86400),
+                   lock_ttl=config.get('PAYMENT_IDEMPOTENCY_LOCK_TTL', 30))
+
+    def lookup(self, key: str) -> tuple[str, str] | None:
+        """(payment_id, request_hash) stored for the key, or None if no payment completed under it."""
+        client = get_redis()
+        if client is not None:
+            try:
+                value = client.get(f"{self.KEY_PREFIX}{key}")
+                if value is not None and not value.startswith(self.PENDING.encode()):
+                    payment_id, _, stored_hash = value.decode().partition(":")
+                    return payment_id, stored_hash
+            except Exception as e:
+                logger.warning(f"Payment idempotency lookup falling back to the database: {e}")
+                client = None
+
+        try:
+            record = self.db.query(PaymentIdempotencyKey).filter_by(key=key).first()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.warning(f"Payment idempotency lookup failed: {e}")
+            return None
+        if record is None:
+            return None
+        if client is not None:
+            self.remember(key, record.payment_id, record.request_hash)
+        return record.payment_id, record.request_hash
+
+    def wait_for_turn(self, key: str) -> tuple[str, str] | None:
+        """
+        Blocks while another request holds the key's claim. Returns the stored
+        result once there is one, or None when the caller holds the claim and
+        should process the payment itself. A claim left by a crashed request
+        lapses after lock_ttl.
+        """
+        while True:
+            stored = self.lookup(key)
+            if stored is not None:
+                return stored
+            if self._claim(key):
+                return None
+            time.sleep(self.poll_interval)
+
+    def remember(self, key: str, payment_id: str, stored_hash: str) -> None:
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.set(f"{self.KEY_PREFIX}{key}", f"{payment_id}:{stored_hash}", ex=self.ttl)
+            self._claims.pop(key, None)
+        except Exception as e:
+            logger.warning(f"Failed to cache payment idempotency key: {e}")
+
+    def release(self, key: str) -> None:
+        """Drops the claim after a failed attempt so a retry can process the request."""
+        client = get_redis()
+        if client is None:
+            return
+        claim = self._claims.pop(key, None)
+        if claim is None:
+            return
+        redis_key = f"{self.KEY_PREFIX}{key}"
+
+        def compare_and_delete(pipe) -> None:
+            # Drops only our own claim: not a stored result, nor a claim another request took after
+            # ours lapsed. A write between the read and the delete aborts and retries the transaction.
+            ours = pipe.get(redis_key) == claim
+            pipe.multi()
+            if ours:
+                pipe.delete(redis_key)
+
+        try:
+            client.transaction(compare_and_delete, redis_key)
+        except Exception as e:
+            logger.warning(f"Failed to release payment idempotency claim: {e}")
+
+    def _claim(self, key: str) -> bool:
+        client = get_redis()
+        if client is None:
+            return True
+        claim = f"{self.PENDING}:{uuid.uuid4().hex}".encode()
+        try:
+            if client.set(f"{self.KEY_PREFIX}{key}", claim, nx=True, ex=self.lock_ttl):
+                self._claims[key] = claim
+                return True
+            return False
+        except Exception as e:
+            # The unique constraint still holds; only the waiting is lost
+            logger.warning(f"Payment idempotency claim falling back to the database: {e}")
+            return True
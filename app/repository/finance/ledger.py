@@ -0,0 +1,174 @@
+from app.models import Booking, BookingBalance, BookingLedgerEntry, Payment
+from app.models.enums import LedgerEntryType, PaymentStatus
+from app.repository.finance.exceptions import InvalidAmount
+from datetime import datetime, timezone
+from sqlalchemy import case, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# Amounts are floats rounded to cents; comparisons allow for the representation error
+CENT_TOLERANCE = 0.005
+
+PAYMENT_ENTRY_TYPES = {
+    PaymentStatus.PAID: LedgerEntryType.PAYMENT,
+    PaymentStatus.REFUNDED: LedgerEntryType.REFUND,
+}
+
+
+class BookingLedger:
+    """
+    Per-booking money movements: an append-only booking_ledger_entries row per
+    payment or refund, plus a booking_balances row holding the running totals.
+
+    post_payment()/post_refund() run inside the caller's transaction and move
+    the balance with a single relative UPDATE, so concurrent postings to one
+    booking serialise on its balance row and none are lost. A refund only
+    applies while it fits within the net amount paid, checked in the same
+    UPDATE. Reading what is paid or due is one row lookup instead of a scan
+    of the booking's payments.
+
+    rebuild() recomputes balances from the entries (backfilling entries for
+    payments recorded before the ledger existed).
+    """
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def balance(self, booking_id: str) -> BookingBalance | None:
+        return self.db.query(BookingBalance).filter_by(booking_id=booking_id).populate_existing().first()
+
+    def post_payment(self, payment: Payment) -> BookingBalance:
+        return self._post(payment, LedgerEntryType.PAYMENT)
+
+    def post_refund(self, refund: Payment, source_payment: Payment) -> BookingBalance:
+        """Raises InvalidAmount if the refund exceeds what is left of source_payment or of the booking's payments."""
+        return self._post(refund, LedgerEntryType.REFUND, source_payment)
+
+    def refunded(self, payment_id: str) -> float:
+        """Total already refunded against one payment."""
+        total = self.db.query(func.coalesce(func.sum(BookingLedgerEntry.amount), 0.0)).filter(
+            BookingLedgerEntry.source_payment_id == payment_id,
+            BookingLedgerEntry.entry_type == LedgerEntryType.REFUND
+        ).scalar()
+        return round(total, 2)
+
+    def _post(self, payment: Payment, entry_type: LedgerEntryType, source_payment: Payment = None) -> BookingBalance:
+        if payment.id is None:
+            self.db.flush()
+        amount = round(payment.amount, 2)
+        paid, refunded = (amount, 0.0) if entry_type is LedgerEntryType.PAYMENT else (0.0, amount)
+        increment = update(BookingBalance).where(BookingBalance.booking_id == payment.booking_id).values(
+            amount_paid=BookingBalance.amount_paid + paid,
+            amount_refunded=BookingBalance.amount_refunded + refunded,
+            entry_count=BookingBalance.entry_count + 1,
+            updated_at=datetime.now(timezone.utc)
+        )
+        if entry_type is LedgerEntryType.REFUND:
+            increment = increment.where(
+                BookingBalance.amount_paid - BookingBalance.amount_refunded >= amount - CENT_TOLERANCE
+            )
+
+        if not self._execute(increment):
+            if entry_type is LedgerEntryType.REFUND:
+                raise InvalidAmount("Refund exceeds the amount paid on the booking")
+            if not self._create(payment, paid) and not self._execute(increment):
+                raise RuntimeError(f"Could not post payment {payment.id} to booking {payment.booking_id}")
+
+        # The UPDATE above holds the booking's balance row, so concurrent refunds of the payment see each other here
+        if source_payment is not None and self.refunded(source_payment.id) + amount > source_payment.amount + CENT_TOLERANCE:
+            raise InvalidAmount("Refunds exceed the amount of the original payment")
+
+        self.db.add(BookingLedgerEntry(
+            booking_id=payment.booking_id,
+            payment_id=payment.id,
+            source_payment_id=source_payment.id if source_payment is not None else None,
+            entry_type=entry_type,
+            amount=amount,
+            currency=payment.currency
+        ))
+        return self.balance(payment.booking_id)
+
+    def _execute(self, statement) -> int:
+        return self.db.execute(statement, execution_options={"synchronize_session": False}).rowcount
+
+    def _create(self, payment: Payment, paid: float) -> bool:
+        """Opens the booking's balance with its first payment; False if a concurrent posting got there first."""
+        try:
+            with self.db.begin_nested():
+                self.db.add(BookingBalance(
+                    booking_id=payment.booking_id,
+                    currency=payment.currency,
+                    amount_paid=paid,
+                    amount_refunded=0.0,
+                    entry_count=1
+                ))
+            return True
+        except IntegrityError:
+            return False
+
+    def rebuild(self, batch_size: int = 500) -> int:
+        """
+        Recomputes every booking's balance from its entries in keyset-ordered
+        batches of bookings, committing per batch, so memory and lock time stay
+        bounded. Payments without an entry are posted first. Balance rows of a
+        batch are locked (SELECT ... FOR UPDATE where supported) while it is
+        recomputed, so live postings to those bookings wait rather than being
+        overwritten. Returns the number of bookings processed.
+        """
+        processed = 0
+        last_id = ""
+        while True:
+            batch = self.db.query(Booking.id, Booking.currency).filter(Booking.id > last_id) \
+                .order_by(Booking.id).limit(batch_size).all()
+            if not batch:
+                return processed
+            booking_ids = [booking_id for booking_id, _ in batch]
+            balances = {
+                balance.booking_id: balance
+                for balance in self.db.query(BookingBalance).filter(BookingBalance.booking_id.in_(booking_ids))
+                .with_for_update().populate_existing()
+            }
+            self._backfill_entries(booking_ids)
+
+            totals = {
+                booking_id: (paid, refunded, count)
+                for booking_id, paid, refunded, count in self.db.query(
+                    BookingLedgerEntry.booking_id,
+                    func.sum(case((BookingLedgerEntry.entry_type == LedgerEntryType.PAYMENT, BookingLedgerEntry.amount), else_=0.0)),
+                    func.sum(case((BookingLedgerEntry.entry_type == LedgerEntryType.REFUND, BookingLedgerEntry.amount), else_=0.0)),
+                    func.count(BookingLedgerEntry.id)
+                ).filter(BookingLedgerEntry.booking_id.in_(booking_ids)).group_by(BookingLedgerEntry.booking_id)
+            }
+            for booking_id, currency in batch:
+                paid, refunded, count = totals.get(booking_id, (0.0, 0.0, 0))
+                balance = balances.get(booking_id)
+                if balance is None:
+                    if not count:
+                        continue
+                    balance = BookingBalance(booking_id=booking_id, currency=currency)
+                    self.db.add(balance)
+                balance.amount_paid = round(paid or 0.0, 2)
+                balance.amount_refunded = round(refunded or 0.0, 2)
+                balance.entry_count = count
+
+            self.db.commit()
+            processed += len(batch)
+            last_id = booking_ids[-1]
+
+    def _backfill_entries(self, booking_ids: list[str]) -> None:
+        unposted = self.db.query(Payment).outerjoin(
+            BookingLedgerEntry, BookingLedgerEntry.payment_id == Payment.id
+        ).filter(
+            Payment.booking_id.in_(booking_ids),
+            Payment.status.in_(list(PAYMENT_ENTRY_TYPES)),
+            BookingLedgerEntry.id.is_(None)
+        )
+        for payment in unposted.all():
+            self.db.add(BookingLedgerEntry(
+                booking_id=payment.booking_id,
+                payment_id=payment.id,
+                entry_type=PAYMENT_ENTRY_TYPES[payment.status],
+                amount=round(payment.amount, 2),
+                currency=payment.currency,
+                created_at=payment.payment_date or payment.created_at
+            ))
+        self.db.flush()
@@ -1,40 +1,44 @@
-from app.models import ServiceFeeRule
+from app.models import User
 from app.models.enums import FeeType
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from app.repository.finance.exceptions import DatabaseError
+from app.repository.finance.fee_engine import FeeEngine, fee_engine
+from app.repository.finance.fee_waivers import FeeWaiverEvaluator, fee_waiver_evaluator
+import numpy as np
 
 class CalculateFees:
-    def __init__(self, db: Session) -> None:
+    """
+    Quotes service fees from the compiled rules in FeeEngine: only rules whose
+    min_order_amount the amount reaches apply, listed in priority order. For a
+    user with an active subscription, the plan's fee waivers are applied; the
+    waived part of each fee is reported as waived_amount.
+    """
+    def __init__(self, db: Session, engine: FeeEngine = None, waivers: FeeWaiverEvaluator = None) -> None:
         self.db = db
+        self.engine = engine or fee_engine
+        self.waivers = waivers or fee_waiver_evaluator
 
-    def execute(self, fee_type_name: str, amount: float) -> list[dict]:
+    def execute(self, fee_type_name: str, amount: float, user: User = None) -> list[dict]:
+        # TODO: Check on Fee_Type implementation
         try:
-            # TODO: Check on Fee_Type implementation
-            try:
-                fee_type = FeeType(fee_type_name)
-            except ValueError:
-                 return []
+            fee_type = FeeType(fee_type_name)
+        except ValueError:
+            return []
 
-            rules = self.db.query(ServiceFeeRule).filter_by(fee_type=fee_type, is_active=True).all()
-            
-            fees = []
-            for rule in rules:
-                fee_amount = 0.0
-                if rule.amount_percent > 0:
-                    fee_amount += amount * (rule.amount_percent / 100.0)
-                
-                if rule.amount_fixed > 0:
-                    fee_amount += rule.amount_fixed
-                
-                fees.append({
-                    "rule_id": rule.id,
-                    "description": rule.name,
-                    "amount": round(fee_amount, 2),
-                    "currency": rule.currency
-                })
-            
-            return fees
-            
+        try:
+            return self.engine.quote(self.db, fee_type, amount, self.waivers.for_user(self.db, user))
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Database error while calculating fees: {str(e)}") from e
+
+    def execute_batch(self, fee_type_name: str, amounts, user: User = None) -> np.ndarray:
+        """Total fees for each of many amounts, vectorized; zeros for an unknown fee type."""
+        try:
+            fee_type = FeeType(fee_type_name)
+        except ValueError:
+            return np.zeros(np.shape(amounts), dtype=np.float64)
+
+        try:
+            return self.engine.quote_batch(self.db, fee_type, amounts, self.waivers.for_user(self.db, user))
         except SQLAlchemyError as e:
             raise DatabaseError(f"Database error while calculating fees: {str(e)}") from e
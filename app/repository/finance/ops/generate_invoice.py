@@ -3,7 +3,7 @@ from app.models.enums import InvoiceStatus
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from app.repository.finance.exceptions import DatabaseError, InvoiceGenerationFailed
-import uuid
+from app.utils.sequences import next_number
 from datetime import datetime, timedelta, timezone
 
 class GenerateInvoice:
@@ -23,7 +23,7 @@ class GenerateInvoice:
             new_invoice = Invoice(
                 booking_id=booking_id,
                 user_id=booking.user_id,
-                invoice_number=f"INV-{uuid.uuid4().hex[:8].upper()}", # TODO: Implement invoice number generation util
+                invoice_number=next_number(self.db, "INV"),
                 issued_date=datetime.now(timezone.utc),
                 due_date=datetime.now(timezone.utc) + timedelta(days=7),
                 total_amount=total_amount,
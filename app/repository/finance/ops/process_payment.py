@@ -1,17 +1,63 @@
-from app.models import Payment, Booking, Invoice
+from app.models import Payment, Booking, Invoice, PaymentIdempotencyKey
 from app.models.enums import PaymentStatus, InvoiceStatus, BookingStatus
 from app.extensions import db
+from flask import current_app
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from app.repository.finance.exceptions import DatabaseError, PaymentFailed, InvalidAmount
-import uuid
+from app.repository.finance.exceptions import DatabaseError, PaymentFailed, InvalidAmount, IdempotencyKeyReused
+from app.repository.finance.idempotency import PaymentIdempotency, request_hash
+from app.repository.finance.ledger import BookingLedger, CENT_TOLERANCE
+from app.utils.sequences import next_number
 from datetime import datetime, timezone
 
 class ProcessPayment:
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: Session, idempotency: PaymentIdempotency = None) -> None:
         self.db = db
+        self.idempotency = idempotency
 
-    def execute(self, booking_id: str, amount: float, payment_method: str, transaction_id: str = None) -> Payment:
+    def execute(self, booking_id: str, amount: float, payment_method: str, transaction_id: str = None,
+                idempotency_key: str = None) -> Payment:
+        """
+        With an idempotency_key, the first request under the key creates the
+        payment and every repeat (concurrent or later) returns that same payment
+        without charging again. Reusing a key for a different booking, amount or
+        method raises IdempotencyKeyReused.
+        """
+        if not idempotency_key:
+            return self._process(booking_id, amount, payment_method, transaction_id)
+
+        idempotency = self.idempotency or PaymentIdempotency.from_config(self.db, current_app.config)
+        fingerprint = request_hash(booking_id, float(amount), getattr(payment_method, 'value', payment_method))
+        stored = idempotency.wait_for_turn(idempotency_key)
+        if stored is None:
+            record = PaymentIdempotencyKey(key=idempotency_key, request_hash=fingerprint)
+            try:
+                payment = self._process(booking_id, amount, payment_method, transaction_id, record)
+            except DatabaseError:
+                # Without a Redis claim concurrent requests race to the table; the losers replay the winner
+                stored = idempotency.lookup(idempotency_key)
+                if stored is None:
+                    idempotency.release(idempotency_key)
+                    raise
+            except Exception:
+                idempotency.release(idempotency_key)
+                raise
+            else:
+                idempotency.remember(idempotency_key, payment.id, fingerprint)
+                return payment
+        return self._replay(stored, fingerprint)
+
+    def _replay(self, stored: tuple[str, str], fingerprint: str) -> Payment:
+        payment_id, stored_hash = stored
+        if stored_hash != fingerprint:
+            raise IdempotencyKeyReused("Idempotency key was already used for a different payment")
+        payment = self.db.get(Payment, payment_id)
+        if payment is None:
+            raise DatabaseError(f"Payment {payment_id} recorded for the idempotency key no longer exists")
+        return payment
+
+    def _process(self, booking_id: str, amount: float, payment_method: str, transaction_id: str = None,
+                 idempotency_record: PaymentIdempotencyKey = None) -> Payment:
         try:
             if amount <= 0:
                 raise InvalidAmount("Payment amount must be positive")
@@ -26,16 +72,22 @@ class ProcessPayment:
                 amount=amount,
                 currency=booking.currency, # TODO: Check on currency handling
                 payment_method=payment_method,
-                transaction_id=transaction_id or f"TXN-{uuid.uuid4().hex[:8].upper()}", # TODO: Implement tranaction ID generator util
+                transaction_id=transaction_id or next_number(self.db, "TXN"),
                 status=PaymentStatus.PAID,
                 payment_date=datetime.now(timezone.utc)
             )
             
             self.db.add(new_payment)
-            
-            # TODO: Check if total paid covers total cost (Mock logic: assume this payment covers it)
-            
-            if booking.status == BookingStatus.PENDING:
+            self.db.flush()
+            balance = BookingLedger(self.db).post_payment(new_payment)
+            if idempotency_record is not None:
+                # Same transaction as the payment: the key's unique constraint admits one payment per key
+                idempotency_record.payment_id = new_payment.id
+                self.db.add(idempotency_record)
+
+            # Confirmed once everything paid so far covers the booking total
+            if booking.status == BookingStatus.PENDING and \
+                    balance.net_paid >= (booking.total_amount or 0.0) - CENT_TOLERANCE:
                 booking.status = BookingStatus.CONFIRMED
                 
             self.db.commit()
@@ -3,7 +3,8 @@ from app.models.enums import PaymentStatus
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from app.repository.finance.exceptions import DatabaseError, PaymentFailed, InvalidAmount
-import uuid
+from app.repository.finance.ledger import BookingLedger
+from app.utils.sequences import next_number
 from datetime import datetime, timezone
 
 class ProcessRefund:
@@ -35,12 +36,18 @@ class ProcessRefund:
                 amount=refund_amount,
                 currency=original_payment.currency,
                 payment_method=original_payment.payment_method,
-                transaction_id=f"REF-{uuid.uuid4().hex[:8].upper()}", # TODO: Implement and hook transaction ID generator util
+                transaction_id=next_number(self.db, "REF"),
                 status=PaymentStatus.REFUNDED,
                 payment_date=datetime.now(timezone.utc)
             )
             
             self.db.add(refund_payment)
+            try:
+                # Cumulative checks: refunds stay within this payment and within what the booking paid
+                BookingLedger(self.db).post_refund(refund_payment, original_payment)
+            except InvalidAmount:
+                self.db.rollback()
+                raise
             
             # TODO: Check on updating original payment status to PARTIALLY_REFUNDED or REFUNDED if full
             
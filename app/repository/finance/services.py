@@ -1,24 +1,54 @@
 from sqlalchemy.orm import Session
-from app.models import Payment, Invoice
+import numpy as np
+from app.models import Payment, Invoice, User, Booking
 from app.repository.finance.ops import (
     ProcessPayment,
     GenerateInvoice,
     CalculateFees,
     ProcessRefund
 )
+from app.repository.finance.ledger import BookingLedger
 
 class FinanceService:
     def __init__(self, db: Session):
         self.db = db
     
-    def process_payment(self, booking_id: str, amount: float, payment_method: str, transaction_id: str = None) -> Payment:
-        return ProcessPayment(self.db).execute(booking_id, amount, payment_method, transaction_id)
+    def process_payment(self, booking_id: str, amount: float, payment_method: str, transaction_id: str = None,
+                        idempotency_key: str = None) -> Payment:
+        """Pass the client's idempotency key so a retried request returns the original payment instead of charging twice."""
+        return ProcessPayment(self.db).execute(booking_id, amount, payment_method, transaction_id, idempotency_key)
 
     def generate_invoice(self, booking_id: str, total_amount: float = None) -> Invoice:
         return GenerateInvoice(self.db).execute(booking_id, total_amount)
 
-    def calculate_fees(self, booking_type: str, amount: float) -> list[dict]:
-        return CalculateFees(self.db).execute(booking_type, amount)
+    def calculate_fees(self, booking_type: str, amount: float, user: User = None) -> list[dict]:
+        """Itemised fees; pass the booking user to apply their subscription plan's fee waivers."""
+        return CalculateFees(self.db).execute(booking_type, amount, user)
+
+    def calculate_fee_totals(self, booking_type: str, amounts, user: User = None) -> np.ndarray:
+        """Total fees for many candidate amounts at once, e.g. all-in prices on a results page."""
+        return CalculateFees(self.db).execute_batch(booking_type, amounts, user)
 
     def process_refund(self, original_payment_id: str, amount: float = None) -> Payment:
         return ProcessRefund(self.db).execute(original_payment_id, amount)
+
+    def get_booking_balance(self, booking_id: str) -> dict:
+        """What is paid, refunded and still due on a booking, from its ledger balance (two row lookups)."""
+        booking = self.db.get(Booking, booking_id)
+        if not booking:
+            raise ValueError("Booking not found")
+        balance = BookingLedger(self.db).balance(booking_id)
+        paid, refunded = (balance.amount_paid, balance.amount_refunded) if balance else (0.0, 0.0)
+        net_paid = round(paid - refunded, 2)
+        return {
+            "booking_id": booking_id,
+            "currency": booking.currency,
+            "total_amount": booking.total_amount or 0.0,
+            "amount_paid": paid,
+            "amount_refunded": refunded,
+            "net_paid": net_paid,
+            "amount_due": max(0.0, round((booking.total_amount or 0.0) - net_paid, 2))
+        }
+
+    def rebuild_booking_balances(self, batch_size: int = 500) -> int:
+        return BookingLedger(self.db).rebuild(batch_size)
@@ -4,5 +4,8 @@ from app.repository.flight.exceptions import (
     FlightNotFound,
     SeatNotAvailable,
     DatabaseError,
-    InvalidSearchCriteria
+    InvalidSearchCriteria,
+    InvalidFlightData,
+    BookingNotFound
 )
+from app.repository.flight.suppliers import FlightSupplier, FakeFlightSupplier, SearchCriteria, register_flight_supplier
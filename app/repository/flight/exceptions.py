@@ -17,3 +17,11 @@ class DatabaseError(FlightServiceException):
 class InvalidSearchCriteria(FlightServiceException):
     """Raised when search parameters are invalid"""
     pass
+
+class InvalidFlightData(FlightServiceException):
+    """Raised when flight details needed to locate a flight instance are missing or invalid"""
+    pass
+
+class BookingNotFound(FlightServiceException):
+    """Raised when the booking a seat is reserved for does not exist"""
+    pass
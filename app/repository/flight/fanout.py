@@ -0,0 +1,154 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from app.repository.flight.suppliers import FlightSupplier, SearchCriteria
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SUPPLIER_OK = "ok"
+SUPPLIER_TIMEOUT = "timeout"
+SUPPLIER_ERROR = "error"
+SUPPLIER_BUSY = "busy"
+
+_executor = None
+_executor_workers = None
+_executor_lock = threading.Lock()
+
+def get_executor(max_workers: int = 16) -> ThreadPoolExecutor:
+    """
+    Process-wide pool for supplier calls, so searches do not pay thread
+    start-up. Asking for a different size replaces the pool; the old one is
+    not shut down (searches may still hold it) and its threads exit once its
+    calls finish and it is garbage collected.
+    """
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != max_workers:
+        with _executor_lock:
+            if _executor is None or _executor_workers != max_workers:
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="flight-supplier")
+                _executor_workers = max_workers
+    return _executor
+
+
+class InFlightLimiter:
+    """
+    Counts running calls per supplier. A call cut off by the search deadline
+    keeps its pool thread until the supplier answers, since a thread cannot be
+    stopped; capping each supplier's running calls keeps a hung supplier from
+    taking over the shared pool.
+    """
+
+    def __init__(self) -> None:
+        self._running: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, name: str, limit: int) -> bool:
+        with self._lock:
+            if self._running.get(name, 0) >= limit:
+                return False
+            self._running[name] = self._running.get(name, 0) + 1
+            return True
+
+    def release(self, name: str) -> None:
+        with self._lock:
+            self._running[name] -= 1
+
+    def running(self, name: str) -> int:
+        with self._lock:
+            return self._running.get(name, 0)
+
+
+supplier_calls = InFlightLimiter()
+
+
+def offer_key(offer: dict) -> tuple:
+    return (offer.get("carrier_code"), offer.get("flight_number"), offer.get("departure_time"))
+
+
+def merge_offers(offer_lists: list[list[dict]]) -> list[dict]:
+    """De-duplicates offers by (carrier_code, flight_number, departure_time), keeping the cheapest."""
+    best: dict[tuple, dict] = {}
+    for offers in offer_lists:
+        for offer in offers:
+            key = offer_key(offer)
+            current = best.get(key)
+            if current is None or offer.get("price", 0) < current.get("price", 0):
+                best[key] = offer
+    return sorted(best.values(), key=lambda o: (o.get("price", 0), o.get("departure_time") or ""))
+
+
+class SupplierFanOut:
+    """
+    Queries every supplier concurrently and waits at most `deadline` seconds.
+    Suppliers that have not answered by then are reported as timed out and
+    their (late) results are discarded, so one slow provider cannot hold the
+    search hostage. A supplier that already has max_in_flight calls running
+    (e.g. hung calls from earlier searches) is skipped and reported as busy
+    rather than queued behind them.
+    """
+
+    def __init__(self, suppliers: list[FlightSupplier], deadline: float, executor: ThreadPoolExecutor = None,
+                 max_in_flight: int = 4, limiter: InFlightLimiter = None) -> None:
+        self.suppliers = suppliers
+        self.deadline = deadline
+        self.executor = executor or get_executor()
+        self.max_in_flight = max_in_flight
+        self.limiter = limiter or supplier_calls
+
+    def search(self, criteria: SearchCriteria) -> dict:
+        started = time.monotonic()
+        finished_at: dict[str, float] = {}
+
+        def call(supplier: FlightSupplier) -> list[dict]:
+            try:
+                return supplier.search(criteria)
+            finally:
+                finished_at[supplier.name] = time.monotonic()
+                self.limiter.release(supplier.name)
+
+        futures = []
+        for supplier in self.suppliers:
+            future = None
+            if self.limiter.try_acquire(supplier.name, self.max_in_flight):
+                try:
+                    future = self.executor.submit(call, supplier)
+                except Exception:
+                    self.limiter.release(supplier.name)
+                    raise
+            futures.append((supplier, future))
+        done, _ = wait([future for _, future in futures if future is not None], timeout=self.deadline)
+
+        offer_lists = []
+        report = []
+        for supplier, future in futures:
+            entry = {"supplier": supplier.name, "offers": 0, "error": None}
+            if future is None:
+                logger.warning(f"Flight supplier {supplier.name} skipped: {self.max_in_flight} calls still running")
+                entry["status"] = SUPPLIER_BUSY
+                entry["elapsed_ms"] = 0.0
+            elif future in done:
+                entry["elapsed_ms"] = round((finished_at.get(supplier.name, time.monotonic()) - started) * 1000, 1)
+                try:
+                    offers = future.result()
+                    entry["status"] = SUPPLIER_OK
+                    entry["offers"] = len(offers)
+                    offer_lists.append(offers)
+                except Exception as e:
+                    logger.warning(f"Flight supplier {supplier.name} failed: {e}")
+                    entry["status"] = SUPPLIER_ERROR
+                    entry["error"] = str(e)
+            else:
+                if future.cancel():
+                    # Never started, so call() will not release its slot
+                    self.limiter.release(supplier.name)
+                logger.warning(f"Flight supplier {supplier.name} missed the {self.deadline}s deadline")
+                entry["status"] = SUPPLIER_TIMEOUT
+                entry["elapsed_ms"] = round(self.deadline * 1000, 1)
+            report.append(entry)
+
+        return {
+            "offers": merge_offers(offer_lists),
+            "suppliers": report,
+            "complete": all(entry["status"] == SUPPLIER_OK for entry in report)
+        }
@@ -1,3 +1,4 @@
 from app.repository.flight.ops.search import SearchFlights
 from app.repository.flight.ops.get import GetFlightByID
 from app.repository.flight.ops.reserve import ReserveSeat
+from app.repository.flight.ops.inventory import GetOrCreateFlightInstance, CreateSeatInventory, GetAvailableSeats
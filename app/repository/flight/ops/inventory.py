@@ -0,0 +1,140 @@
+from app.models import FlightInstance, FlightSeat
+from app.models.enums import SeatStatus, TravelClass
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from app.repository.flight.exceptions import DatabaseError, InvalidFlightData, FlightNotFound
+from datetime import datetime, timezone
+import uuid
+
+def parse_flight_time(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        raise InvalidFlightData(f"Invalid flight time: {value}")
+
+
+class GetOrCreateFlightInstance:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def execute(self, flight_data: dict) -> FlightInstance:
+        """
+        Resolves the operated flight for a segment, creating it on first use. Safe
+        under concurrency: a racing insert loses on the unique constraint inside a
+        savepoint and re-reads the winner's row.
+        """
+        required = ('carrier_code', 'flight_number', 'departure_airport', 'arrival_airport', 'departure_time', 'arrival_time')
+        missing = [key for key in required if not flight_data.get(key)]
+        if missing:
+            raise InvalidFlightData(f"Missing flight data: {', '.join(missing)}")
+
+        carrier_code = flight_data['carrier_code']
+        flight_number = flight_data['flight_number']
+        departure_time = parse_flight_time(flight_data['departure_time'])
+
+        try:
+            instance = self.db.query(FlightInstance).filter_by(
+                carrier_code=carrier_code,
+                flight_number=flight_number,
+                departure_time=departure_time
+            ).first()
+            if instance:
+                return instance
+
+            try:
+                with self.db.begin_nested():
+                    instance = FlightInstance(
+                        carrier_code=carrier_code,
+                        flight_number=flight_number,
+                        departure_airport_code=flight_data['departure_airport'],
+                        arrival_airport_code=flight_data['arrival_airport'],
+                        departure_time=departure_time,
+                        arrival_time=parse_flight_time(flight_data['arrival_time'])
+                    )
+                    self.db.add(instance)
+                return instance
+            except IntegrityError:
+                return self.db.query(FlightInstance).filter_by(
+                    carrier_code=carrier_code,
+                    flight_number=flight_number,
+                    departure_time=departure_time
+                ).one()
+
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise DatabaseError(f"Database error while resolving flight instance: {str(e)}") from e
+
+
+class CreateSeatInventory:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def execute(self, flight_data: dict, seat_numbers: list[str], cabin_class: str = "economy") -> FlightInstance:
+        """Loads the seat map for a flight in one bulk insert. Seats already present are left untouched."""
+        try:
+            cabin = TravelClass(cabin_class)
+        except ValueError:
+            raise InvalidFlightData(f"Invalid cabin class: {cabin_class}")
+
+        try:
+            instance = GetOrCreateFlightInstance(self.db).execute(flight_data)
+            self.db.flush()
+
+            existing = {
+                row.seat_number for row in
+                self.db.query(FlightSeat.seat_number).filter_by(flight_instance_id=instance.id)
+            }
+            now = datetime.now(timezone.utc)
+            rows = [
+                {
+                    'id': str(uuid.uuid4()),
+                    'flight_instance_id': instance.id,
+                    'seat_number': seat_number,
+                    'cabin_class': cabin,
+                    'status': SeatStatus.AVAILABLE,
+                    'version': 0,
+                    'created_at': now,
+                    'updated_at': now
+                }
+                for seat_number in dict.fromkeys(seat_numbers)
+                if seat_number not in existing
+            ]
+            if rows:
+                self.db.execute(FlightSeat.__table__.insert(), rows)
+            instance.seat_map_loaded = True
+
+            self.db.commit()
+            self.db.refresh(instance)
+            return instance
+
+        except IntegrityError as e:
+            self.db.rollback()
+            raise InvalidFlightData("Seat inventory was modified concurrently, retry the load") from e
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise DatabaseError(f"Database error while creating seat inventory: {str(e)}") from e
+
+
+class GetAvailableSeats:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def execute(self, flight_instance_id: str, cabin_class: str = None) -> list[str]:
+        try:
+            if not self.db.query(FlightInstance.id).filter_by(id=flight_instance_id).first():
+                raise FlightNotFound(f"Flight instance with ID {flight_instance_id} not found")
+
+            query = self.db.query(FlightSeat.seat_number).filter_by(
+                flight_instance_id=flight_instance_id,
+                status=SeatStatus.AVAILABLE
+            )
+            if cabin_class:
+                try:
+                    query = query.filter_by(cabin_class=TravelClass(cabin_class))
+                except ValueError:
+                    raise InvalidFlightData(f"Invalid cabin class: {cabin_class}")
+            return [row.seat_number for row in query.order_by(FlightSeat.seat_number)]
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Database error while fetching available seats: {str(e)}") from e
@@ -1,49 +1,145 @@
-from app.models import FlightBooking, Flight, Booking
+from app.models import Booking, FlightBooking, Flight, FlightInstance, FlightSeat
+from app.models.enums import SeatStatus
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
-from app.repository.flight.exceptions import DatabaseError, SeatNotAvailable
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from app.repository.flight.exceptions import DatabaseError, SeatNotAvailable, BookingNotFound
+from app.repository.flight.ops.inventory import GetOrCreateFlightInstance
 import uuid
 
 class ReserveSeat:
+    """
+    Reserves a seat on a flight instance without holding row locks across the request.
+
+    A specific seat is claimed with a compare-and-set UPDATE guarded by its
+    status, so of N concurrent claims exactly one sees rowcount == 1. On a
+    flight without a loaded seat map, seats are inserted directly as reserved
+    and the (flight instance, seat) unique constraint picks the winner; once
+    a map is loaded, only its seats can be reserved. When no seat
+    number is given the first free seat is taken, using FOR UPDATE SKIP LOCKED
+    on Postgres so concurrent auto-assignments never queue behind each other.
+    Elsewhere free seats are fetched AUTO_ASSIGN_BATCH_SIZE at a time and
+    tried in turn until one is claimed or none are left.
+    """
+    AUTO_ASSIGN_BATCH_SIZE = 5
+
     def __init__(self, db: Session) -> None:
         self.db = db
 
-    def execute(self, booking_id: str, flight_data: dict, seat_number: str) -> FlightBooking:
+    def execute(self, booking_id: str, flight_data: dict, seat_number: str = None) -> FlightBooking:
         try:
-            # TODO: 1. Check if booking exists (dependency on BookingService)
-            
-            # TODO: 2. Check seat availability (MOCK)
-            if seat_number == "X99": # specific mock unavailable seat
-                 raise SeatNotAvailable(f"Seat {seat_number} is already taken")
-
-            # TODO: 3. Create FlightBooking container if not exists for this booking?
-            
-            flight_booking = self.db.query(FlightBooking).filter_by(booking_id=booking_id).first()
-            if not flight_booking:
-                flight_booking = FlightBooking(
-                    booking_id=booking_id,
-                    pnr_reference=f"PNR-{uuid.uuid4().hex[:6].upper()}"
-                )
-                self.db.add(flight_booking)
-                self.db.flush() 
-
-            # TODO: 4. Create Flight segment
-            new_flight = Flight(
-                flight_booking_id=flight_booking.id,
-                carrier_code=flight_data.get('carrier_code'),
-                flight_number=flight_data.get('flight_number'),
-                departure_airport_code=flight_data.get('departure_airport'),
-                arrival_airport_code=flight_data.get('arrival_airport'),
-                departure_time=flight_data.get('departure_time'), 
-                arrival_time=flight_data.get('arrival_time'),
-                seat_assignment=seat_number
-            )
-            
-            self.db.add(new_flight)
+            if not self.db.query(Booking.id).filter_by(id=booking_id).first():
+                raise BookingNotFound(f"Booking with ID {booking_id} not found")
+            flight_booking = self.reserve(booking_id, flight_data, seat_number)
             self.db.commit()
             self.db.refresh(flight_booking)
             return flight_booking
 
+        except SeatNotAvailable:
+            self.db.rollback()
+            raise
         except SQLAlchemyError as e:
             self.db.rollback()
             raise DatabaseError(f"Database error while reserving seat: {str(e)}") from e
+
+    def reserve(self, booking_id: str, flight_data: dict, seat_number: str = None, hold_id: str = None) -> FlightBooking:
+        """
+        Claims the seat and creates the flight segment without committing. With a
+        hold_id the seat is marked HELD against that hold instead of RESERVED.
+        The caller is expected to have checked that the booking exists.
+        """
+        instance = GetOrCreateFlightInstance(self.db).execute(flight_data)
+
+        flight_booking = self.db.query(FlightBooking).filter_by(booking_id=booking_id).first()
+        if not flight_booking:
+            flight_booking = FlightBooking(
+                booking_id=booking_id,
+                pnr_reference=f"PNR-{uuid.uuid4().hex[:6].upper()}"
+            )
+            self.db.add(flight_booking)
+            self.db.flush()
+
+        new_flight = Flight(
+            flight_booking_id=flight_booking.id,
+            flight_instance_id=instance.id,
+            carrier_code=instance.carrier_code,
+            flight_number=instance.flight_number,
+            departure_airport_code=instance.departure_airport_code,
+            arrival_airport_code=instance.arrival_airport_code,
+            departure_time=instance.departure_time,
+            arrival_time=instance.arrival_time
+        )
+        self.db.add(new_flight)
+        self.db.flush()
+
+        status = SeatStatus.HELD if hold_id else SeatStatus.RESERVED
+        if seat_number:
+            self._claim_seat(instance, seat_number, new_flight.id, status, hold_id)
+        else:
+            seat_number = self._claim_any_seat(instance.id, new_flight.id, status, hold_id)
+
+        new_flight.seat_assignment = seat_number
+        return flight_booking
+
+    def _compare_and_set(self, seat_filter, flight_id: str, status: SeatStatus, hold_id: str) -> int:
+        return self.db.query(FlightSeat).filter(
+            seat_filter,
+            FlightSeat.status == SeatStatus.AVAILABLE
+        ).update({
+            FlightSeat.status: status,
+            FlightSeat.flight_id: flight_id,
+            FlightSeat.hold_id: hold_id,
+            FlightSeat.version: FlightSeat.version + 1
+        }, synchronize_session=False)
+
+    def _claim_seat(self, instance: FlightInstance, seat_number: str, flight_id: str, status: SeatStatus, hold_id: str) -> None:
+        instance_id = instance.id
+        claimed = self._compare_and_set(
+            (FlightSeat.flight_instance_id == instance_id) & (FlightSeat.seat_number == seat_number),
+            flight_id, status, hold_id
+        )
+        if claimed == 1:
+            return
+
+        exists = self.db.query(FlightSeat.id).filter_by(flight_instance_id=instance_id, seat_number=seat_number).first()
+        if exists:
+            raise SeatNotAvailable(f"Seat {seat_number} is already taken")
+        if instance.seat_map_loaded:
+            raise SeatNotAvailable(f"Seat {seat_number} is not on this flight's seat map")
+
+        try:
+            with self.db.begin_nested():
+                self.db.add(FlightSeat(
+                    flight_instance_id=instance_id,
+                    seat_number=seat_number,
+                    status=status,
+                    flight_id=flight_id,
+                    hold_id=hold_id,
+                    version=1
+                ))
+        except IntegrityError:
+            raise SeatNotAvailable(f"Seat {seat_number} is already taken")
+
+    def _claim_any_seat(self, instance_id: str, flight_id: str, status: SeatStatus, hold_id: str) -> str:
+        skip_locked = self.db.get_bind().dialect.name == 'postgresql'
+        tried: list[str] = []
+
+        while True:
+            query = self.db.query(FlightSeat.id, FlightSeat.seat_number).filter_by(
+                flight_instance_id=instance_id,
+                status=SeatStatus.AVAILABLE
+            ).order_by(FlightSeat.seat_number)
+            if tried:
+                # A snapshot read (e.g. repeatable read) can keep showing seats lost to concurrent claims
+                query = query.filter(FlightSeat.id.notin_(tried))
+
+            if skip_locked:
+                candidates = query.limit(1).with_for_update(skip_locked=True).all()
+            else:
+                candidates = query.limit(self.AUTO_ASSIGN_BATCH_SIZE).all()
+
+            if not candidates:
+                raise SeatNotAvailable("No seats available on this flight")
+            for seat_id, candidate_number in candidates:
+                if self._compare_and_set(FlightSeat.id == seat_id, flight_id, status, hold_id) == 1:
+                    return candidate_number
+                tried.append(seat_id)
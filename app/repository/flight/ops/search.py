@@ -1,31 +1,52 @@
-from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from app.utils.cache import TieredCache
+from app.repository.flight.fanout import SupplierFanOut, get_executor
+from app.repository.flight.suppliers import SearchCriteria, FlightSupplier, get_flight_suppliers
+
+# Process-wide: the local LRU tier and in-flight coalescing must outlive a request
+flight_search_cache = TieredCache(namespace="flight_search", local_size=2048)
 
 class SearchFlights:
-    def execute(self, origin: str, destination: str, date: str) -> list[dict]:
-        # TODO: Implement Google Flights API Logic for now, MOCK IMPLEMENTATION
-        
-        mock_flights = [
-            {
-                "id": "mock_f1",
-                "carrier_code": "AA",
-                "flight_number": "101",
-                "departure_airport": origin,
-                "arrival_airport": destination,
-                "departure_time": f"{date}T08:00:00",
-                "arrival_time": f"{date}T11:00:00",
-                "price": 250.00,
-                "currency": "USD"
-            },
-             {
-                "id": "mock_f2",
-                "carrier_code": "UA",
-                "flight_number": "450",
-                "departure_airport": origin,
-                "arrival_airport": destination,
-                "departure_time": f"{date}T14:00:00",
-                "arrival_time": f"{date}T17:30:00",
-                "price": 290.50,
-                "currency": "USD"
-            }
-        ]
-        return mock_flights
+    def __init__(self, suppliers: list[FlightSupplier] = None, cache: TieredCache = None) -> None:
+        self.suppliers = suppliers
+        self.cache = cache or flight_search_cache
+
+    def execute(self, origin: str, destination: str, date: str, cabin_class: str = "economy", passengers: int = 1) -> list[dict]:
+        return self.search(origin, destination, date, cabin_class, passengers)["offers"]
+
+    def search(self, origin: str, destination: str, date: str, cabin_class: str = "economy", passengers: int = 1) -> dict:
+        """
+        Returns {"offers": [...], "suppliers": [per-supplier status/timing], "complete": bool, "cached": bool}.
+        Only the offers are cached; a cached answer has no supplier report and "complete" is None.
+        Partial results (a supplier timed out, failed or was busy) are cached for a shorter TTL.
+        """
+        criteria = SearchCriteria.normalize(origin, destination, date, cabin_class, passengers)
+        config = current_app.config if has_app_context() else {}
+        suppliers = self.suppliers or get_flight_suppliers()
+        fanout = SupplierFanOut(
+            suppliers,
+            deadline=config.get('FLIGHT_SEARCH_DEADLINE', 8.0),
+            executor=get_executor(config.get('FLIGHT_SUPPLIER_MAX_WORKERS', 16)),
+            max_in_flight=config.get('FLIGHT_SUPPLIER_MAX_IN_FLIGHT', 4)
+        )
+
+        ttl = config.get('FLIGHT_SEARCH_CACHE_TTL', 120)
+        if ttl <= 0:
+            return {**fanout.search(criteria), "cached": False}
+
+        partial_ttl = config.get('FLIGHT_SEARCH_PARTIAL_CACHE_TTL', 15)
+        fresh = {}
+
+        def load() -> list[dict]:
+            fresh.update(fanout.search(criteria))
+            return fresh["offers"]
+
+        offers = self.cache.get_or_load(
+            criteria.cache_key,
+            load,
+            # Partial results are kept briefly so the missing supplier gets retried soon
+            lambda _: ttl if fresh["complete"] else partial_ttl
+        )
+        if fresh:
+            return {**fresh, "cached": False}
+        return {"offers": offers, "suppliers": [], "complete": None, "cached": True}
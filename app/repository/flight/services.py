@@ -1,20 +1,31 @@
 from sqlalchemy.orm import Session
-from app.models import Flight, FlightBooking
+from app.models import Flight, FlightBooking, FlightInstance
 from app.repository.flight.ops import (
     SearchFlights,
     GetFlightByID,
-    ReserveSeat
+    ReserveSeat,
+    CreateSeatInventory,
+    GetAvailableSeats
 )
 
 class FlightService:
     def __init__(self, db: Session):
         self.db = db
     
-    def search_flights(self, origin: str, destination: str, date: str) -> list[dict]:
-        return SearchFlights().execute(origin, destination, date)
+    def search_flights(self, origin: str, destination: str, date: str, cabin_class: str = "economy", passengers: int = 1) -> list[dict]:
+        return SearchFlights().execute(origin, destination, date, cabin_class, passengers)
+
+    def search_flights_with_report(self, origin: str, destination: str, date: str, cabin_class: str = "economy", passengers: int = 1) -> dict:
+        return SearchFlights().search(origin, destination, date, cabin_class, passengers)
 
     def get_flight_by_id(self, flight_id: str) -> Flight:
         return GetFlightByID(self.db).execute(flight_id)
 
-    def reserve_seat(self, booking_id: str, flight_data: dict, seat_number: str) -> FlightBooking:
+    def reserve_seat(self, booking_id: str, flight_data: dict, seat_number: str = None) -> FlightBooking:
         return ReserveSeat(self.db).execute(booking_id, flight_data, seat_number)
+
+    def create_seat_inventory(self, flight_data: dict, seat_numbers: list[str], cabin_class: str = "economy") -> FlightInstance:
+        return CreateSeatInventory(self.db).execute(flight_data, seat_numbers, cabin_class)
+
+    def get_available_seats(self, flight_instance_id: str, cabin_class: str = None) -> list[str]:
+        return GetAvailableSeats(self.db).execute(flight_instance_id, cabin_class)
@@ -0,0 +1,126 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date as date_type, datetime
+from flask import current_app, has_app_context
+from app.models.enums import TravelClass
+from app.repository.flight.exceptions import InvalidSearchCriteria
+import time
+
+
+@dataclass(frozen=True)
+class SearchCriteria:
+    origin: str
+    destination: str
+    date: str
+    cabin_class: str = TravelClass.ECONOMY.value
+    passengers: int = 1
+
+    @classmethod
+    def normalize(cls, origin: str, destination: str, date, cabin_class: str = None, passengers: int = 1) -> "SearchCriteria":
+        """Builds criteria in canonical form so equivalent searches share a cache key."""
+        origin = (origin or "").strip().upper()
+        destination = (destination or "").strip().upper()
+        if len(origin) != 3 or len(destination) != 3:
+            raise InvalidSearchCriteria("Origin and destination must be 3-letter airport codes")
+        if origin == destination:
+            raise InvalidSearchCriteria("Origin and destination must differ")
+
+        try:
+            if isinstance(date, datetime):
+                date = date.date()
+            if not isinstance(date, date_type):
+                date = date_type.fromisoformat(str(date).strip())
+        except ValueError:
+            raise InvalidSearchCriteria(f"Invalid travel date: {date}")
+
+        try:
+            cabin = TravelClass(cabin_class or TravelClass.ECONOMY.value)
+        except ValueError:
+            raise InvalidSearchCriteria(f"Invalid cabin class: {cabin_class}")
+
+        try:
+            passengers = int(passengers)
+        except (TypeError, ValueError):
+            raise InvalidSearchCriteria(f"Invalid passenger count: {passengers}")
+        if passengers < 1 or passengers > 9:
+            raise InvalidSearchCriteria("Passenger count must be between 1 and 9")
+
+        return cls(origin, destination, date.isoformat(), cabin.value, passengers)
+
+    @property
+    def cache_key(self) -> str:
+        return f"{self.origin}:{self.destination}:{self.date}:{self.cabin_class}:{self.passengers}"
+
+
+class FlightSupplier(ABC):
+    """
+    Adapter interface for flight content providers. Implementations translate
+    SearchCriteria into the provider's API and return offers as dicts with the
+    keys produced by FakeFlightSupplier.
+    """
+    name = "supplier"
+
+    @abstractmethod
+    def search(self, criteria: SearchCriteria) -> list[dict]:
+        ...
+
+
+class FakeFlightSupplier(FlightSupplier):
+    """Local stand-in supplier with configurable latency, used in development and tests."""
+
+    def __init__(self, name: str = "fake", latency: float = 0.0, schedule: list[dict] = None, error: Exception = None) -> None:
+        self.name = name
+        self.latency = latency
+        self.error = error
+        self.schedule = schedule if schedule is not None else [
+            {"carrier_code": "AA", "flight_number": "101", "departs": "08:00:00", "arrives": "11:00:00", "price": 250.00},
+            {"carrier_code": "UA", "flight_number": "450", "departs": "14:00:00", "arrives": "17:30:00", "price": 290.50},
+        ]
+        self.calls = 0
+
+    def search(self, criteria: SearchCriteria) -> list[dict]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+
+        return [
+            {
+                "id": f"{self.name}_{flight['carrier_code']}{flight['flight_number']}_{criteria.date}",
+                "supplier": self.name,
+                "carrier_code": flight["carrier_code"],
+                "flight_number": flight["flight_number"],
+                "departure_airport": criteria.origin,
+                "arrival_airport": criteria.destination,
+                "departure_time": f"{criteria.date}T{flight['departs']}",
+                "arrival_time": f"{criteria.date}T{flight['arrives']}",
+                "cabin_class": criteria.cabin_class,
+                "passengers": criteria.passengers,
+                "price": round(flight["price"] * criteria.passengers, 2),
+                "currency": "USD"
+            }
+            for flight in self.schedule
+        ]
+
+
+def get_flight_suppliers() -> list[FlightSupplier]:
+    """
+    Returns the suppliers registered on the app (app.extensions['flight_suppliers']),
+    defaulting to a single FakeFlightSupplier until real providers are configured.
+    """
+    if not has_app_context():
+        return [FakeFlightSupplier()]
+    suppliers = current_app.extensions.get('flight_suppliers')
+    if not suppliers:
+        suppliers = [FakeFlightSupplier(latency=current_app.config.get('FLIGHT_FAKE_SUPPLIER_LATENCY', 0.0))]
+        current_app.extensions['flight_suppliers'] = suppliers
+    return suppliers
+
+
+def register_flight_supplier(app, supplier: FlightSupplier) -> None:
+    """Adds a supplier to the set queried by every flight search."""
+    suppliers = app.extensions.setdefault('flight_suppliers', [])
+    if any(existing.name == supplier.name for existing in suppliers):
+        raise ValueError(f"Flight supplier '{supplier.name}' is already registered")
+    suppliers.append(supplier)
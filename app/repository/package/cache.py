@@ -0,0 +1,31 @@
+from flask import current_app, has_app_context
+from app.utils.cache import TieredCache
+import hashlib
+import json
+
+# Process-wide so the LRU tier and in-flight coalescing outlive a request. The
+# short local TTL bounds how long another worker can serve an invalidated entry.
+package_cache = TieredCache(namespace="package", local_size=1024, local_ttl=10)
+
+SEARCH_TAG = "search"
+
+def package_tag(package_id: str) -> str:
+    return f"package:{package_id}"
+
+def detail_key(package_id: str) -> str:
+    return f"detail:{package_id}"
+
+def search_key(filters: dict, page: int, per_page: int) -> str:
+    payload = json.dumps({"filters": filters or {}, "page": page, "per_page": per_page}, sort_keys=True, default=str)
+    return f"search:{hashlib.sha1(payload.encode()).hexdigest()}"
+
+def cache_ttl(kind: str) -> int:
+    defaults = {"detail": 300, "search": 60}
+    if not has_app_context():
+        return defaults[kind]
+    return current_app.config.get(f'PACKAGE_{kind.upper()}_CACHE_TTL', defaults[kind])
+
+def invalidate_package(package_id: str = None, cache: TieredCache = None) -> None:
+    """Called after a package write commits: drops its detail document and every cached search page."""
+    tags = (SEARCH_TAG,) if package_id is None else (package_tag(package_id), SEARCH_TAG)
+    (cache or package_cache).invalidate_tags(*tags)
@@ -1,4 +1,5 @@
 from app.repository.package.ops.create import CreatePackage
 from app.repository.package.ops.get import GetPackageByID
-from app.repository.package.ops.search import SearchPackages
+from app.repository.package.ops.search import SearchPackages, PackageSearchResult
 from app.repository.package.ops.update import UpdatePackage
+from app.repository.package.ops.documents import GetPackageDocument, SearchPackageDocuments
@@ -5,6 +5,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 import uuid
 from app.repository.package.exceptions import DatabaseError, InvalidPackageData
+from app.repository.package.search_index import PackageSearchIndex
+from app.repository.package.cache import invalidate_package
 
 class CreatePackage:
     def __init__(self, db: Session) -> None:
@@ -37,7 +39,11 @@ class CreatePackage:
                 inclusion = PackageInclusion(package_id=new_package.id, **item)
                 self.db.add(inclusion)
 
+            self.db.flush()
+            PackageSearchIndex(self.db).index(new_package)
+
             self.db.commit()
+            invalidate_package(new_package.id)
             self.db.refresh(new_package)
             return new_package
 
@@ -0,0 +1,49 @@
+from sqlalchemy.orm import Session
+from app.schemas.package import PackageSchema
+from app.utils.cache import TieredCache
+from app.repository.package.cache import package_cache, package_tag, detail_key, search_key, cache_ttl, SEARCH_TAG
+from app.repository.package.ops.get import GetPackageByID
+from app.repository.package.ops.search import SearchPackages
+
+package_schema = PackageSchema()
+# Listing pages carry summaries only; the itinerary comes with the detail document
+package_summary_schema = PackageSchema(many=True, exclude=('itinerary', 'inclusions'))
+
+class GetPackageDocument:
+    """Serialized package with itinerary and inclusions, read through the package cache."""
+    def __init__(self, db: Session, cache: TieredCache = None) -> None:
+        self.db = db
+        self.cache = cache or package_cache
+
+    def execute(self, package_id: str) -> dict:
+        def load():
+            return package_schema.dump(GetPackageByID(self.db).execute(package_id))
+
+        ttl = cache_ttl("detail")
+        if ttl <= 0:
+            return load()
+        return self.cache.get_or_load(detail_key(package_id), load, ttl, tags=(package_tag(package_id),))
+
+
+class SearchPackageDocuments:
+    """Serialized search result page, read through the package cache."""
+    def __init__(self, db: Session, cache: TieredCache = None) -> None:
+        self.db = db
+        self.cache = cache or package_cache
+
+    def execute(self, filters: dict = None, page: int = 1, per_page: int = SearchPackages.DEFAULT_PER_PAGE) -> dict:
+        def load():
+            result = SearchPackages(self.db).execute(filters, page, per_page)
+            return {
+                "items": package_summary_schema.dump(result.items),
+                "total": result.total,
+                "total_is_estimate": result.total_is_estimate,
+                "page": result.page,
+                "per_page": result.per_page,
+                "facets": result.facets
+            }
+
+        ttl = cache_ttl("search")
+        if ttl <= 0:
+            return load()
+        return self.cache.get_or_load(search_key(filters, page, per_page), load, ttl, tags=(SEARCH_TAG,))
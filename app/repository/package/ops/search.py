@@ -1,27 +1,167 @@
-from app.models import Package
+from app.models import Package, PackageItinerary
+from app.models.enums import ActivityType
+from dataclasses import dataclass, field
+from sqlalchemy import and_, case, func, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from app.repository.package.exceptions import DatabaseError
+from app.repository.package.exceptions import DatabaseError, InvalidPackageData
+from app.repository.package.search_index import PackageSearchIndex
+
+# Facet buckets. Price bands are half-open [low, high); duration bands are inclusive day ranges.
+PRICE_BANDS = {
+    "under_500": (None, 500),
+    "500_1000": (500, 1000),
+    "1000_2500": (1000, 2500),
+    "2500_5000": (2500, 5000),
+    "5000_plus": (5000, None),
+}
+DURATION_BANDS = {
+    "1_3": (1, 3),
+    "4_7": (4, 7),
+    "8_14": (8, 14),
+    "15_plus": (15, None),
+}
+
+def _price_condition(band: str):
+    low, high = PRICE_BANDS[band]
+    conditions = []
+    if low is not None:
+        conditions.append(Package.base_price >= low)
+    if high is not None:
+        conditions.append(Package.base_price < high)
+    return and_(*conditions)
+
+def _duration_condition(band: str):
+    low, high = DURATION_BANDS[band]
+    conditions = [Package.duration_days >= low]
+    if high is not None:
+        conditions.append(Package.duration_days <= high)
+    return and_(*conditions)
+
+
+@dataclass(frozen=True)
+class PackageSearchResult:
+    items: list = field(default_factory=list)
+    total: int = 0
+    # True when more than COUNT_CAP packages matched and total is a lower bound
+    total_is_estimate: bool = False
+    page: int = 1
+    per_page: int = 20
+    facets: dict = field(default_factory=dict)
+
+    @property
+    def has_more(self) -> bool:
+        return self.page * self.per_page < self.total
+
 
 class SearchPackages:
+    """
+    Ranked, faceted package search. Keywords go through the full-text index
+    (PackageSearchIndex) over title, description and itinerary locations;
+    without a keyword results are newest first.
+
+    Supported filters: keyword, min_price, max_price, price_band, duration,
+    duration_band and activity_type (one value or a list; matches packages with
+    any itinerary day of that type). Facet counts reflect all applied filters.
+    """
+    DEFAULT_PER_PAGE = 20
+    MAX_PER_PAGE = 100
+    # Counting stops here; beyond it the total is reported as an estimate
+    COUNT_CAP = 1000
+
     def __init__(self, db: Session) -> None:
         self.db = db
 
-    def execute(self, filters: dict = None) -> list[Package]:
+    def execute(self, filters: dict = None, page: int = 1, per_page: int = DEFAULT_PER_PAGE) -> PackageSearchResult:
+        filters = filters or {}
+        page = max(1, page or 1)
+        per_page = max(1, min(per_page or self.DEFAULT_PER_PAGE, self.MAX_PER_PAGE))
+
         try:
-            query = self.db.query(Package).filter(Package.is_active == True)
-            # TODO: Check on robustness
-            if filters:
-                if 'min_price' in filters:
-                    query = query.filter(Package.base_price >= filters['min_price'])
-                if 'max_price' in filters:
-                     query = query.filter(Package.base_price <= filters['max_price'])
-                if 'duration' in filters:
-                     query = query.filter(Package.duration_days == filters['duration'])
-                if 'keyword' in filters:
-                    keyword = f"%{filters['keyword']}%"
-                    query = query.filter(Package.title.ilike(keyword) | Package.description.ilike(keyword))
-
-            return query.all()
+            query = self._filtered(filters)
+            if filters.get('keyword'):
+                query, rank = PackageSearchIndex(self.db).match(query, filters['keyword'])
+                query = query.order_by(rank.desc(), Package.id)
+            else:
+                query = query.order_by(Package.created_at.desc(), Package.id)
+
+            items = query.offset((page - 1) * per_page).limit(per_page).all()
+
+            matched_ids = query.order_by(None).with_entities(Package.id)
+            total, estimated = self._count(matched_ids)
+
+            return PackageSearchResult(
+                items=items,
+                total=total,
+                total_is_estimate=estimated,
+                page=page,
+                per_page=per_page,
+                facets=self._facets(matched_ids.subquery())
+            )
         except SQLAlchemyError as e:
             raise DatabaseError(f"Database error while searching packages: {str(e)}") from e
+
+    def _filtered(self, filters: dict):
+        query = self.db.query(Package).filter(Package.is_active == True)
+
+        if 'min_price' in filters:
+            query = query.filter(Package.base_price >= filters['min_price'])
+        if 'max_price' in filters:
+            query = query.filter(Package.base_price <= filters['max_price'])
+        if 'duration' in filters:
+            query = query.filter(Package.duration_days == filters['duration'])
+
+        if filters.get('price_band'):
+            if filters['price_band'] not in PRICE_BANDS:
+                raise InvalidPackageData(f"Invalid price band: {filters['price_band']}")
+            query = query.filter(_price_condition(filters['price_band']))
+        if filters.get('duration_band'):
+            if filters['duration_band'] not in DURATION_BANDS:
+                raise InvalidPackageData(f"Invalid duration band: {filters['duration_band']}")
+            query = query.filter(_duration_condition(filters['duration_band']))
+
+        if filters.get('activity_type'):
+            values = filters['activity_type']
+            values = [values] if isinstance(values, str) else values
+            try:
+                activity_types = [ActivityType(value) for value in values]
+            except ValueError:
+                raise InvalidPackageData(f"Invalid activity type: {filters['activity_type']}")
+            query = query.filter(Package.id.in_(
+                select(PackageItinerary.package_id).where(PackageItinerary.activity_type.in_(activity_types))
+            ))
+
+        return query
+
+    def _count(self, matched_ids) -> tuple[int, bool]:
+        capped = matched_ids.limit(self.COUNT_CAP + 1).subquery()
+        count = self.db.query(func.count()).select_from(capped).scalar()
+        if count > self.COUNT_CAP:
+            return self.COUNT_CAP, True
+        return count, False
+
+    def _facets(self, matched) -> dict:
+        in_matched = Package.id.in_(select(matched.c.id))
+
+        bucket_columns = [
+            func.coalesce(func.sum(case((_price_condition(band), 1), else_=0)), 0).label(f"price_{band}")
+            for band in PRICE_BANDS
+        ] + [
+            func.coalesce(func.sum(case((_duration_condition(band), 1), else_=0)), 0).label(f"duration_{band}")
+            for band in DURATION_BANDS
+        ]
+        buckets = self.db.query(*bucket_columns).filter(in_matched).one()._mapping
+
+        activity_rows = self.db.query(
+            PackageItinerary.activity_type,
+            func.count(func.distinct(PackageItinerary.package_id))
+        ).filter(
+            PackageItinerary.package_id.in_(select(matched.c.id)),
+            PackageItinerary.activity_type.isnot(None)
+        ).group_by(PackageItinerary.activity_type).all()
+
+        return {
+            "price_band": {band: int(buckets[f"price_{band}"]) for band in PRICE_BANDS},
+            "duration_band": {band: int(buckets[f"duration_{band}"]) for band in DURATION_BANDS},
+            "activity_type": {activity.value: count for activity, count in activity_rows}
+        }
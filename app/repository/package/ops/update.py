@@ -2,6 +2,8 @@ from app.models import Package
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from app.repository.package.exceptions import PackageNotFound, DatabaseError
+from app.repository.package.search_index import PackageSearchIndex
+from app.repository.package.cache import invalidate_package
 
 class UpdatePackage:
     def __init__(self, db: Session) -> None:
@@ -16,8 +18,12 @@ class UpdatePackage:
             for key, value in updates.items():
                 if hasattr(package, key):
                      setattr(package, key, value)
+
+            self.db.flush()
+            PackageSearchIndex(self.db).index(package)
             
             self.db.commit()
+            invalidate_package(package.id)
             self.db.refresh(package)
             return package
             
@@ -0,0 +1,108 @@
+from app.models import Package, PackageItinerary
+from app.models.package import PACKAGE_SEARCH_FTS5_DDL
+from sqlalchemy import func, literal_column, select, text, bindparam
+from sqlalchemy.orm import Session, Query
+import re
+
+# Column weights: title matches outrank description, which outranks itinerary locations
+POSTGRES_DOCUMENT = """
+    setweight(to_tsvector('english', coalesce(:title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(:description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(:locations, '')), 'C')
+"""
+SQLITE_BM25_WEIGHTS = "0.0, 10.0, 4.0, 2.0"
+
+
+def fts5_query(keyword: str) -> str | None:
+    """
+    Turns free text into an FTS5 expression: every word must match as a prefix.
+    Quoting each token keeps user input from being parsed as FTS5 syntax.
+    """
+    tokens = re.findall(r"\w+", keyword or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class PackageSearchIndex:
+    """
+    Keeps the full-text index for packages in step with their content and
+    applies keyword matching/ranking to package queries.
+
+    Postgres stores a weighted tsvector in packages.search_vector behind a GIN
+    index. SQLite uses the package_search FTS5 table created alongside the
+    packages table. Other dialects fall back to substring matching without an
+    index.
+    """
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def index(self, package: Package) -> None:
+        """(Re)indexes one package. Runs inside the caller's transaction."""
+        locations = " ".join(
+            location for (location,) in self.db.query(PackageItinerary.location).filter(
+                PackageItinerary.package_id == package.id,
+                PackageItinerary.location.isnot(None)
+            )
+        )
+        params = {
+            "id": package.id,
+            "title": package.title,
+            "description": package.description,
+            "locations": locations
+        }
+
+        if self.dialect == "postgresql":
+            self.db.execute(text(f"UPDATE packages SET search_vector = {POSTGRES_DOCUMENT} WHERE id = :id"), params)
+        elif self.dialect == "sqlite":
+            self.db.execute(text("DELETE FROM package_search WHERE package_id = :id"), params)
+            self.db.execute(text(
+                "INSERT INTO package_search (package_id, title, description, locations) "
+                "VALUES (:id, :title, :description, :locations)"
+            ), params)
+
+    def rebuild(self, batch_size: int = 500) -> int:
+        """
+        Reindexes every package in keyset-ordered batches, committing per batch. Returns the count.
+        On SQLite the FTS5 table is created first if missing (e.g. packages was created before it existed).
+        """
+        if self.dialect == "sqlite":
+            self.db.execute(text(PACKAGE_SEARCH_FTS5_DDL))
+        indexed = 0
+        last_id = ""
+        while True:
+            batch = self.db.query(Package).filter(Package.id > last_id).order_by(Package.id).limit(batch_size).all()
+            if not batch:
+                return indexed
+            for package in batch:
+                self.index(package)
+            self.db.commit()
+            indexed += len(batch)
+            last_id = batch[-1].id
+
+    def match(self, query: Query, keyword: str) -> tuple[Query, object]:
+        """
+        Restricts the query to packages matching keyword and returns it with a
+        rank expression to order by (descending = more relevant).
+        """
+        if self.dialect == "postgresql":
+            tsquery = func.websearch_to_tsquery("english", keyword)
+            search_vector = literal_column("packages.search_vector")
+            return query.filter(search_vector.op("@@")(tsquery)), func.ts_rank_cd(search_vector, tsquery)
+
+        if self.dialect == "sqlite":
+            expression = fts5_query(keyword)
+            if expression is None:
+                return query, literal_column("0")
+            hits = select(
+                literal_column("package_id").label("package_id"),
+                # bm25() is lower-is-better; negate so callers can always sort descending
+                literal_column(f"-bm25(package_search, {SQLITE_BM25_WEIGHTS})").label("rank")
+            ).select_from(text("package_search")).where(
+                text("package_search MATCH :fts_query").bindparams(bindparam("fts_query", expression))
+            ).subquery("search_hits")
+            return query.join(hits, hits.c.package_id == Package.id), hits.c.rank
+
+        pattern = f"%{keyword}%"
+        return query.filter(Package.title.ilike(pattern) | Package.description.ilike(pattern)), literal_column("0")
@@ -1,10 +1,14 @@
 from sqlalchemy.orm import Session
 from app.models import Package
+from app.repository.package.search_index import PackageSearchIndex
 from app.repository.package.ops import (
     CreatePackage,
     SearchPackages,
+    PackageSearchResult,
     UpdatePackage,
-    GetPackageByID
+    GetPackageByID,
+    GetPackageDocument,
+    SearchPackageDocuments
 )
 
 class PackageService:
@@ -17,8 +21,17 @@ class PackageService:
     def get_package_by_id(self, package_id: str) -> Package:
         return GetPackageByID(self.db).execute(package_id)
 
-    def search_packages(self, filters: dict = None) -> list[Package]:
-        return SearchPackages(self.db).execute(filters)
+    def search_packages(self, filters: dict = None, page: int = 1, per_page: int = 20) -> PackageSearchResult:
+        return SearchPackages(self.db).execute(filters, page, per_page)
+
+    def rebuild_search_index(self, batch_size: int = 500) -> int:
+        return PackageSearchIndex(self.db).rebuild(batch_size)
+
+    def get_package_document(self, package_id: str) -> dict:
+        return GetPackageDocument(self.db).execute(package_id)
+
+    def search_package_documents(self, filters: dict = None, page: int = 1, per_page: int = 20) -> dict:
+        return SearchPackageDocuments(self.db).execute(filters, page, per_page)
 
     def update_package(self, package_id: str, updates: dict) -> Package:
         return UpdatePackage(self.db).execute(package_id, updates)
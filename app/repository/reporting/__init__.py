@@ -0,0 +1,6 @@
+from app.repository.reporting.services import ReportingService
+from app.repository.reporting.exceptions import (
+    ReportingServiceException,
+    InvalidReportQuery,
+    DatabaseError
+)
@@ -0,0 +1,11 @@
+class ReportingServiceException(Exception):
+    """Base exception for Reporting Service"""
+    pass
+
+class InvalidReportQuery(ReportingServiceException):
+    """Raised when a report is requested with an unknown period or an invalid date range"""
+    pass
+
+class DatabaseError(ReportingServiceException):
+    """Raised when a database operation fails"""
+    pass
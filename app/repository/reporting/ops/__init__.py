@@ -0,0 +1,2 @@
+from app.repository.reporting.ops.get import GetRollupReport
+from app.repository.reporting.ops.backfill import BackfillRollups
@@ -0,0 +1,63 @@
+from app.models import Booking, BookingRollup, Payment, RevenueRollup
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from app.repository.reporting.exceptions import DatabaseError
+from app.repository.reporting.rollups import RollupDeltas
+
+class BackfillRollups:
+    """
+    Rebuilds booking_rollups and revenue_rollups from history.
+
+    Bookings and payments are read in keyset-ordered batches of batch_size
+    columns-only rows and folded into in-memory aggregates, so memory grows
+    with the number of rollup rows (days x types x statuses x currencies),
+    not with history. The tables are then replaced in one transaction.
+    Changes committed while the backfill reads are not reflected; run it when
+    writes are quiet, or again to correct.
+    """
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def execute(self, batch_size: int = 1000) -> dict:
+        deltas = RollupDeltas()
+        try:
+            bookings = self._stream(
+                self.db.query(Booking.id, Booking.created_at, Booking.booking_type, Booking.status,
+                              Booking.currency, Booking.total_amount),
+                Booking.id, batch_size,
+                lambda row: deltas.add_booking(*row[1:])
+            )
+            payments = self._stream(
+                self.db.query(Payment.id, Payment.payment_date, Payment.created_at, Booking.booking_type,
+                              Payment.status, Payment.currency, Payment.amount).join(Booking, Booking.id == Payment.booking_id),
+                Payment.id, batch_size,
+                lambda row: deltas.add_payment(row[1] or row[2], *row[3:])
+            )
+
+            self.db.execute(delete(BookingRollup))
+            self.db.execute(delete(RevenueRollup))
+            deltas.write(self.db.connection())
+            self.db.commit()
+            return {
+                "bookings": bookings,
+                "payments": payments,
+                "booking_rollups": len(deltas.bookings),
+                "revenue_rollups": len(deltas.revenue)
+            }
+
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise DatabaseError(f"Database error while backfilling rollups: {str(e)}") from e
+
+    def _stream(self, query, id_column, batch_size: int, fold) -> int:
+        processed = 0
+        last_id = ""
+        while True:
+            batch = query.filter(id_column > last_id).order_by(id_column).limit(batch_size).all()
+            if not batch:
+                return processed
+            for row in batch:
+                fold(row)
+            processed += len(batch)
+            last_id = batch[-1][0]
@@ -0,0 +1,58 @@
+from app.models import BookingRollup, RevenueRollup
+from app.models.enums import BookingType, RollupPeriod
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from app.repository.reporting.exceptions import DatabaseError, InvalidReportQuery
+from datetime import date
+
+class GetRollupReport:
+    """Pre-aggregated rows for a dashboard: one row per period, booking type, status and currency."""
+    REPORTS = {
+        "bookings": (BookingRollup, BookingRollup.booking_count, BookingRollup.total_amount),
+        "revenue": (RevenueRollup, RevenueRollup.payment_count, RevenueRollup.amount),
+    }
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def execute(self, report: str, period: str = "day", start: date = None, end: date = None,
+                currency: str = None, booking_type: str = None) -> list[dict]:
+        if report not in self.REPORTS:
+            raise InvalidReportQuery(f"Unknown report: {report}")
+        try:
+            period = RollupPeriod(period)
+            booking_type = BookingType(booking_type) if booking_type else None
+        except ValueError as e:
+            raise InvalidReportQuery(str(e)) from e
+        if start and end and start > end:
+            raise InvalidReportQuery("Report start must not be after its end")
+
+        model, count_column, amount_column = self.REPORTS[report]
+        try:
+            query = self.db.query(model).filter(model.period == period)
+            if start:
+                query = query.filter(model.period_start >= start)
+            if end:
+                query = query.filter(model.period_start <= end)
+            if currency:
+                query = query.filter(model.currency == currency.upper())
+            if booking_type:
+                query = query.filter(model.booking_type == booking_type)
+
+            rows = query.order_by(model.period_start, model.booking_type, model.status, model.currency).all()
+            return [
+                {
+                    "period_start": row.period_start.isoformat(),
+                    "booking_type": row.booking_type.value,
+                    "status": row.status.value,
+                    "currency": row.currency,
+                    "count": getattr(row, count_column.key),
+                    "amount": round(getattr(row, amount_column.key), 2)
+                }
+                for row in rows
+                # Every item in a bucket changed status or was removed
+                if getattr(row, count_column.key) or round(getattr(row, amount_column.key), 2)
+            ]
+
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Database error while fetching {report} report: {str(e)}") from e
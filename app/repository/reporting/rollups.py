@@ -0,0 +1,265 @@
+from app.models import Booking, BookingRollup, Payment, RevenueRollup
+from app.models.enums import RollupPeriod
+from datetime import date, datetime, timezone
+from sqlalchemy import event, inspect, select, true
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# (period, period_start, booking_type, status, currency)
+RollupKey = tuple[RollupPeriod, date, object, object, str]
+
+_DIMENSION_COLUMNS = ('period', 'period_start', 'booking_type', 'status', 'currency')
+
+# Attributes a model's rollup deltas are computed from
+_TRACKED_ATTRIBUTES = {
+    Booking: ('created_at', 'booking_type', 'status', 'currency', 'total_amount'),
+    Payment: ('payment_date', 'created_at', 'booking_id', 'status', 'currency', 'amount'),
+}
+
+
+def period_starts(moment: datetime | date) -> list[tuple[RollupPeriod, date]]:
+    """The day and month buckets a timestamp falls into (UTC dates)."""
+    day = moment.date() if isinstance(moment, datetime) else moment
+    return [(RollupPeriod.DAY, day), (RollupPeriod.MONTH, day.replace(day=1))]
+
+
+class RollupDeltas:
+    """Signed (count, amount) changes per rollup key, merged before they are written."""
+
+    def __init__(self) -> None:
+        self.bookings: dict[RollupKey, list] = {}
+        self.revenue: dict[RollupKey, list] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.bookings or self.revenue)
+
+    def add_booking(self, created_at, booking_type, status, currency, amount, sign: int = 1) -> None:
+        self._add(self.bookings, created_at, booking_type, status, currency, amount, sign)
+
+    def add_payment(self, paid_at, booking_type, status, currency, amount, sign: int = 1) -> None:
+        self._add(self.revenue, paid_at, booking_type, status, currency, amount, sign)
+
+    @staticmethod
+    def _add(target, moment, booking_type, status, currency, amount, sign) -> None:
+        if moment is None or booking_type is None or status is None:
+            return
+        for period, start in period_starts(moment):
+            entry = target.setdefault((period, start, booking_type, status, currency or ''), [0, 0.0])
+            entry[0] += sign
+            entry[1] += sign * (amount or 0.0)
+
+    def write(self, conn: Connection) -> None:
+        _upsert(conn, BookingRollup.__table__, self.bookings, 'booking_count', 'total_amount')
+        _upsert(conn, RevenueRollup.__table__, self.revenue, 'payment_count', 'amount')
+
+
+def _upsert(conn: Connection, table, deltas: dict[RollupKey, list], count_column: str, amount_column: str) -> None:
+    """
+    Adds the deltas to their rollup rows with one INSERT ... ON CONFLICT DO
+    UPDATE, like upsert_metrics; other dialects update-then-insert per key.
+    """
+    deltas = {key: value for key, value in deltas.items() if value[0] or round(value[1], 2)}
+    if not deltas:
+        return
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            'id': str(uuid.uuid4()),
+            **dict(zip(_DIMENSION_COLUMNS, key)),
+            count_column: count,
+            amount_column: round(amount, 2),
+            'created_at': now,
+            'updated_at': now,
+        }
+        for key, (count, amount) in deltas.items()
+    ]
+
+    dialect = conn.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    if insert is not None:
+        stmt = insert(table)
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c[name] for name in _DIMENSION_COLUMNS],
+            set_={
+                count_column: table.c[count_column] + stmt.excluded[count_column],
+                amount_column: table.c[amount_column] + stmt.excluded[amount_column],
+                'updated_at': stmt.excluded.updated_at,
+            }
+        ), rows)
+        return
+
+    for row in rows:
+        result = conn.execute(
+            table.update()
+            .where(*[table.c[name] == row[name] for name in _DIMENSION_COLUMNS])
+            .values({
+                count_column: table.c[count_column] + row[count_column],
+                amount_column: table.c[amount_column] + row[amount_column],
+                'updated_at': now,
+            })
+        )
+        if result.rowcount == 0:
+            conn.execute(table.insert().values(**row))
+
+
+class RollupTracker:
+    """
+    Keeps booking_rollups and revenue_rollups in step with the ORM.
+
+    After each flush, the bookings and payments it inserted, changed or
+    deleted are turned into signed deltas (a status change moves one count
+    from the old status to the new) and written with one upsert per table
+    on the flush's own connection. The rollups therefore commit or roll back
+    with the change that caused them. Bulk query(...).update()/delete() and
+    update()/delete() statements on bookings and payments are tracked too
+    (track_bulk): the affected rows are read before and after the statement.
+    Core statements run on a Connection bypass the session and are not seen;
+    backfill-rollups repairs any drift they cause.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = True
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get('REPORTING_ROLLUPS_ENABLED', self.enabled)
+        app.extensions['rollup_tracker'] = self
+
+    def collect(self, session: Session) -> RollupDeltas:
+        deltas = RollupDeltas()
+        payments = []
+        for obj in session.new:
+            if isinstance(obj, Booking):
+                deltas.add_booking(obj.created_at, obj.booking_type, obj.status, obj.currency, obj.total_amount)
+            elif isinstance(obj, Payment):
+                payments.append((obj, None))
+        for obj in session.dirty:
+            if isinstance(obj, Booking) and session.is_modified(obj, include_collections=False):
+                deltas.add_booking(*_previous(obj, *_TRACKED_ATTRIBUTES[Booking]), sign=-1)
+                deltas.add_booking(obj.created_at, obj.booking_type, obj.status, obj.currency, obj.total_amount)
+            elif isinstance(obj, Payment) and session.is_modified(obj, include_collections=False):
+                payments.append((obj, _previous(obj, *_TRACKED_ATTRIBUTES[Payment])))
+        for obj in session.deleted:
+            if isinstance(obj, Booking):
+                deltas.add_booking(*_previous(obj, *_TRACKED_ATTRIBUTES[Booking]), sign=-1)
+            elif isinstance(obj, Payment):
+                payments.append((None, _previous(obj, *_TRACKED_ATTRIBUTES[Payment])))
+
+        if payments:
+            booking_types = self._booking_types(session, payments)
+            for payment, old in payments:
+                if old is not None:
+                    paid_at, created_at, booking_id, status, currency, amount = old
+                    deltas.add_payment(paid_at or created_at, booking_types.get(booking_id), status, currency, amount, sign=-1)
+                if payment is not None:
+                    deltas.add_payment(payment.payment_date or payment.created_at, booking_types.get(payment.booking_id),
+                                       payment.status, payment.currency, payment.amount)
+        return deltas
+
+    def track_bulk(self, orm_execute_state, model):
+        """Runs a bulk UPDATE/DELETE of model and writes the rollup deltas of the rows it changed."""
+        criteria = orm_execute_state.statement.whereclause
+        params = orm_execute_state.parameters
+        if isinstance(params, list):
+            # ORM bulk UPDATE by primary key: one parameter set per row
+            criteria = model.id.in_([row['id'] for row in params])
+            params = {}
+        elif criteria is None:
+            criteria = true()
+
+        conn = orm_execute_state.session.connection()
+        before = _snapshot(conn, model, criteria, params)
+        result = orm_execute_state.invoke_statement()
+        if not before:
+            return result
+        after = _snapshot(conn, model, model.id.in_([row.id for row in before])) if orm_execute_state.is_update else []
+
+        deltas = RollupDeltas()
+        if model is Booking:
+            for rows, sign in ((before, -1), (after, 1)):
+                for row in rows:
+                    deltas.add_booking(row.created_at, row.booking_type, row.status, row.currency, row.total_amount, sign)
+        else:
+            booking_ids = {row.booking_id for row in before} | {row.booking_id for row in after}
+            booking_types = dict(conn.execute(select(Booking.id, Booking.booking_type).where(Booking.id.in_(booking_ids))).all())
+            for rows, sign in ((before, -1), (after, 1)):
+                for row in rows:
+                    deltas.add_payment(row.payment_date or row.created_at, booking_types.get(row.booking_id),
+                                       row.status, row.currency, row.amount, sign)
+        deltas.write(conn)
+        return result
+
+    @staticmethod
+    def _booking_types(session: Session, payments: list) -> dict:
+        """Booking type per booking id, from the identity map where possible, else one query."""
+        booking_ids = {payment.booking_id for payment, _ in payments if payment is not None}
+        booking_ids |= {old[2] for _, old in payments if old is not None}
+        types, missing = {}, []
+        for booking_id in booking_ids:
+            booking = session.identity_map.get(identity_key(Booking, booking_id))
+            # Only already-loaded values; reading an expired attribute here would cost a query per booking
+            booking_type = inspect(booking).dict.get('booking_type') if booking is not None else None
+            if booking_type is not None:
+                types[booking_id] = booking_type
+            elif booking_id is not None:
+                missing.append(booking_id)
+        if missing:
+            rows = session.connection().execute(select(Booking.id, Booking.booking_type).where(Booking.id.in_(missing)))
+            types.update(rows.all())
+        return types
+
+
+def _previous(obj, *attributes) -> tuple:
+    """Attribute values as loaded, before this flush's changes."""
+    state = inspect(obj)
+    values = []
+    for name in attributes:
+        history = state.attrs[name].history
+        values.append(history.deleted[0] if history.deleted else getattr(obj, name))
+    return tuple(values)
+
+
+def _snapshot(conn: Connection, model, criteria, params: dict = None) -> list:
+    """Id and tracked attributes of the model's rows matching criteria."""
+    columns = [model.id] + [getattr(model, name) for name in _TRACKED_ATTRIBUTES[model]]
+    return conn.execute(select(*columns).where(criteria), params or {}).all()
+
+
+rollup_tracker = RollupTracker()
+
+def _keep_previous_value(target, value, oldvalue, initiator) -> None:
+    pass
+
+# Assigning to an expired attribute normally discards the old value; the deltas need it
+for _model, _attributes in _TRACKED_ATTRIBUTES.items():
+    for _name in _attributes:
+        event.listen(getattr(_model, _name), 'set', _keep_previous_value, active_history=True)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_rollups(session, flush_context) -> None:
+    if not rollup_tracker.enabled:
+        return
+    deltas = rollup_tracker.collect(session)
+    if deltas:
+        deltas.write(session.connection())
+
+@event.listens_for(Session, 'do_orm_execute')
+def _update_rollups_for_bulk_change(orm_execute_state):
+    # query(...).update()/delete() and update()/delete() statements skip the flush
+    if not rollup_tracker.enabled or not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in _TRACKED_ATTRIBUTES:
+        return None
+    return rollup_tracker.track_bulk(orm_execute_state, mapper.class_)
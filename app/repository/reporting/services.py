@@ -0,0 +1,20 @@
+from sqlalchemy.orm import Session
+from datetime import date
+from app.repository.reporting.ops import GetRollupReport, BackfillRollups
+
+class ReportingService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def booking_report(self, period: str = "day", start: date = None, end: date = None,
+                       currency: str = None, booking_type: str = None) -> list[dict]:
+        """Bookings created (count and total amount) per day or month, booking type, status and currency."""
+        return GetRollupReport(self.db).execute("bookings", period, start, end, currency, booking_type)
+
+    def revenue_report(self, period: str = "day", start: date = None, end: date = None,
+                       currency: str = None, booking_type: str = None) -> list[dict]:
+        """Payments (count and amount) per day or month of payment, booking type, payment status and currency."""
+        return GetRollupReport(self.db).execute("revenue", period, start, end, currency, booking_type)
+
+    def backfill_rollups(self, batch_size: int = 1000) -> dict:
+        return BackfillRollups(self.db).execute(batch_size)
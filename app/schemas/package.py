@@ -0,0 +1,27 @@
+from app.schemas.base import BaseSchema
+from app.models.enums import ActivityType
+from marshmallow import fields
+
+class PackageItinerarySchema(BaseSchema):
+    day_number = fields.Int()
+    title = fields.Str()
+    description = fields.Str()
+    location = fields.Str()
+    activity_type = fields.Enum(ActivityType, by_value=True)
+
+class PackageInclusionSchema(BaseSchema):
+    description = fields.Str()
+    is_included = fields.Bool()
+
+class PackageSchema(BaseSchema):
+    title = fields.Str()
+    slug = fields.Str()
+    description = fields.Str()
+    base_price = fields.Float()
+    currency = fields.Str()
+    duration_days = fields.Int()
+    is_active = fields.Bool()
+    featured_image_url = fields.Str()
+    gallery_urls = fields.List(fields.Str())
+    itinerary = fields.List(fields.Nested(PackageItinerarySchema))
+    inclusions = fields.List(fields.Nested(PackageInclusionSchema))
@@ -1,11 +1,205 @@
-from datetime import date
-from flask import current_app
+from datetime import date, datetime, timezone
+from flask import current_app, has_app_context
+from sqlalchemy.engine import Engine
 from app.extensions import db
 from app.models.analytics import AnalyticsMetric
+import atexit
 import logging
+import os
+import threading
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# (metric_name, date_dimension, category, dimension_key)
+MetricKey = tuple[str, date, str, str]
+
+_DIMENSION_COLUMNS = ('metric_name', 'date_dimension', 'category', 'dimension_key')
+
+
+class MetricAggregator:
+    """
+    In-process buffer for analytics increments.
+
+    Increments are merged in memory by (metric_name, date_dimension, category,
+    dimension_key) and written out as a single bulk upsert by a background
+    thread, every flush interval or as soon as the pending increment count
+    reaches a threshold. Request handlers therefore do no database work for
+    metrics (without a flusher thread the threshold flushes inline).
+    """
+
+    def __init__(self, app=None) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[MetricKey, list] = {}
+        self._pending_increments = 0
+        self._app = None
+        self._flush_interval = 10.0
+        self._flush_threshold = 500
+        self._flusher = None
+        self._flusher_pid = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        atexit.register(self.shutdown)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        app.config.setdefault('ANALYTICS_FLUSH_INTERVAL', 10)
+        app.config.setdefault('ANALYTICS_FLUSH_THRESHOLD', 500)
+
+        self._app = app
+        self._flush_interval = float(app.config['ANALYTICS_FLUSH_INTERVAL'])
+        self._flush_threshold = int(app.config['ANALYTICS_FLUSH_THRESHOLD'])
+        app.extensions['metric_aggregator'] = self
+
+    def add(self, metric_name: str, value: float = 1.0, category: str = None, dimension_key: str = None, day: date = None) -> None:
+        key = (metric_name, day or date.today(), category or '', dimension_key or '')
+
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry:
+                entry[0] += value
+                entry[1] += 1
+            else:
+                self._pending[key] = [value, 1]
+            self._pending_increments += 1
+            threshold_reached = self._pending_increments >= self._flush_threshold
+
+        flusher_running = self._ensure_flusher()
+        if threshold_reached:
+            if flusher_running:
+                self._wake.set()
+            else:
+                self.flush()
+
+    def pending(self) -> dict[MetricKey, tuple[float, int]]:
+        """Returns a snapshot of the buffered (value, count) totals per key."""
+        with self._lock:
+            return {key: (entry[0], entry[1]) for key, entry in self._pending.items()}
+
+    def flush(self) -> int:
+        """
+        Writes all buffered increments in one upsert and returns the number of
+        rows touched. On failure the increments are merged back into the buffer.
+        """
+        with self._lock:
+            batch = self._pending
+            self._pending = {}
+            self._pending_increments = 0
+
+        if not batch:
+            return 0
+
+        try:
+            if has_app_context() or self._app is None:
+                upsert_metrics(db.engine, batch)
+            else:
+                with self._app.app_context():
+                    upsert_metrics(db.engine, batch)
+            return len(batch)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(batch)} analytics metrics: {e}")
+            self._restore(batch)
+            return 0
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+
+    def _restore(self, batch: dict[MetricKey, list]) -> None:
+        with self._lock:
+            for key, (value, count) in batch.items():
+                entry = self._pending.setdefault(key, [0.0, 0])
+                entry[0] += value
+                entry[1] += count
+                self._pending_increments += count
+
+    def _ensure_flusher(self) -> bool:
+        """Starts the background flusher if needed; False when there is none (disabled or no app)."""
+        if self._flush_interval <= 0 or self._app is None:
+            return False
+        # Threads do not survive fork, so each worker process starts its own flusher
+        pid = os.getpid()
+        if self._flusher_pid == pid and self._flusher and self._flusher.is_alive():
+            return True
+        with self._lock:
+            if self._flusher_pid == pid and self._flusher and self._flusher.is_alive():
+                return True
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._run, name="metric-aggregator", daemon=True)
+            self._flusher_pid = pid
+            self._flusher.start()
+            return True
+
+    def _run(self) -> None:
+        # Wakes every flush interval, or early when add() reaches the threshold
+        while True:
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self.flush()
+
+
+def upsert_metrics(engine: Engine, batch: dict[MetricKey, list]) -> None:
+    """
+    Applies aggregated increments using INSERT ... ON CONFLICT DO UPDATE against the
+    dimension unique constraint. Dialects without ON CONFLICT fall back to an
+    update-then-insert per key inside a single transaction.
+    """
+    table = AnalyticsMetric.__table__
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            'id': str(uuid.uuid4()),
+            'metric_name': metric_name,
+            'date_dimension': day,
+            'category': category,
+            'dimension_key': dimension_key,
+            'value': value,
+            'count': count,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for (metric_name, day, category, dimension_key), (value, count) in batch.items()
+    ]
+
+    dialect = engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    with engine.begin() as conn:
+        if insert is not None:
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c[name] for name in _DIMENSION_COLUMNS],
+                set_={
+                    'value': table.c.value + stmt.excluded.value,
+                    'count': table.c.count + stmt.excluded.count,
+                    'updated_at': stmt.excluded.updated_at,
+                }
+            )
+            conn.execute(stmt, rows)
+            return
+
+        for row in rows:
+            result = conn.execute(
+                table.update()
+                .where(*[table.c[name] == row[name] for name in _DIMENSION_COLUMNS])
+                .values(value=table.c.value + row['value'], count=table.c.count + row['count'], updated_at=now)
+            )
+            if result.rowcount == 0:
+                conn.execute(table.insert().values(**row))
+
+
+metric_aggregator = MetricAggregator()
+
+
 def track_metric(
     metric_name: str,
     value: float = 1.0,
@@ -13,8 +207,9 @@ def track_metric(
     dimension_key: str = None
 ):
     """
-    Tracks an analytics metric. Aggregates values for the same metric/day/dimensions.
-    
+    Tracks an analytics metric. Aggregates values for the same metric/day/dimensions
+    in memory; the buffered totals are upserted in bulk by the MetricAggregator.
+
     Args:
         metric_name (str): The name of the metric (e.g., 'login_success').
         value (float): The value to add (default 1.0 for counts).
@@ -22,36 +217,7 @@ def track_metric(
         dimension_key (str, optional): Specific dimension (e.g., 'Google', 'Email').
     """
     try:
-        today = date.today()
-        
-        # Check if metric exists for today with same dimensions
-        # We use a select for update if possible, or just standard query
-        # Since this might be high volume, ideally this is async or batched, 
-        # but for direct DB implementation:
-        
-        metric = db.session.query(AnalyticsMetric).filter_by(
-            metric_name=metric_name,
-            date_dimension=today,
-            category=category,
-            dimension_key=dimension_key
-        ).first()
-        
-        if metric:
-            metric.value += value
-            metric.count += 1
-        else:
-            metric = AnalyticsMetric(
-                metric_name=metric_name,
-                date_dimension=today,
-                value=value,
-                count=1,
-                category=category,
-                dimension_key=dimension_key
-            )
-            db.session.add(metric)
-            
-        db.session.commit()
-        
+        aggregator = current_app.extensions.get('metric_aggregator', metric_aggregator)
+        aggregator.add(metric_name, value, category, dimension_key)
     except Exception as e:
         logger.error(f"Failed to track metric {metric_name}: {e}")
-        db.session.rollback()
@@ -1,12 +1,173 @@
-from datetime import datetime
-from flask import request, has_request_context
+from datetime import datetime, timezone
+from flask import current_app, request, has_app_context, has_request_context
 from app.extensions import db
 from app.models.audit_log import AuditLog
 from app.models.enums import AuditAction, EntityType
+import atexit
 import logging
+import os
+import queue
+import threading
+import uuid
 
 logger = logging.getLogger(__name__)
 
+OVERFLOW_POLICIES = ('caller_runs', 'block', 'drop')
+
+
+class AuditLogWriter:
+    """
+    Bounded in-memory queue of audit events drained by a background writer.
+
+    Events are persisted in batches with a single executemany INSERT on a
+    dedicated connection, so request handlers neither pay a commit per event
+    nor commit pending state of the request's session as a side effect.
+
+    When the queue is full the overflow policy decides what happens:
+        - caller_runs: the caller flushes the queue synchronously (no loss).
+        - block: the caller waits up to AUDIT_LOG_BLOCK_TIMEOUT for space, then drops.
+        - drop: the event is discarded and counted.
+    """
+
+    def __init__(self, app=None) -> None:
+        self._app = None
+        self._queue: queue.Queue = queue.Queue(maxsize=10000)
+        self._batch_size = 200
+        self._flush_interval = 2.0
+        self._overflow_policy = 'caller_runs'
+        self._block_timeout = 0.5
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._writer = None
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+        self.dropped = 0
+        atexit.register(self.shutdown)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        app.config.setdefault('AUDIT_LOG_QUEUE_SIZE', 10000)
+        app.config.setdefault('AUDIT_LOG_BATCH_SIZE', 200)
+        app.config.setdefault('AUDIT_LOG_FLUSH_INTERVAL', 2)
+        app.config.setdefault('AUDIT_LOG_OVERFLOW_POLICY', 'caller_runs')
+        app.config.setdefault('AUDIT_LOG_BLOCK_TIMEOUT', 0.5)
+
+        policy = app.config['AUDIT_LOG_OVERFLOW_POLICY']
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid AUDIT_LOG_OVERFLOW_POLICY: {policy}")
+
+        self._app = app
+        self._queue = queue.Queue(maxsize=int(app.config['AUDIT_LOG_QUEUE_SIZE']))
+        self._batch_size = int(app.config['AUDIT_LOG_BATCH_SIZE'])
+        self._flush_interval = float(app.config['AUDIT_LOG_FLUSH_INTERVAL'])
+        self._overflow_policy = policy
+        self._block_timeout = float(app.config['AUDIT_LOG_BLOCK_TIMEOUT'])
+        app.extensions['audit_log_writer'] = self
+
+    def submit(self, entry: dict) -> bool:
+        """Queues an audit row mapping. Returns False if the event was dropped."""
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            if not self._handle_overflow(entry):
+                self.dropped += 1
+                logger.warning(f"Audit log queue full, dropped event {entry.get('action')}")
+                return False
+
+        if self._queue.qsize() >= self._batch_size:
+            self._wakeup.set()
+        return True
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self) -> int:
+        """Drains the queue in batches and returns the number of rows written."""
+        written = 0
+        while True:
+            batch = self._drain(self._batch_size)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        self.flush()
+
+    def _handle_overflow(self, entry: dict) -> bool:
+        if self._overflow_policy == 'caller_runs':
+            self.flush()
+        elif self._overflow_policy == 'block':
+            self._wakeup.set()
+            try:
+                self._queue.put(entry, timeout=self._block_timeout)
+                return True
+            except queue.Full:
+                return False
+        else:
+            return False
+
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            return False
+
+    def _drain(self, limit: int) -> list[dict]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list[dict]) -> int:
+        try:
+            if has_app_context() or self._app is None:
+                self._insert(batch)
+            else:
+                with self._app.app_context():
+                    self._insert(batch)
+            return len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            logger.error(f"Failed to write {len(batch)} audit log entries: {e}")
+            return 0
+
+    @staticmethod
+    def _insert(batch: list[dict]) -> None:
+        with db.engine.begin() as conn:
+            conn.execute(AuditLog.__table__.insert(), batch)
+
+    def _ensure_writer(self) -> None:
+        if self._flush_interval <= 0 or self._app is None:
+            return
+        # Threads do not survive fork, so each worker process starts its own writer
+        pid = os.getpid()
+        if self._writer_pid == pid and self._writer and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer_pid == pid and self._writer and self._writer.is_alive():
+                return
+            self._stop.clear()
+            self._writer = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+            self._writer_pid = pid
+            self._writer.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+audit_log_writer = AuditLogWriter()
+
+
 def log_audit(
     action: AuditAction,
     entity_type: EntityType = None,
@@ -16,8 +177,8 @@ def log_audit(
     description: str = None
 ):
     """
-    Creates an audit log entry.
-    
+    Queues an audit log entry for the background writer.
+
     Args:
         action (AuditAction): The action performed.
         entity_type (EntityType, optional): The type of entity affected.
@@ -29,25 +190,28 @@ def log_audit(
     try:
         ip_address = None
         user_agent = None
-        
+
         if has_request_context():
             ip_address = request.remote_addr
             user_agent = request.user_agent.string if request.user_agent else None
 
-        audit_entry = AuditLog(
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            user_id=user_id,
-            changes=changes,
-            description=description,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        
-        db.session.add(audit_entry)
-        db.session.commit()
-        
+        now = datetime.now(timezone.utc)
+        audit_entry = {
+            'id': str(uuid.uuid4()),
+            'action': action,
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'user_id': user_id,
+            'changes': changes,
+            'description': description,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'created_at': now,
+            'updated_at': now
+        }
+
+        writer = current_app.extensions.get('audit_log_writer', audit_log_writer)
+        writer.submit(audit_entry)
+
     except Exception as e:
         logger.error(f"Failed to create audit log: {e}")
-        db.session.rollback()
@@ -0,0 +1,360 @@
+from collections import OrderedDict
+from typing import Any, Callable
+from app.utils.redis_client import get_redis
+import json
+import logging
+import threading
+import time
+import uuid
+import weakref
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe, size-bounded in-process cache with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the
+    function, later callers block until it finishes and share its result
+    (or its exception).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters for one cache."""
+    FIELDS = ('local_hits', 'redis_hits', 'misses', 'loads', 'lock_waits', 'stale_skips', 'invalidations')
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[field] += amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts['local_hits'] + counts['redis_hits'] + counts['misses']
+        counts['hit_ratio'] = round((lookups - counts['misses']) / lookups, 4) if lookups else None
+        return counts
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+
+_registry: "weakref.WeakSet[TieredCache]" = weakref.WeakSet()
+
+
+def cache_stats() -> dict:
+    """Counters for every live TieredCache, summed per namespace, for monitoring."""
+    totals: dict[str, CacheStats] = {}
+    for cache in list(_registry):
+        combined = totals.setdefault(cache.namespace, CacheStats())
+        counts = cache.stats.snapshot()
+        for field in CacheStats.FIELDS:
+            combined.incr(field, counts[field])
+    return {namespace: stats.snapshot() for namespace, stats in totals.items()}
+
+
+class TieredCache:
+    """
+    Two-tier read-through cache: a process-local LRU in front of the shared
+    Redis client returned by get_redis(). Values must be JSON serializable.
+    Redis failures are logged and treated as misses so the cache never takes
+    down the caller.
+
+    Entries may carry tags; invalidate_tags() drops every entry written under a
+    tag from Redis and this process's LRU. Other processes' LRU tiers are not
+    reachable, so local_ttl bounds how long they may serve a dropped entry.
+    """
+    LOCK_TIMEOUT = 10.0
+    LOCK_POLL_INTERVAL = 0.05
+
+    def __init__(self, namespace: str, local_size: int = 1024, local_ttl: float = None) -> None:
+        self.namespace = namespace
+        self.local = LRUCache(local_size)
+        self.local_ttl = local_ttl
+        self.stats = CacheStats()
+        self._flight = SingleFlight()
+        self._local_tags: dict[str, set] = {}
+        self._local_tag_versions: dict[str, int] = {}
+        self._tags_lock = threading.Lock()
+        _registry.add(self)
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.namespace}:tag:{tag}"
+
+    def _tag_version_key(self, tag: str) -> str:
+        return f"{self.namespace}:tagver:{tag}"
+
+    def _set_local(self, key: str, value: Any, ttl: float) -> None:
+        if self.local_ttl is not None:
+            ttl = min(ttl, self.local_ttl)
+        self.local.set(key, value, ttl)
+
+    def get(self, key: str) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats.incr('local_hits')
+            return value
+
+        client = get_redis()
+        if client is None:
+            self.stats.incr('misses')
+            return None
+        try:
+            raw = client.get(self._redis_key(key))
+            if raw is None:
+                self.stats.incr('misses')
+                return None
+            ttl = client.ttl(self._redis_key(key))
+        except Exception as e:
+            logger.warning(f"Redis read failed for {self.namespace}:{key}: {e}")
+            self.stats.incr('misses')
+            return None
+
+        self.stats.incr('redis_hits')
+        value = json.loads(raw)
+        if ttl and ttl > 0:
+            self._set_local(key, value, ttl)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, tags: tuple = ()) -> None:
+        self._set_local(key, value, ttl)
+        if tags:
+            with self._tags_lock:
+                for tag in tags:
+                    self._local_tags.setdefault(tag, set()).add(key)
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline()
+            pipe.set(self._redis_key(key), json.dumps(value), ex=max(1, int(ttl)))
+            for tag in tags:
+                pipe.sadd(self._tag_key(tag), key)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis write failed for {self.namespace}:{key}: {e}")
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.delete(self._redis_key(key))
+        except Exception as e:
+            logger.warning(f"Redis delete failed for {self.namespace}:{key}: {e}")
+
+    def invalidate_tags(self, *tags: str) -> None:
+        """Drops every entry stored under any of the tags and bumps the tags' versions."""
+        with self._tags_lock:
+            local_keys = set()
+            for tag in tags:
+                local_keys |= self._local_tags.pop(tag, set())
+                self._local_tag_versions[tag] = self._local_tag_versions.get(tag, 0) + 1
+        for key in local_keys:
+            self.local.delete(key)
+        self.stats.incr('invalidations', len(tags))
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            for tag in tags:
+                keys = [k.decode() if isinstance(k, bytes) else k for k in client.smembers(self._tag_key(tag))]
+                pipe = client.pipeline()
+                pipe.incr(self._tag_version_key(tag))
+                if keys:
+                    pipe.delete(*[self._redis_key(k) for k in keys])
+                pipe.delete(self._tag_key(tag))
+                pipe.execute()
+                # Entries written under this tag may also sit in our LRU under the key alone
+                for key in keys:
+                    self.local.delete(key)
+        except Exception as e:
+            logger.warning(f"Redis invalidation failed for {self.namespace} tags {tags}: {e}")
+
+    def _tag_versions(self, tags: tuple) -> tuple:
+        with self._tags_lock:
+            local = tuple(self._local_tag_versions.get(tag, 0) for tag in tags)
+        client = get_redis()
+        if client is None or not tags:
+            return local
+        try:
+            return local + tuple(client.mget([self._tag_version_key(tag) for tag in tags]))
+        except Exception:
+            return local
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: float | Callable[[Any], float], tags: tuple = ()) -> Any:
+        """
+        Returns the cached value for key, calling loader on a miss. Concurrent
+        misses for the same key share a single loader call: within the process
+        via SingleFlight, across processes via a short Redis lock while the
+        other processes poll for the leader's result.
+
+        ttl may be a callable that derives the expiry from the loaded value. A
+        value is not cached if one of its tags was invalidated while it loaded,
+        since it may have been read before the write that triggered it.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def load():
+            # Another caller may have filled the cache while we waited for the lock
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+
+            token = self._acquire_lock(key)
+            if token is False:
+                cached = self._wait_for_leader(key)
+                if cached is not None:
+                    return cached
+
+            try:
+                versions = self._tag_versions(tags)
+                self.stats.incr('loads')
+                loaded = loader()
+                if self._tag_versions(tags) == versions:
+                    self.set(key, loaded, ttl(loaded) if callable(ttl) else ttl, tags)
+                else:
+                    self.stats.incr('stale_skips')
+                return loaded
+            finally:
+                if token:
+                    self._release_lock(key, token)
+
+        return self._flight.do(key, load)
+
+    def _acquire_lock(self, key: str):
+        """Returns a token when the lock is held, None without Redis, False when another process holds it."""
+        client = get_redis()
+        if client is None:
+            return None
+        token = uuid.uuid4().hex
+        try:
+            acquired = client.set(f"{self._redis_key(key)}:lock", token, nx=True, px=int(self.LOCK_TIMEOUT * 1000))
+        except Exception as e:
+            logger.warning(f"Redis lock failed for {self.namespace}:{key}: {e}")
+            return None
+        return token if acquired else False
+
+    def _release_lock(self, key: str, token: str) -> None:
+        client = get_redis()
+        lock_key = f"{self._redis_key(key)}:lock"
+
+        def compare_and_delete(pipe) -> None:
+            # Drops only our own lock, not one another process took after ours timed out. A write
+            # between the read and the delete aborts and retries the transaction.
+            held = pipe.get(lock_key)
+            pipe.multi()
+            if held is not None and (held.decode() if isinstance(held, bytes) else held) == token:
+                pipe.delete(lock_key)
+
+        try:
+            client.transaction(compare_and_delete, lock_key)
+        except Exception as e:
+            logger.warning(f"Redis unlock failed for {self.namespace}:{key}: {e}")
+
+    def _wait_for_leader(self, key: str) -> Any:
+        self.stats.incr('lock_waits')
+        client = get_redis()
+        deadline = time.monotonic() + self.LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(self.LOCK_POLL_INTERVAL)
+            try:
+                raw = client.get(self._redis_key(key))
+                if raw is not None:
+                    return json.loads(raw)
+                if not client.exists(f"{self._redis_key(key)}:lock"):
+                    return None
+            except Exception:
+                return None
+        return None
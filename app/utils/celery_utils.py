@@ -1,5 +1,29 @@
 from celery import Celery, Task
+from celery.signals import worker_process_init
 from flask import Flask
+import logging
+
+logger = logging.getLogger(__name__)
+
+def warm_worker(app: Flask) -> None:
+    """Prepares a freshly started worker process before it takes tasks."""
+    from app.extensions import db
+    from app.repository.email.template_cache import notification_template_cache
+    from app.utils.jinja_cache import precompile_templates
+
+    with app.app_context():
+        # Connections inherited from the prefork parent must not be shared with it
+        db.engine.dispose(close=False)
+        # Loads bytecode written by the first process to compile; a no-op for prefork children
+        # that inherited the parent's compiled templates
+        if app.config.get('JINJA_PRECOMPILE_ON_STARTUP', True):
+            precompile_templates(app)
+        try:
+            notification_template_cache.warm_up(db.session)
+        except Exception as e:
+            logger.warning(f"Notification template warm-up failed: {e}")
+        finally:
+            db.session.remove()
 
 def celery_init_app(app: Flask) -> Celery:
     class FlaskTask(Task):
@@ -11,4 +35,6 @@ def celery_init_app(app: Flask) -> Celery:
     celery_app.config_from_object(app.config)
     celery_app.set_default()
     app.extensions["celery"] = celery_app
+
+    worker_process_init.connect(lambda **kwargs: warm_worker(app), weak=False)
     return celery_app
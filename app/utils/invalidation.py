@@ -0,0 +1,96 @@
+from app.utils.redis_client import get_redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from typing import Callable
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SharedVersion:
+    """
+    Cross-process invalidation of a process-wide cache through a Redis
+    counter. broadcast() bumps the counter; sync(), called before reads and
+    throttled to one Redis GET per check_interval seconds, runs on_change
+    when another process has bumped it since. Without Redis both are no-ops,
+    leaving the cache's own refresh interval to bound staleness.
+    """
+
+    def __init__(self, key: str, on_change: Callable[[], None], check_interval: float = 1.0) -> None:
+        self.key = key
+        self.on_change = on_change
+        self.check_interval = check_interval
+        self._version = None
+        self._checked_at = 0.0
+
+    def broadcast(self) -> None:
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            # Our own bump is not a change for sync() to act on
+            self._version = client.incr(self.key)
+        except Exception as e:
+            logger.warning(f"Failed to broadcast invalidation of {self.key}: {e}")
+
+    def sync(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            version = int(client.get(self.key) or 0)
+        except Exception:
+            return
+        if self._version is not None and version != self._version:
+            self.on_change()
+        self._version = version
+
+
+def invalidate_on_change(model, invalidate: Callable[..., None]) -> None:
+    """
+    Ties a process-wide cache of model rows to the ORM. invalidate(broadcast=...)
+    drops the local copy and, when broadcast is true, tells other processes
+    (e.g. by bumping a Redis version).
+
+    Inserts, updates and deletes of the model, flushed through the unit of work
+    or run as bulk update()/delete() statements, invalidate locally at once
+    and mark the session. The broadcast waits for that session's commit, so
+    other processes never reload the pre-commit rows. A rollback invalidates
+    locally once more, since this process may have reloaded the rolled-back
+    rows in between.
+    """
+    flag = f"{model.__tablename__}_changed"
+
+    def changed(session: Session | None) -> None:
+        invalidate(broadcast=False)
+        if session is not None:
+            session.info[flag] = True
+
+    def on_flush(mapper, connection, target) -> None:
+        changed(object_session(target))
+
+    for identifier in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(model, identifier, on_flush)
+
+    @event.listens_for(Session, 'do_orm_execute')
+    def on_bulk_change(orm_execute_state) -> None:
+        # query(...).update()/delete() and update()/delete() statements skip the mapper events
+        if (orm_execute_state.is_update or orm_execute_state.is_delete) and \
+                orm_execute_state.bind_mapper is not None and orm_execute_state.bind_mapper.class_ is model:
+            changed(orm_execute_state.session)
+
+    @event.listens_for(Session, 'after_commit')
+    def on_commit(session) -> None:
+        # Again once committed: a reload between the flush and the commit saw the old rows
+        if session.info.pop(flag, False):
+            invalidate(broadcast=True)
+
+    @event.listens_for(Session, 'after_rollback')
+    def on_rollback(session) -> None:
+        if session.info.pop(flag, False):
+            invalidate(broadcast=False)
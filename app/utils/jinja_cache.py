@@ -0,0 +1,40 @@
+from flask import Flask
+from jinja2 import FileSystemBytecodeCache
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATE_PREFIX = "email/"
+
+def init_bytecode_cache(app: Flask) -> None:
+    """
+    Points the app's Jinja environment at an on-disk bytecode cache shared by
+    every process on the host, so a template is compiled once per deploy rather
+    than once per worker. Must run before app.jinja_env is first used.
+    """
+    if not app.config.get('JINJA_BYTECODE_CACHE', True):
+        return
+    directory = app.config.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(directory)}
+
+def precompile_templates(app: Flask, prefix: str = EMAIL_TEMPLATE_PREFIX) -> int:
+    """
+    Compiles every template under prefix into the environment's in-memory
+    cache, writing bytecode to the shared cache on the way. Templates that
+    fail to compile are logged and skipped; they fail again at render time.
+    Returns the number compiled.
+    """
+    started = time.perf_counter()
+    names = app.jinja_env.list_templates(filter_func=lambda name: name.startswith(prefix))
+    compiled = 0
+    for name in names:
+        try:
+            app.jinja_env.get_template(name)
+            compiled += 1
+        except Exception as e:
+            logger.error(f"Failed to precompile template {name}: {e}")
+    logger.info(f"Precompiled {compiled} templates under {prefix} in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return compiled
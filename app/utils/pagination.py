@@ -0,0 +1,36 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+import base64
+import json
+
+@dataclass(frozen=True)
+class Page:
+    """One page of a keyset-paginated listing. next_cursor is None on the last page."""
+    items: list = field(default_factory=list)
+    next_cursor: str | None = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def encode_cursor(*values) -> str:
+    """
+    Packs the sort key of the last row on a page into an opaque, URL-safe token.
+    Datetimes are tagged so they round-trip; everything else must be JSON-native.
+    """
+    payload = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Inverse of encode_cursor. Raises ValueError for tokens that were not produced by it."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != size:
+            raise ValueError
+        return [datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v for v in payload]
+    except (TypeError, ValueError, KeyError, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed cursor: {cursor!r}") from e
@@ -0,0 +1,106 @@
+from app.utils.redis_client import get_redis
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Process-local bucket state, used when Redis is unavailable: {name: (tokens, updated_at)}
+_local_state: dict[str, tuple[float, float]] = {}
+_local_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every worker through Redis: `rate` tokens are added
+    per second up to `capacity`, and each send takes one.
+
+    take() never blocks. It returns 0 once the tokens are taken, or the number
+    of seconds until they will be available. With force=True the tokens are
+    taken regardless, which may run the bucket into debt (bounded at one full
+    bucket). Latency-sensitive traffic uses this, so it counts against the
+    limit and pushes paced traffic back instead of waiting itself.
+
+    Updates use WATCH/MULTI on a single hash, so concurrent takers retry
+    rather than double-spend. Without Redis the bucket is per process.
+    """
+    KEY_PREFIX = "rate_limit:"
+
+    def __init__(self, name: str, rate: float, capacity: float = None) -> None:
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self, tokens: float, updated_at: float, now: float) -> float:
+        return min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate)
+
+    def _consume(self, tokens: float, requested: float, force: bool) -> tuple[float, float]:
+        """Returns (remaining tokens, seconds to wait)."""
+        if tokens >= requested:
+            return tokens - requested, 0.0
+        if force:
+            return max(tokens - requested, -self.capacity), 0.0
+        return tokens, (requested - tokens) / self.rate
+
+    def take(self, tokens: float = 1, force: bool = False) -> float:
+        if not self.enabled:
+            return 0.0
+        client = get_redis()
+        if client is not None:
+            try:
+                return self._take_redis(client, tokens, force)
+            except Exception as e:
+                logger.warning(f"Rate limiter {self.name} falling back to process-local state: {e}")
+        return self._take_local(tokens, force)
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Blocks until the tokens are taken. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            wait = self.take(tokens)
+            if not wait:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def _take_local(self, tokens: float, force: bool) -> float:
+        now = time.time()
+        with _local_lock:
+            current, updated_at = _local_state.get(self.name, (self.capacity, now))
+            remaining, wait = self._consume(self._refill(current, updated_at, now), tokens, force)
+            _local_state[self.name] = (remaining, now)
+        return wait
+
+    def _take_redis(self, client, tokens: float, force: bool) -> float:
+        key = f"{self.KEY_PREFIX}{self.name}"
+        # Idle buckets are full again after capacity / rate seconds; no need to keep them
+        expire = int(self.capacity / self.rate) + 60
+
+        def update(pipe) -> float:
+            now = time.time()
+            state = pipe.hgetall(key)
+            if state:
+                current = self._refill(float(state[b"tokens"]), float(state[b"updated_at"]), now)
+            else:
+                current = self.capacity
+            remaining, wait = self._consume(current, tokens, force)
+            pipe.multi()
+            pipe.hset(key, mapping={"tokens": remaining, "updated_at": now})
+            pipe.expire(key, expire)
+            return wait
+
+        return client.transaction(update, key, value_from_callable=True)
+
+    def reset(self) -> None:
+        with _local_lock:
+            _local_state.pop(self.name, None)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.delete(f"{self.KEY_PREFIX}{self.name}")
+            except Exception:
+                pass
@@ -0,0 +1,32 @@
+from flask import current_app, has_app_context
+import logging
+
+logger = logging.getLogger(__name__)
+
+def get_redis():
+    """
+    Returns the application's shared Redis client, creating it from REDIS_URL on
+    first use. Returns None outside an app context, when REDIS_URL is unset or
+    when the redis package is not installed, so callers can fall back to
+    process-local or database state.
+
+    Tests may inject a client (e.g. fakeredis) via app.extensions['redis'].
+    """
+    if not has_app_context():
+        return None
+
+    app = current_app._get_current_object()
+    if 'redis' in app.extensions:
+        return app.extensions['redis']
+
+    client = None
+    url = app.config.get('REDIS_URL')
+    if url:
+        try:
+            import redis
+            client = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+        except ImportError:
+            logger.warning("REDIS_URL is set but the redis package is not installed.")
+
+    app.extensions['redis'] = client
+    return client
@@ -0,0 +1,97 @@
+from app.models import NumberSequence
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SequenceAllocator:
+    """
+    Hands out monotonic numbers per sequence name with hi/lo block reservation.
+
+    A process reserves block_size values at a time by advancing
+    number_sequences.next_value in one short transaction of its own, then
+    serves the block from memory. Concurrent processes each hold disjoint
+    blocks, so issuing a number never waits on a row lock held by another
+    caller's business transaction. Numbers increase within a process; across
+    processes they interleave by block, and a block abandoned by a process
+    exit leaves a gap.
+
+    Forked children drop inherited blocks, since the parent keeps serving them.
+    """
+
+    def __init__(self, block_size: int = 100) -> None:
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        # name -> [next value to hand out, end of block (exclusive)]
+        self._blocks: dict[str, list[int]] = {}
+        self.stats = dict.fromkeys(('issued', 'reservations'), 0)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def init_app(self, app) -> None:
+        self.block_size = app.config.get('SEQUENCE_BLOCK_SIZE', self.block_size)
+        app.extensions['sequence_allocator'] = self
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._blocks = {}
+
+    def next_value(self, bind: Session | Engine, name: str) -> int:
+        with self._lock:
+            block = self._blocks.get(name)
+            if block is None or block[0] >= block[1]:
+                block = self._blocks[name] = list(self._reserve(bind, name))
+            value = block[0]
+            block[0] += 1
+            self.stats['issued'] += 1
+            return value
+
+    def _reserve(self, bind: Session | Engine, name: str) -> tuple[int, int]:
+        """Advances the stored counter by one block and returns the block as [start, end)."""
+        # Sessions (including scoped ones) are only used to find the engine; the reservation
+        # commits on its own connection, independent of the caller's transaction
+        engine = bind.get_bind() if hasattr(bind, 'get_bind') else bind
+        size = self.block_size
+        advance = update(NumberSequence).where(NumberSequence.name == name).values(
+            next_value=NumberSequence.next_value + size
+        )
+
+        for _ in range(2):
+            with engine.begin() as conn:
+                if engine.dialect.update_returning:
+                    end = conn.execute(advance.returning(NumberSequence.next_value)).scalar()
+                elif conn.execute(advance).rowcount:
+                    # The UPDATE holds the row lock until this transaction ends, so the read is ours
+                    end = conn.execute(select(NumberSequence.next_value).where(NumberSequence.name == name)).scalar()
+                else:
+                    end = None
+            if end is not None:
+                self.stats['reservations'] += 1
+                return end - size, end
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(NumberSequence).values(name=name, next_value=1 + size))
+                self.stats['reservations'] += 1
+                return 1, 1 + size
+            except IntegrityError:
+                # Another process created the sequence first; reserve from it
+                continue
+        raise RuntimeError(f"Could not reserve a block for sequence {name}")
+
+
+sequence_allocator = SequenceAllocator()
+
+
+def next_number(bind: Session | Engine, prefix: str, width: int = 9) -> str:
+    """
+    Formats the next value of the prefix's sequence, e.g. INV-000000042. The
+    nine-digit padding keeps new numbers distinct from the legacy eight-hex
+    random ones.
+    """
+    return f"{prefix}-{sequence_allocator.next_value(bind, prefix):0{width}d}"
@@ -0,0 +1,115 @@
+"""
+Seat reservation stress benchmark.
+
+Hammers the seats of a single flight from many threads, each with its own
+session, and verifies that no seat ends up assigned to more than one segment.
+
+    python -m benchmarks.seat_reservation --database-url postgresql://... --threads 64 --attempts 2000 --seats 180
+
+Without --database-url (or DATABASE_URL) a temporary SQLite file is used.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from app.extensions import db
+from app.models import User, Booking, Flight, FlightSeat
+from app.models.enums import BookingType, SeatStatus
+from app.repository.flight.exceptions import SeatNotAvailable
+from app.repository.flight.ops import CreateSeatInventory, ReserveSeat
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+def _seat_map(count: int) -> list[str]:
+    letters = "ABCDEF"
+    return [f"{row}{letters[i]}" for row in range(1, count // len(letters) + 2) for i in range(len(letters))][:count]
+
+
+def run_seat_stress(database_url: str, threads: int = 32, attempts: int = 500, seats: int = 180, mode: str = "auto") -> dict:
+    """
+    Runs `attempts` reservations against a flight with `seats` seats.
+
+    mode "auto" lets every attempt take any free seat; mode "specific" spreads
+    attempts round-robin over the seat map so each seat is fought over by
+    attempts / seats threads. Either way exactly min(attempts, seats) succeed.
+    """
+    connect_args = {"timeout": 60, "check_same_thread": False} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args, pool_size=threads, max_overflow=0)
+    db.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    run_id = uuid.uuid4().hex[:8]
+    flight_data = {
+        "carrier_code": "ST",
+        "flight_number": run_id[:6],
+        "departure_airport": "JFK",
+        "arrival_airport": "LHR",
+        "departure_time": datetime(2030, 1, 1, 9, 0),
+        "arrival_time": datetime(2030, 1, 1, 21, 0)
+    }
+    seat_numbers = _seat_map(seats)
+
+    with Session() as session:
+        user = User(email=f"stress_{run_id}@example.com", password_hash="x", first_name="Stress", last_name="Test")
+        session.add(user)
+        session.flush()
+        bookings = [
+            Booking(reference_code=f"S{run_id[:5]}{i:06d}", user_id=user.id, booking_type=BookingType.FLIGHT)
+            for i in range(attempts)
+        ]
+        session.add_all(bookings)
+        session.commit()
+        booking_ids = [b.id for b in bookings]
+        instance_id = CreateSeatInventory(session).execute(flight_data, seat_numbers).id
+
+    def attempt(index: int) -> str:
+        seat_number = seat_numbers[index % len(seat_numbers)] if mode == "specific" else None
+        with Session() as session:
+            try:
+                ReserveSeat(session).execute(booking_ids[index], flight_data, seat_number)
+                return "reserved"
+            except SeatNotAvailable:
+                return "sold_out"
+            except Exception:
+                return "errors"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = list(pool.map(attempt, range(attempts)))
+    elapsed = time.perf_counter() - started
+
+    with Session() as session:
+        double_booked = session.query(Flight.seat_assignment).filter(
+            Flight.flight_instance_id == instance_id
+        ).group_by(Flight.seat_assignment).having(func.count(Flight.id) > 1).count()
+        reserved_seats = session.query(FlightSeat).filter_by(
+            flight_instance_id=instance_id, status=SeatStatus.RESERVED
+        ).count()
+    engine.dispose()
+
+    return {
+        "reserved": outcomes.count("reserved"),
+        "sold_out": outcomes.count("sold_out"),
+        "errors": outcomes.count("errors"),
+        "reserved_seats": reserved_seats,
+        "double_booked": double_booked,
+        "elapsed_s": round(elapsed, 3),
+        "attempts_per_s": round(attempts / elapsed, 1) if elapsed else None
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=500)
+    parser.add_argument("--seats", type=int, default=180)
+    parser.add_argument("--mode", choices=("auto", "specific"), default="auto")
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'seat_stress.db')}"
+    for key, value in run_seat_stress(url, args.threads, args.attempts, args.seats, args.mode).items():
+        print(f"{key}: {value}")
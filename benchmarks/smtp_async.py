@@ -0,0 +1,64 @@
+"""
+Sender mode throughput benchmark.
+
+Pushes the same messages through a local aiosmtpd stand-in that holds every
+DATA command for --latency seconds, to stand in for a provider's response time:
+
+  sync_serial  one message at a time over SMTPConnectionPool, as a prefork
+               worker process does
+  sync_threads --concurrency threads over SMTPConnectionPool (one session each)
+  async        --concurrency threads submitting to AsyncSMTPPool, sharing
+               --pool-size sessions on one event loop (MAIL_SENDER_MODE=async
+               with --pool threads)
+
+    python -m benchmarks.smtp_async --messages 500 --concurrency 32 --pool-size 8 --latency 0.02
+"""
+from concurrent.futures import ThreadPoolExecutor
+from app.repository.email.async_smtp_pool import AsyncSMTPPool
+from app.repository.email.smtp_pool import SMTPConnectionPool, SMTPSettings
+from app.repository.email.tasks import build_message
+from benchmarks.smtp_standin import SMTPStandIn
+import argparse
+import time
+
+
+def run_sender_benchmark(messages: int = 500, concurrency: int = 32, pool_size: int = 8, latency: float = 0.02) -> dict:
+    results = {}
+    for mode in ("sync_serial", "sync_threads", "async"):
+        with SMTPStandIn(data_delay=latency) as standin:
+            settings = SMTPSettings(host=standin.host, port=standin.port, username="bench", password="bench", use_tls=False)
+            msg = build_message("bench@example.com", "inbox@example.com", "Benchmark", "<p>Hello</p>")
+            if mode == "async":
+                pool = AsyncSMTPPool(max_size=pool_size, max_messages=10_000)
+            else:
+                pool = SMTPConnectionPool(max_size=concurrency, max_messages=10_000)
+            workers = 1 if mode == "sync_serial" else concurrency
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda _: pool.send_message(settings, msg), range(messages)))
+            elapsed = time.perf_counter() - started
+            pool.close_all()
+
+            results[mode] = {
+                "delivered": len(standin.messages),
+                "connections": standin.connections,
+                "elapsed_s": round(elapsed, 3),
+                "messages_per_s": round(messages / elapsed, 1) if elapsed else None
+            }
+
+    serial = results["sync_serial"]["messages_per_s"]
+    results["async_speedup_vs_serial"] = round(results["async"]["messages_per_s"] / serial, 2) if serial else None
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    for key, value in run_sender_benchmark(args.messages, args.concurrency, args.pool_size, args.latency).items():
+        print(f"{key}: {value}")
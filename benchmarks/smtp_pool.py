@@ -0,0 +1,70 @@
+"""
+SMTP connection pool benchmark.
+
+Sends the same messages through a local aiosmtpd stand-in twice: once opening
+a fresh authenticated session per message (the old send_async_email
+behaviour) and once through SMTPConnectionPool, from several threads.
+
+    python -m benchmarks.smtp_pool --messages 2000 --threads 4
+
+The stand-in has no TLS and sits on loopback, so the measured gap is a lower
+bound; real providers add STARTTLS and network round trips to every handshake.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from app.repository.email.smtp_pool import SMTPConnectionPool, SMTPSettings
+from app.repository.email.tasks import build_message
+from benchmarks.smtp_standin import SMTPStandIn
+import argparse
+import smtplib
+import time
+
+
+def _send_per_message(settings: SMTPSettings, msg) -> None:
+    with smtplib.SMTP(settings.host, settings.port, timeout=settings.timeout) as server:
+        if settings.use_tls:
+            server.starttls()
+        server.login(settings.username, settings.password)
+        server.send_message(msg)
+
+
+def run_smtp_benchmark(messages: int = 500, threads: int = 4, pool_size: int = None) -> dict:
+    results = {}
+    for mode in ("per_message", "pooled"):
+        with SMTPStandIn() as standin:
+            settings = SMTPSettings(host=standin.host, port=standin.port, username="bench", password="bench", use_tls=False)
+            pool = SMTPConnectionPool(max_size=pool_size or threads, max_messages=10_000)
+            msg = build_message("bench@example.com", "inbox@example.com", "Benchmark", "<p>Hello</p>")
+
+            def send(_) -> None:
+                if mode == "pooled":
+                    pool.send_message(settings, msg)
+                else:
+                    _send_per_message(settings, msg)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(send, range(messages)))
+            elapsed = time.perf_counter() - started
+            pool.close_all()
+
+            results[mode] = {
+                "delivered": len(standin.messages),
+                "connections": standin.connections,
+                "elapsed_s": round(elapsed, 3),
+                "messages_per_s": round(messages / elapsed, 1) if elapsed else None
+            }
+
+    per_message, pooled = results["per_message"]["messages_per_s"], results["pooled"]["messages_per_s"]
+    results["speedup"] = round(pooled / per_message, 2) if per_message and pooled else None
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=None)
+    args = parser.parse_args()
+
+    for key, value in run_smtp_benchmark(args.messages, args.threads, args.pool_size).items():
+        print(f"{key}: {value}")
@@ -0,0 +1,94 @@
+"""
+Local SMTP stand-in used by the email benchmarks and tests.
+
+Runs an aiosmtpd server on 127.0.0.1 that accepts any AUTH credentials, counts
+connections (EHLO/HELO) and delivered messages, and can be told to refuse
+specific recipients permanently (550) or temporarily (451).
+"""
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+import asyncio
+import socket
+import threading
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _Handler:
+    def __init__(self, standin: "SMTPStandIn") -> None:
+        self.standin = standin
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.standin._count("connections")
+        session.host_name = hostname
+        return responses
+
+    async def handle_HELO(self, server, session, envelope, hostname):
+        self.standin._count("connections")
+        session.host_name = hostname
+        return "250 {}".format(server.hostname)
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.standin.refuse:
+            return "550 5.1.1 Mailbox unavailable"
+        if address in self.standin.defer:
+            return "451 4.3.0 Try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.standin.data_delay:
+            await asyncio.sleep(self.standin.data_delay)
+        with self.standin._lock:
+            self.standin.messages.append((envelope.mail_from, list(envelope.rcpt_tos)))
+        return "250 Message accepted for delivery"
+
+
+class SMTPStandIn:
+    """
+    with SMTPStandIn() as smtp:
+        ... send to smtp.host:smtp.port ...
+        smtp.messages  # [(mail_from, [rcpt, ...]), ...]
+    """
+
+    def __init__(self, refuse: set = None, defer: set = None, data_delay: float = 0.0) -> None:
+        self.host = "127.0.0.1"
+        self.port = _free_port()
+        self.refuse = set(refuse or ())
+        self.defer = set(defer or ())
+        self.data_delay = data_delay
+        self.messages: list = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._controller = Controller(
+            _Handler(self),
+            hostname=self.host,
+            port=self.port,
+            auth_require_tls=False,
+            authenticator=lambda server, session, envelope, mechanism, auth_data: AuthResult(success=True)
+        )
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def recipients(self) -> list[str]:
+        return [rcpt for _, rcpts in self.messages for rcpt in rcpts]
+
+    def start(self) -> "SMTPStandIn":
+        self._controller.start()
+        return self
+
+    def stop(self) -> None:
+        self._controller.stop()
+
+    def __enter__(self) -> "SMTPStandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
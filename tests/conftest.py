@@ -3,6 +3,8 @@ from app import create_app
 from app.extensions import db
 from app.models import User, Booking
 from app.models.enums import UserRole, SubscriptionTier, BookingStatus, BookingType
+from sqlalchemy import event
+from typing import NamedTuple
 import uuid
 
 @pytest.fixture(scope='session')
@@ -31,6 +33,20 @@ def db_session(app):
     transaction.rollback()
     connection.close()
 
+class Query(NamedTuple):
+    statement: str
+    executemany: bool
+
+@pytest.fixture
+def count_queries(app):
+    """Records every statement sent through db.engine; clear() it right before the code being measured."""
+    queries = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        queries.append(Query(statement, executemany))
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield queries
+    event.remove(db.engine, "before_cursor_execute", record)
+
 @pytest.fixture
 def user_factory(db_session):
     def create_user(role=UserRole.CLIENT, **kwargs):
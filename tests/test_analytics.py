@@ -0,0 +1,80 @@
+import pytest
+import threading
+import time
+from datetime import date
+from app.models.analytics import AnalyticsMetric
+from app.utils.analytics import MetricAggregator, track_metric, metric_aggregator
+
+@pytest.fixture
+def aggregator(app):
+    aggregator = MetricAggregator()
+    aggregator._app = app
+    aggregator._flush_interval = 0
+    aggregator._flush_threshold = 1000
+    yield aggregator
+    aggregator.flush()
+
+def test_increments_are_merged_in_memory(aggregator):
+    for _ in range(5):
+        aggregator.add("agg_merge", category="auth")
+    aggregator.add("agg_merge", value=2.5, category="auth", dimension_key="google")
+
+    pending = aggregator.pending()
+    assert pending[("agg_merge", date.today(), "auth", "")] == (5.0, 5)
+    assert pending[("agg_merge", date.today(), "auth", "google")] == (2.5, 1)
+
+def test_flush_upserts_existing_rows(aggregator, db_session):
+    aggregator.add("agg_upsert", category="auth")
+    aggregator.add("agg_upsert", category="auth")
+    assert aggregator.flush() == 1
+
+    aggregator.add("agg_upsert", value=3.0, category="auth")
+    assert aggregator.flush() == 1
+    assert aggregator.pending() == {}
+
+    rows = db_session.query(AnalyticsMetric).filter_by(metric_name="agg_upsert").all()
+    assert len(rows) == 1
+    assert rows[0].count == 3
+    assert rows[0].value == 5.0
+
+def test_threshold_triggers_flush(aggregator, db_session):
+    aggregator._flush_threshold = 3
+    for _ in range(3):
+        aggregator.add("agg_threshold")
+
+    assert aggregator.pending() == {}
+    metric = db_session.query(AnalyticsMetric).filter_by(metric_name="agg_threshold").first()
+    assert metric.count == 3
+
+def test_threshold_wakes_background_flusher(aggregator, db_session):
+    aggregator._flush_interval = 60
+    aggregator._flush_threshold = 3
+    flush = aggregator.flush
+    flushed_by = []
+    def recording_flush():
+        flushed_by.append(threading.current_thread().name)
+        return flush()
+    aggregator.flush = recording_flush
+
+    try:
+        for _ in range(3):
+            aggregator.add("agg_wake")
+        deadline = time.monotonic() + 2
+        while aggregator.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        aggregator.shutdown()
+
+    # Flushed by the flusher long before its 60s interval, not by the caller of add()
+    assert flushed_by[0] == "metric-aggregator"
+    assert db_session.query(AnalyticsMetric).filter_by(metric_name="agg_wake").one().count == 3
+
+def test_track_metric_does_not_touch_database(app, count_queries):
+    count_queries.clear()
+    with app.test_request_context():
+        for _ in range(10):
+            track_metric("agg_no_db", category="auth")
+
+    assert count_queries == []
+    assert metric_aggregator.pending()[("agg_no_db", date.today(), "auth", "")] == (10.0, 10)
+    metric_aggregator.flush()
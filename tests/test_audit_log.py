@@ -0,0 +1,85 @@
+import pytest
+from datetime import datetime, timezone
+from app.models.audit_log import AuditLog
+from app.models.enums import AuditAction, EntityType
+from app.utils.audit_log import AuditLogWriter, log_audit, audit_log_writer
+
+@pytest.fixture
+def writer(app):
+    overrides = {'AUDIT_LOG_FLUSH_INTERVAL': 0, 'AUDIT_LOG_QUEUE_SIZE': 3, 'AUDIT_LOG_BATCH_SIZE': 2}
+    previous = {key: app.config[key] for key in overrides if key in app.config}
+    app.config.update(overrides)
+    writer = AuditLogWriter()
+    writer.init_app(app)
+    yield writer
+    writer.flush()
+    app.extensions['audit_log_writer'] = audit_log_writer
+    for key in overrides:
+        app.config.pop(key, None)
+    app.config.update(previous)
+
+def _entry(description):
+    now = datetime.now(timezone.utc)
+    return {
+        'id': description,
+        'action': AuditAction.UPDATE,
+        'entity_type': EntityType.USER,
+        'entity_id': None,
+        'user_id': None,
+        'changes': None,
+        'description': description,
+        'ip_address': None,
+        'user_agent': None,
+        'created_at': now,
+        'updated_at': now
+    }
+
+def test_log_audit_does_not_commit_request_session(app, user_factory, db_session, count_queries):
+    user_id = user_factory().id
+    count_queries.clear()
+    with app.test_request_context(environ_base={'REMOTE_ADDR': '127.0.0.1'}):
+        log_audit(action=AuditAction.LOGIN, entity_type=EntityType.USER, entity_id=user_id, user_id=user_id)
+
+    assert count_queries == []
+    assert audit_log_writer.pending() == 1
+
+    assert audit_log_writer.flush() == 1
+    audit = db_session.query(AuditLog).filter_by(action=AuditAction.LOGIN, user_id=user_id).first()
+    assert audit is not None
+    assert audit.ip_address == "127.0.0.1"
+
+def test_flush_writes_in_batches(writer, db_session, count_queries):
+    for i in range(3):
+        assert writer.submit(_entry(f"audit-batch-{i}"))
+
+    count_queries.clear()
+    assert writer.flush() == 3
+
+    # Batch size 2: one executemany for two rows, then a single-row insert
+    inserts = [query.executemany for query in count_queries if query.statement.startswith("INSERT INTO audit_logs")]
+    assert inserts == [True, False]
+    assert db_session.query(AuditLog).filter(AuditLog.description.like("audit-batch-%")).count() == 3
+
+def test_caller_runs_policy_flushes_when_full(writer, db_session):
+    for i in range(4):
+        assert writer.submit(_entry(f"audit-caller-{i}"))
+
+    # The fourth submit found the queue full and flushed the first three inline
+    assert writer.pending() == 1
+    assert db_session.query(AuditLog).filter(AuditLog.description.like("audit-caller-%")).count() == 3
+
+def test_drop_policy_discards_overflow(writer, app):
+    writer._overflow_policy = 'drop'
+    results = [writer.submit(_entry(f"audit-drop-{i}")) for i in range(4)]
+
+    assert results == [True, True, True, False]
+    assert writer.dropped == 1
+    assert writer.pending() == 3
+
+def test_invalid_overflow_policy_rejected(app):
+    app.config['AUDIT_LOG_OVERFLOW_POLICY'] = 'explode'
+    try:
+        with pytest.raises(ValueError):
+            AuditLogWriter().init_app(app)
+    finally:
+        app.config['AUDIT_LOG_OVERFLOW_POLICY'] = 'caller_runs'
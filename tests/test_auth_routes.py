@@ -4,6 +4,8 @@ from app.models import User
 from app.models.enums import UserRole, AuditAction
 from app.models.audit_log import AuditLog
 from app.models.analytics import AnalyticsMetric
+from app.utils.analytics import metric_aggregator
+from app.utils.audit_log import audit_log_writer
 from app.extensions import db
 
 def test_register_flow(client, db_session):
@@ -25,11 +27,13 @@ def test_register_flow(client, db_session):
     assert user.first_name == "Test"
     
     # Check Audit Log
+    audit_log_writer.flush()
     audit = db_session.query(AuditLog).filter_by(action=AuditAction.CREATE, entity_id=user.id).first()
     assert audit is not None
     assert audit.user_id == user.id
     
     # Check Analytics
+    metric_aggregator.flush()
     metric = db_session.query(AnalyticsMetric).filter_by(metric_name="user_registered").first()
     assert metric is not None
     assert metric.count >= 1
@@ -47,10 +51,12 @@ def test_login_flow(client, user_factory, db_session):
     assert response.json['user']['email'] == user.email
     
     # Check Audit Log
+    audit_log_writer.flush()
     audit = db_session.query(AuditLog).filter_by(action=AuditAction.LOGIN, user_id=user.id).first()
     assert audit is not None
     
     # Check Analytics
+    metric_aggregator.flush()
     metric = db_session.query(AnalyticsMetric).filter_by(metric_name="login_success").first()
     assert metric is not None
 
@@ -64,6 +70,7 @@ def test_login_invalid(client, db_session):
     assert "Invalid email or password" in response.json['message']
     
     # Check Analytics for failure
+    metric_aggregator.flush()
     metric = db_session.query(AnalyticsMetric).filter_by(metric_name="login_failure").first()
     assert metric is not None
 
@@ -85,10 +92,12 @@ def test_google_oauth_mock(client, db_session):
     assert user is not None
     
     # Check Audit (Login)
+    audit_log_writer.flush()
     audit = db_session.query(AuditLog).filter_by(action=AuditAction.LOGIN, user_id=user.id).first()
     assert audit is not None
     
     # Check Analytics
+    metric_aggregator.flush()
     metric = db_session.query(AnalyticsMetric).filter_by(metric_name="login_google_success").first()
     assert metric is not None
 
@@ -110,12 +119,14 @@ def test_verify_email(client, user_factory, db_session):
     
     if response.status_code == 200:
         # Check Audit
+        audit_log_writer.flush()
         audit = db_session.query(AuditLog).filter_by(action=AuditAction.UPDATE, user_id=user.id).first()
         # Depending on how the op implements it, it might not log or we just added logging in the route.
         # We added it in the route.
         assert audit is not None
         
         # Check Analytics
+        metric_aggregator.flush()
         metric = db_session.query(AnalyticsMetric).filter_by(metric_name="email_verified").first()
         assert metric is not None
 
@@ -127,6 +138,7 @@ def test_forgot_password(client, user_factory, db_session):
     assert "reset link" in response.json['message']
     
     # Check Analytics
+    metric_aggregator.flush()
     metric = db_session.query(AnalyticsMetric).filter_by(metric_name="password_reset_requested").first()
     assert metric is not None
 
@@ -142,5 +154,6 @@ def test_resend_verification(client, user_factory, db_session):
     assert "verification link" in response.json['message']
     
     # Check Analytics
+    metric_aggregator.flush()
     metric = db_session.query(AnalyticsMetric).filter_by(metric_name="verification_resend_requested").first()
     assert metric is not None
@@ -1,7 +1,22 @@
 import pytest
+import uuid
+from datetime import datetime, timedelta, timezone
 from app.repository.booking.services import BookingService
-from app.models.enums import BookingStatus, BookingType, Gender
-from app.repository.booking.exceptions import BookingNotFound, InvalidBookingStatus
+from app.repository.booking.hold_index import HoldIndex
+from app.repository.flight.services import FlightService
+from app.models import (
+    Booking, BookingHold, Flight, FlightBooking, FlightSeat, Passenger,
+    PackageBooking, CustomItinerary, CustomItineraryItem, Payment, Invoice
+)
+from app.models.enums import BookingStatus, BookingType, Gender, SeatStatus, PaymentMethod
+from app.repository.booking.exceptions import BookingNotFound, InvalidBookingStatus, HoldExpired, HoldNotFound, InvalidBookingQuery
+from sqlalchemy import text
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import date
+from app.repository.booking.ops.create import CreateBooking
+from app.repository.booking.reference import BookingReferenceGenerator
+from app.utils.sequences import SequenceAllocator
+import re
 
 def test_create_booking(db_session, user_factory):
     user = user_factory()
@@ -79,3 +94,261 @@ def test_cancel_already_cancelled(db_session, booking_factory):
     
     with pytest.raises(InvalidBookingStatus):
         service.cancel_booking(booking.id)
+
+def _flight_data(flight_number):
+    return {
+        "carrier_code": "TH",
+        "flight_number": flight_number,
+        "departure_airport": "NBO",
+        "arrival_airport": "DXB",
+        "departure_time": datetime(2024, 6, 1, 22, 0),
+        "arrival_time": datetime(2024, 6, 2, 4, 30)
+    }
+
+@pytest.fixture
+def hold_redis(app):
+    fakeredis = pytest.importorskip("fakeredis")
+    app.extensions['redis'] = fakeredis.FakeRedis()
+    yield app.extensions['redis']
+    app.extensions.pop('redis', None)
+
+def _expire(db_session, hold):
+    hold.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+    HoldIndex().add(hold.id, hold.expires_at)
+
+def test_hold_and_confirm(db_session, booking_factory, hold_redis):
+    booking = booking_factory()
+    service = BookingService(db_session)
+
+    hold = service.hold_seat(booking.id, _flight_data("701"), "3A")
+    seat = db_session.query(FlightSeat).filter_by(seat_number="3A").one()
+    assert seat.status == SeatStatus.HELD
+    assert seat.hold_id == hold.id
+    assert booking.status == BookingStatus.HELD
+    assert hold_redis.zscore(HoldIndex.KEY, hold.id) is not None
+
+    confirmed = service.confirm_hold(booking.id)
+    db_session.refresh(seat)
+    assert confirmed.status == BookingStatus.CONFIRMED
+    assert seat.status == SeatStatus.RESERVED
+    assert seat.hold_id is None
+    assert db_session.query(BookingHold).filter_by(booking_id=booking.id).first() is None
+    assert hold_redis.zcard(HoldIndex.KEY) == 0
+
+def test_confirm_without_hold(db_session, booking_factory):
+    with pytest.raises(HoldNotFound):
+        BookingService(db_session).confirm_hold(booking_factory().id)
+
+def test_confirm_expired_hold(db_session, booking_factory):
+    booking = booking_factory()
+    service = BookingService(db_session)
+    _expire(db_session, service.hold_seat(booking.id, _flight_data("702"), "4B"))
+
+    with pytest.raises(HoldExpired):
+        service.confirm_hold(booking.id)
+    service.release_expired_holds()
+
+def test_confirm_rechecks_expiry_in_its_statements(db_session, booking_factory):
+    booking = booking_factory()
+    service = BookingService(db_session)
+    hold = service.hold_seat(booking.id, _flight_data("705"), "6E")
+    _expire(db_session, hold)
+    # The copy ConfirmHold loads still looks live, as if the hold expired right after it was read
+    set_committed_value(db_session.get(BookingHold, hold.id), "expires_at", datetime.now(timezone.utc) + timedelta(minutes=5))
+
+    with pytest.raises(HoldExpired):
+        service.confirm_hold(booking.id)
+    db_session.refresh(booking)
+    assert booking.status == BookingStatus.HELD
+    assert db_session.query(FlightSeat).filter_by(seat_number="6E").one().status == SeatStatus.HELD
+    assert service.release_expired_holds() == 1
+
+def test_release_expired_holds_from_index(db_session, booking_factory, hold_redis):
+    service = BookingService(db_session)
+    expired = [booking_factory() for _ in range(3)]
+    live = booking_factory()
+    for i, booking in enumerate(expired):
+        _expire(db_session, service.hold_seat(booking.id, _flight_data("703"), f"{i + 1}C"))
+    service.hold_seat(live.id, _flight_data("703"), "9C")
+
+    assert service.release_expired_holds(batch_size=2) == 3
+
+    seats = {s.seat_number: s for s in db_session.query(FlightSeat).filter(FlightSeat.seat_number.in_(["1C", "2C", "3C", "9C"]))}
+    assert all(seats[n].status == SeatStatus.AVAILABLE and seats[n].flight_id is None for n in ("1C", "2C", "3C"))
+    assert seats["9C"].status == SeatStatus.HELD
+    for booking in expired:
+        db_session.refresh(booking)
+        assert booking.status == BookingStatus.PENDING
+        flight_booking = db_session.query(FlightBooking).filter_by(booking_id=booking.id).one()
+        assert db_session.query(Flight).filter_by(flight_booking_id=flight_booking.id).count() == 0
+    assert hold_redis.zcard(HoldIndex.KEY) == 1
+
+    # Released seats go straight back on sale
+    FlightService(db_session).reserve_seat(booking_factory().id, _flight_data("703"), "1C")
+
+def test_release_expired_holds_without_redis(db_session, booking_factory):
+    booking = booking_factory()
+    service = BookingService(db_session)
+    _expire(db_session, service.hold_seat(booking.id, _flight_data("704"), "5D"))
+
+    assert service.release_expired_holds() == 1
+    db_session.refresh(booking)
+    assert booking.status == BookingStatus.PENDING
+    assert db_session.query(FlightSeat).filter_by(seat_number="5D").one().status == SeatStatus.AVAILABLE
+
+@pytest.fixture
+def user_with_bookings(db_session, user_factory):
+    user = user_factory()
+    base = datetime(2024, 1, 1, 12, 0)
+    bookings = []
+    for i in range(25):
+        # Every third pair shares a timestamp so the id tiebreak is exercised
+        created_at = base + timedelta(minutes=i - (i % 3 == 1))
+        status = BookingStatus.CONFIRMED if i % 2 else BookingStatus.PENDING
+        bookings.append(Booking(
+            reference_code=f"PG-{uuid.uuid4().hex[:8].upper()}",
+            user_id=user.id,
+            booking_type=BookingType.FLIGHT,
+            status=status,
+            created_at=created_at
+        ))
+    db_session.add_all(bookings)
+    db_session.commit()
+    return user, bookings
+
+def test_get_user_bookings_pages_by_keyset(db_session, user_with_bookings):
+    user, bookings = user_with_bookings
+    service = BookingService(db_session)
+
+    seen, cursor = [], None
+    while True:
+        page = service.get_user_bookings(user.id, limit=10, cursor=cursor)
+        seen.extend(page.items)
+        if not page.has_more:
+            break
+        cursor = page.next_cursor
+
+    expected = sorted(bookings, key=lambda b: (b.created_at, b.id), reverse=True)
+    assert [b.id for b in seen] == [b.id for b in expected]
+
+def test_get_user_bookings_filters(db_session, user_with_bookings):
+    user, _ = user_with_bookings
+    service = BookingService(db_session)
+
+    page = service.get_user_bookings(user.id, limit=100, status="confirmed", booking_type="flight")
+    assert len(page.items) == 12
+    assert page.next_cursor is None
+    assert all(b.status == BookingStatus.CONFIRMED for b in page.items)
+
+    with pytest.raises(InvalidBookingStatus):
+        service.get_user_bookings(user.id, status="bogus")
+    with pytest.raises(InvalidBookingQuery):
+        service.get_user_bookings(user.id, booking_type="bogus")
+    with pytest.raises(InvalidBookingQuery):
+        service.get_user_bookings(user.id, cursor="not-a-cursor")
+
+def test_stream_user_bookings(db_session, user_with_bookings):
+    user, bookings = user_with_bookings
+    streamed = list(BookingService(db_session).stream_user_bookings(user.id, batch_size=7))
+    assert len(streamed) == 25
+    assert len({b.id for b in streamed}) == 25
+
+def test_user_bookings_query_uses_composite_index(db_session, user_with_bookings):
+    if db_session.get_bind().dialect.name != "sqlite":
+        pytest.skip("Plan inspection is SQLite specific")
+    plan = db_session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM bookings WHERE user_id = :u "
+        "ORDER BY created_at DESC, id DESC LIMIT 21"
+    ), {"u": user_with_bookings[0].id}).all()
+    details = " ".join(str(row[-1]) for row in plan)
+    assert "ix_bookings_user_created" in details
+    assert "TEMP B-TREE" not in details
+
+def _full_booking(db_session, booking):
+    booking.passengers = [Passenger(first_name=f"P{i}", last_name="Traveler") for i in range(3)]
+    booking.flight_bookings = [FlightBooking(pnr_reference=f"PNR{i}", segments=[
+        Flight(carrier_code="TH", flight_number=f"{i}{n}", departure_airport_code="NBO", arrival_airport_code="DXB",
+               departure_time=datetime(2024, 7, 1 + n, 8), arrival_time=datetime(2024, 7, 1 + n, 14))
+        for n in range(2)
+    ]) for i in range(2)]
+    booking.package_booking = PackageBooking(
+        start_date=date(2024, 7, 1), end_date=date(2024, 7, 5),
+        custom_itinerary=CustomItinerary(items=[CustomItineraryItem(day_number=d, title=f"Day {d}") for d in range(1, 4)])
+    )
+    booking.payments = [Payment(user_id=booking.user_id, amount=100.0, payment_method=PaymentMethod.CREDIT_CARD) for _ in range(2)]
+    booking.invoices = [Invoice(user_id=booking.user_id, invoice_number=f"INV-{uuid.uuid4().hex[:10]}",
+                                issued_date=date(2024, 6, 1), due_date=date(2024, 6, 15), total_amount=200.0)]
+    db_session.commit()
+    return booking
+
+def _walk(booking):
+    return (
+        [p.first_name for p in booking.passengers],
+        [[s.flight_number for s in fb.segments] for fb in booking.flight_bookings],
+        [i.title for i in booking.package_booking.custom_itinerary.items],
+        [p.amount for p in booking.payments],
+        [i.invoice_number for i in booking.invoices]
+    )
+
+def test_get_booking_detail_query_count(db_session, booking_factory, count_queries):
+    booking_id = _full_booking(db_session, booking_factory()).id
+    db_session.expire_all()
+    count_queries.clear()
+
+    booking = BookingService(db_session).get_booking_detail(booking_id)
+    passengers, segments, items, payments, invoices = _walk(booking)
+
+    assert len(count_queries) == 8
+    assert passengers == ["P0", "P1", "P2"]
+    assert segments == [["00", "01"], ["10", "11"]]
+    assert items == ["Day 1", "Day 2", "Day 3"]
+    assert len(payments) == 2 and len(invoices) == 1
+
+def test_get_booking_details_query_count_is_constant(db_session, booking_factory, count_queries):
+    booking_ids = [_full_booking(db_session, booking_factory()).id for _ in range(4)]
+    db_session.expire_all()
+    count_queries.clear()
+
+    bookings = BookingService(db_session).get_booking_details(list(reversed(booking_ids)) + ["missing-id"])
+    for booking in bookings:
+        _walk(booking)
+
+    assert [b.id for b in bookings] == list(reversed(booking_ids))
+    assert len(count_queries) == 8
+
+def test_get_booking_detail_not_found(db_session):
+    with pytest.raises(BookingNotFound):
+        BookingService(db_session).get_booking_detail("missing-id")
+
+def test_booking_references_are_short_unique_and_reversible():
+    generator = BookingReferenceGenerator(key=b"test-key")
+    codes = [generator.encode(value) for value in range(1, 20001)]
+
+    assert len(set(codes)) == len(codes)
+    assert all(re.fullmatch(r"THRIVE-[0-9A-HJKMNP-TV-Z]{8}", code) for code in codes[:100])
+    assert [generator.decode(code) for code in codes[:100]] == list(range(1, 101))
+    assert generator.decode(codes[5].lower()) == 6
+    # Neighbouring bookings don't reveal each other
+    assert sum(a[:10] == b[:10] for a, b in zip(codes, codes[1:])) < len(codes) // 100
+    assert BookingReferenceGenerator(key=b"other-key").encode(1) != codes[0]
+    with pytest.raises(ValueError):
+        generator.decode("THRIVE-ILLEGAL!")
+
+def test_create_booking_retries_reference_collisions(db_session, user_factory, booking_factory):
+    taken = booking_factory().reference_code
+
+    class Collides(BookingReferenceGenerator):
+        issued = [taken]
+        def next_code(self, bind):
+            return self.issued.pop(0) if self.issued else super().next_code(bind)
+
+    booking = CreateBooking(db_session, Collides(key=b"test-key")).execute(user_factory().id, "flight")
+    assert booking.reference_code != taken
+
+def test_booking_reference_generation_reserves_blocks(db_session):
+    allocator = SequenceAllocator(block_size=100)
+    generator = BookingReferenceGenerator(key=b"test-key", allocator=allocator)
+    codes = {generator.next_code(db_session) for _ in range(250)}
+    assert len(codes) == 250
+    assert allocator.stats["reservations"] == 3
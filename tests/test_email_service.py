@@ -2,6 +2,27 @@ import pytest
 from unittest.mock import patch, MagicMock
 from app.repository.email.services import EmailService
 from flask import Flask
+from app.repository.email.smtp_pool import SMTPConnectionPool, SMTPSettings, smtp_pool, is_disconnect
+from app.repository.email.async_smtp_pool import AsyncSMTPPool, async_smtp_pool, translate_error
+from app.repository.email.tasks import build_message, send_async_email, send_bulk_email_batch, send_transactional_email
+from app.repository.email.exceptions import TemplateNotFound
+from app.repository.email.ops import SendEmailTemplate
+from app.repository.email.template_cache import NotificationTemplateCache, notification_template_cache
+from app.models import NotificationTemplate, EmailDelivery
+from app.repository.email.dedup import EmailDeduplicator, delivery_key
+from app.utils.rate_limit import TokenBucket
+from app.utils.jinja_cache import init_bytecode_cache, precompile_templates
+import json
+import os
+import smtplib
+import socket
+import time
+import uuid
+
+try:
+    import aiosmtplib
+except ImportError:
+    aiosmtplib = None
 
 @pytest.fixture
 def email_service(db_session):
@@ -22,7 +43,7 @@ def test_send_email_async(mock_delay, email_service):
     result = email_service.send_email(to, subject, body)
     
     assert result is True
-    mock_delay.assert_called_once_with(to, subject, body, None)
+    mock_delay.assert_called_once_with(to, subject, body, None, None)
 
 @patch('app.repository.email.ops.render.render_template')
 def test_render_template(mock_render, email_service, app):
@@ -50,3 +71,465 @@ def test_send_template_legacy_wrapper(mock_render, email_service, app):
         
     assert result == "<html>Body</html>"
     mock_render.assert_called_once()
+
+@pytest.fixture
+def smtp_standin():
+    pytest.importorskip("aiosmtpd")
+    from benchmarks.smtp_standin import SMTPStandIn
+    with SMTPStandIn() as standin:
+        yield standin
+
+def _settings(standin):
+    return SMTPSettings(host=standin.host, port=standin.port, username="user", password="secret", use_tls=False)
+
+def _message(to="inbox@example.com"):
+    return build_message("noreply@example.com", to, "Hello", "<p>Hi</p>")
+
+def test_smtp_pool_reuses_session(smtp_standin):
+    pool = SMTPConnectionPool()
+    for _ in range(5):
+        pool.send_message(_settings(smtp_standin), _message())
+    pool.close_all()
+
+    assert len(smtp_standin.messages) == 5
+    assert smtp_standin.connections == 1
+    assert pool.stats["reused"] == 4
+
+def test_smtp_pool_recycles_after_max_messages(smtp_standin):
+    pool = SMTPConnectionPool(max_messages=2)
+    for _ in range(5):
+        pool.send_message(_settings(smtp_standin), _message())
+    pool.close_all()
+
+    assert len(smtp_standin.messages) == 5
+    assert smtp_standin.connections == 3
+
+def test_smtp_pool_replaces_session_failing_health_check(smtp_standin):
+    pool = SMTPConnectionPool(health_check_interval=0)
+    settings = _settings(smtp_standin)
+    pool.send_message(settings, _message())
+    pool._idle[settings][0].smtp.sock.shutdown(socket.SHUT_RDWR)
+
+    pool.send_message(settings, _message())
+    pool.close_all()
+
+    assert pool.stats["health_check_failures"] == 1
+    assert len(smtp_standin.messages) == 2
+
+def test_smtp_pool_reconnects_dropped_session(smtp_standin):
+    pool = SMTPConnectionPool(health_check_interval=3600)
+    settings = _settings(smtp_standin)
+    pool.send_message(settings, _message())
+    pool._idle[settings][0].smtp.sock.shutdown(socket.SHUT_RDWR)
+
+    pool.send_message(settings, _message())
+    pool.close_all()
+
+    assert pool.stats["reconnects"] == 1
+    assert len(smtp_standin.messages) == 2
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_smtp_pool_is_fork_safe(smtp_standin):
+    pool = SMTPConnectionPool()
+    settings = _settings(smtp_standin)
+    pool.send_message(settings, _message())
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            pool.send_message(settings, _message("child@example.com"))
+            code = 0 if pool.stats["created"] == 2 else 2
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+    # The child built its own session and left the parent's untouched
+    pool.send_message(settings, _message())
+    pool.close_all()
+    assert pool.stats["reused"] == 1
+    assert smtp_standin.connections == 2
+    assert len(smtp_standin.messages) == 3
+
+@pytest.fixture
+def mail_config(app):
+    def apply(standin):
+        overrides = {"MAIL_SERVER": standin.host, "MAIL_PORT": standin.port, "MAIL_USERNAME": "user",
+                     "MAIL_PASSWORD": "secret", "MAIL_USE_TLS": False}
+        previous.update({key: app.config.get(key) for key in overrides})
+        app.config.update(overrides)
+    previous = {}
+    yield apply
+    app.config.update(previous)
+    smtp_pool.close_all()
+
+def test_send_async_email_uses_pool(mail_config, smtp_standin):
+    mail_config(smtp_standin)
+    for i in range(3):
+        result = send_async_email.apply(args=(f"user{i}@example.com", "Hi", "<p>Hi</p>", "noreply@example.com"))
+        assert result.get() == f"Sent to user{i}@example.com"
+
+    assert smtp_standin.recipients == [f"user{i}@example.com" for i in range(3)]
+    assert smtp_standin.connections == 1
+
+@patch('app.repository.email.ops.send_bulk.send_bulk_email_batch.delay')
+def test_send_bulk_email_chunks_recipients(mock_delay, email_service, app):
+    mock_delay.side_effect = lambda *args: MagicMock(id=f"task-{mock_delay.call_count}")
+    recipients = [f"user{i}@example.com" for i in range(7)] + ["user0@example.com", " "]
+
+    with app.app_context():
+        task_ids = email_service.send_bulk_email(recipients, "News", "<p>News</p>", batch_size=3)
+
+    assert task_ids == ["task-1", "task-2", "task-3"]
+    batches = [call.args[0] for call in mock_delay.call_args_list]
+    assert batches == [recipients[0:3], recipients[3:6], recipients[6:7]]
+
+def test_bulk_batch_uses_one_session_and_tracks_recipients(mail_config):
+    pytest.importorskip("aiosmtpd")
+    from benchmarks.smtp_standin import SMTPStandIn
+    good = [f"user{i}@example.com" for i in range(8)]
+    with SMTPStandIn(refuse={"gone@example.com"}, defer={"busy@example.com"}) as standin:
+        mail_config(standin)
+        with patch.object(send_bulk_email_batch, 'apply_async') as mock_retry:
+            mock_retry.return_value = MagicMock(id="retry-1")
+            report = send_bulk_email_batch.apply(
+                args=(good + ["gone@example.com", "busy@example.com"], "News", "<p>News</p>")
+            ).get()
+
+        assert standin.connections == 1
+        assert standin.recipients == good
+
+    assert report["sent"] == good
+    assert list(report["rejected"]) == ["gone@example.com"]
+    assert report["rejected"]["gone@example.com"].startswith("550")
+    assert list(report["deferred"]) == ["busy@example.com"]
+    assert report["retry_task_id"] == "retry-1"
+
+    # Only the temporarily failed address is retried
+    args, kwargs = mock_retry.call_args.kwargs["args"], mock_retry.call_args.kwargs["kwargs"]
+    assert args[0] == ["busy@example.com"]
+    assert kwargs == {"attempt": 2}
+
+def test_bulk_batch_stops_retrying_after_max_attempts(mail_config, app):
+    pytest.importorskip("aiosmtpd")
+    from benchmarks.smtp_standin import SMTPStandIn
+    with SMTPStandIn(defer={"busy@example.com"}) as standin:
+        mail_config(standin)
+        with patch.object(send_bulk_email_batch, 'apply_async') as mock_retry:
+            report = send_bulk_email_batch.apply(
+                args=(["busy@example.com"], "News", "<p>News</p>"),
+                kwargs={"attempt": app.config["MAIL_BULK_MAX_ATTEMPTS"]}
+            ).get()
+
+    mock_retry.assert_not_called()
+    assert report["retry_task_id"] is None
+    assert list(report["deferred"]) == ["busy@example.com"]
+
+@pytest.fixture
+def template_cache():
+    cache = NotificationTemplateCache()
+    yield cache
+
+@pytest.fixture
+def booking_template(db_session):
+    template = NotificationTemplate(
+        trigger_event=f"booking_confirmed_{uuid.uuid4().hex[:6]}",
+        name="Booking confirmed",
+        subject_template="Booking {{ reference }} confirmed",
+        body_html_template="<p>Hi {{ name }}, booking {{ reference }} is confirmed.</p>"
+    )
+    db_session.add(template)
+    db_session.commit()
+    yield template
+    db_session.delete(template)
+    db_session.commit()
+
+@patch('app.repository.email.ops.send.send_async_email.delay')
+def test_event_email_renders_without_queries_or_recompiling(mock_delay, db_session, booking_template, template_cache, count_queries):
+    op = SendEmailTemplate(db_session, cache=template_cache)
+    op.execute("a@example.com", booking_template.trigger_event, {"name": "Ann", "reference": "TH-1"})
+
+    count_queries.clear()
+    for i in range(20):
+        op.execute(f"u{i}@example.com", booking_template.trigger_event, {"name": f"U{i}", "reference": f"TH-{i}"})
+
+    assert count_queries == []
+    assert template_cache.stats["compiles"] == 1
+    assert template_cache.stats["hits"] == 20
+    to, subject, body, _, _ = mock_delay.call_args.args
+    assert (to, subject) == ("u19@example.com", "Booking TH-19 confirmed")
+    assert body == "<p>Hi U19, booking TH-19 is confirmed.</p>"
+
+@patch('app.repository.email.ops.send.send_async_email.delay')
+def test_template_edit_invalidates_cache(mock_delay, db_session, booking_template):
+    notification_template_cache.clear()
+    op = SendEmailTemplate(db_session)
+    op.execute("a@example.com", booking_template.trigger_event, {"reference": "TH-1"})
+
+    booking_template.subject_template = "Your booking {{ reference }} is on"
+    db_session.commit()
+
+    op.execute("a@example.com", booking_template.trigger_event, {"reference": "TH-2"})
+    assert mock_delay.call_args.args[1] == "Your booking TH-2 is on"
+
+def test_template_edit_is_broadcast_on_commit(app, db_session, booking_template):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = app.extensions['redis'] = fakeredis.FakeRedis()
+    try:
+        booking_template.subject_template = "Flushed {{ reference }}"
+        db_session.flush()
+        # Other workers must not reload the template before the edit is visible to them
+        assert client.get(NotificationTemplateCache.VERSION_KEY) is None
+        db_session.commit()
+        assert int(client.get(NotificationTemplateCache.VERSION_KEY)) == 1
+
+        booking_template.subject_template = "Rolled back {{ reference }}"
+        db_session.flush()
+        db_session.rollback()
+        assert int(client.get(NotificationTemplateCache.VERSION_KEY)) == 1
+    finally:
+        app.extensions.pop('redis', None)
+
+def test_template_cache_warm_up(db_session, booking_template, template_cache):
+    assert template_cache.warm_up(db_session) >= 1
+    compiles = template_cache.stats["compiles"]
+
+    assert template_cache.get(db_session, booking_template.trigger_event).template_id == booking_template.id
+    assert template_cache.stats["lookups"] == 0
+    assert template_cache.stats["compiles"] == compiles
+
+def test_template_edit_in_other_worker_is_seen_through_redis(app, db_session, booking_template):
+    fakeredis = pytest.importorskip("fakeredis")
+    app.extensions['redis'] = fakeredis.FakeRedis()
+    try:
+        worker = NotificationTemplateCache(version_check_interval=0)
+        worker.get(db_session, booking_template.trigger_event)
+        assert worker.get(db_session, booking_template.trigger_event) is not None
+        assert worker.stats["lookups"] == 1
+
+        # Another process edits the template and bumps the shared version
+        NotificationTemplateCache().invalidate()
+        worker.get(db_session, booking_template.trigger_event)
+        assert worker.stats["lookups"] == 2
+    finally:
+        app.extensions.pop('redis', None)
+
+@patch('app.repository.email.ops.send_transactional.send_transactional_email.delay')
+def test_transactional_email_queues_ids_only(mock_delay, email_service, user_factory, app):
+    user = user_factory()
+    assert email_service.send_transactional_email("verify_email", user, {"token": "tok-123"})
+
+    args = mock_delay.call_args.args
+    assert args == ("verify_email", user.id, {"token": "tok-123"})
+
+    with app.test_request_context():
+        rendered = email_service.render_template("verify_email.html", {
+            "user": user, "token": "tok-123", "verification_url": "http://localhost:3000/verify-email", "year": 2026
+        })
+    assert len(json.dumps(args)) * 10 < len(rendered)
+
+@patch('app.repository.email.ops.send.send_async_email.delay')
+def test_transactional_email_renders_inline_when_disabled(mock_delay, email_service, user_factory, app):
+    user = user_factory()
+    app.config["MAIL_RENDER_IN_WORKER"] = False
+    try:
+        assert email_service.send_transactional_email("password_reset", user, {"token": "tok-456"})
+    finally:
+        app.config["MAIL_RENDER_IN_WORKER"] = True
+
+    to_email, subject, body_html, _, _ = mock_delay.call_args.args
+    assert to_email == user.email
+    assert subject == "Reset Your Password - Thrive Travels"
+    assert "reset-password?token=tok-456" in body_html
+
+def test_transactional_email_unknown_name(email_service, user_factory):
+    with pytest.raises(TemplateNotFound):
+        email_service.send_transactional_email("no_such_email", user_factory())
+
+def test_transactional_email_task_renders_and_sends(mail_config, smtp_standin, user_factory):
+    mail_config(smtp_standin)
+    user = user_factory()
+
+    result = send_transactional_email.apply(args=("welcome", user.id))
+    assert result.get() == f"Sent to {user.email}"
+    assert smtp_standin.recipients == [user.email]
+
+    assert send_transactional_email.apply(args=("welcome", "missing-user-id")).get() == "User not found"
+    assert smtp_standin.recipients == [user.email]
+
+def test_email_tasks_are_routed_by_message_class(app):
+    from celery import Celery
+    celery_app = Celery(set_as_current=False)
+    celery_app.config_from_object(app.config)
+
+    def route(task):
+        return celery_app.amqp.router.route({}, f"app.repository.email.tasks.{task}")["queue"].name
+
+    assert route("send_async_email") == app.config["MAIL_TRANSACTIONAL_QUEUE"]
+    assert route("send_transactional_email") == app.config["MAIL_TRANSACTIONAL_QUEUE"]
+    assert route("send_bulk_email_batch") == app.config["MAIL_BULK_QUEUE"]
+
+@pytest.fixture
+def shared_redis(app):
+    fakeredis = pytest.importorskip("fakeredis")
+    app.extensions['redis'] = fakeredis.FakeRedis()
+    yield app.extensions['redis']
+    app.extensions.pop('redis', None)
+
+def test_token_bucket_is_shared_across_workers(shared_redis):
+    name = f"test-{uuid.uuid4().hex[:6]}"
+    worker_a, worker_b = TokenBucket(name, rate=10, capacity=4), TokenBucket(name, rate=10, capacity=4)
+
+    assert [worker_a.take(), worker_b.take(), worker_a.take(), worker_b.take()] == [0, 0, 0, 0]
+    assert worker_a.take() == pytest.approx(0.1, abs=0.02)
+
+    # Forced takes never wait but leave the debt for paced traffic
+    assert worker_b.take(force=True) == 0
+    assert worker_a.take() == pytest.approx(0.2, abs=0.02)
+
+def test_token_bucket_without_redis(app):
+    bucket = TokenBucket(f"test-{uuid.uuid4().hex[:6]}", rate=10, capacity=2)
+    assert bucket.take() == 0 and bucket.take() == 0
+    assert bucket.take() > 0
+    assert TokenBucket(bucket.name, rate=0).take() == 0
+
+def test_bulk_batches_are_paced_but_transactional_mail_is_not(mail_config, smtp_standin, shared_redis, app):
+    mail_config(smtp_standin)
+    previous = {key: app.config[key] for key in ("MAIL_RATE_LIMIT", "MAIL_RATE_BURST")}
+    app.config.update(MAIL_RATE_LIMIT=20, MAIL_RATE_BURST=1)
+    try:
+        started = time.monotonic()
+        report = send_bulk_email_batch.apply(args=([f"bulk{i}@example.com" for i in range(6)], "News", "<p>News</p>")).get()
+        assert len(report["sent"]) == 6
+        # One token up front, then one every 50ms
+        assert time.monotonic() - started >= 0.2
+
+        started = time.monotonic()
+        assert send_async_email.apply(args=("reset@example.com", "Reset", "<p>Reset</p>")).get() == "Sent to reset@example.com"
+        assert time.monotonic() - started < 0.1
+    finally:
+        app.config.update(previous)
+
+def test_async_pool_sends_concurrently_over_capped_sessions():
+    pytest.importorskip("aiosmtplib")
+    pytest.importorskip("aiosmtpd")
+    from benchmarks.smtp_standin import SMTPStandIn
+    with SMTPStandIn(data_delay=0.1) as standin:
+        pool = AsyncSMTPPool(max_size=4)
+        started = time.monotonic()
+        results = pool.send_many(_settings(standin), [_message(f"user{i}@example.com") for i in range(8)])
+        elapsed = time.monotonic() - started
+        pool.close_all()
+
+    assert results == [{}] * 8
+    assert len(standin.messages) == 8
+    assert standin.connections == 4
+    # Two rounds of four concurrent sends, not eight sequential ones
+    assert elapsed < 0.6
+
+def test_async_pool_matches_smtplib_errors(smtp_standin):
+    pytest.importorskip("aiosmtplib")
+    pool = AsyncSMTPPool()
+    settings = _settings(smtp_standin)
+    smtp_standin.refuse.add("gone@example.com")
+    try:
+        with pytest.raises(smtplib.SMTPRecipientsRefused) as refused:
+            pool.send_message(settings, _message("gone@example.com"))
+        assert refused.value.recipients["gone@example.com"][0] == 550
+        assert is_disconnect(translate_error(aiosmtplib.SMTPServerDisconnected("gone")))
+
+        pool.send_message(settings, _message())
+        # The server drops the idle session; the next send must not fail because of it
+        pool._loop.call_soon_threadsafe(pool._idle[settings][0].smtp.transport.abort)
+        pool.send_message(settings, _message())
+    finally:
+        pool.close_all()
+
+    assert pool.stats["created"] == 3
+    assert smtp_standin.recipients == ["inbox@example.com", "inbox@example.com"]
+
+def test_send_async_email_in_async_mode(mail_config, smtp_standin, app):
+    pytest.importorskip("aiosmtplib")
+    mail_config(smtp_standin)
+    app.config["MAIL_SENDER_MODE"] = "async"
+    try:
+        for i in range(3):
+            result = send_async_email.apply(args=(f"user{i}@example.com", "Hi", "<p>Sent in async mode</p>", "noreply@example.com"))
+            assert result.get() == f"Sent to user{i}@example.com"
+    finally:
+        app.config["MAIL_SENDER_MODE"] = "sync"
+        async_smtp_pool.close_all()
+
+    assert smtp_standin.recipients == [f"user{i}@example.com" for i in range(3)]
+    assert smtp_standin.connections == 1
+
+def test_duplicate_sends_are_skipped(mail_config, smtp_standin):
+    mail_config(smtp_standin)
+    body = f"<p>{uuid.uuid4()}</p>"
+    assert send_async_email.apply(args=("dup@example.com", "Hi", body)).get() == "Sent to dup@example.com"
+    assert send_async_email.apply(args=("dup@example.com", "Hi", body)).get() == "Duplicate"
+
+    key = uuid.uuid4().hex
+    assert send_async_email.apply(args=("dup@example.com", "Hi", "<p>a</p>"), kwargs={"dedup_key": key}).get() != "Duplicate"
+    assert send_async_email.apply(args=("dup@example.com", "Hi", "<p>b</p>"), kwargs={"dedup_key": key}).get() == "Duplicate"
+
+    assert smtp_standin.recipients == ["dup@example.com", "dup@example.com"]
+
+def test_deduplicator_database_states(db_session):
+    dedup = EmailDeduplicator(db_session, ttl=3600, pending_ttl=600)
+    key = delivery_key("test", uuid.uuid4())
+
+    assert dedup.claim(key)
+    assert not dedup.claim(key)
+    # A failed send gives the key back for the retry
+    dedup.release(key)
+    assert dedup.claim(key)
+    dedup.mark_sent(key)
+    assert not dedup.claim(key)
+    dedup.release(key)
+    assert not dedup.claim(key)
+
+    # A claim abandoned by a crashed worker lapses
+    stale = delivery_key("test", uuid.uuid4())
+    assert EmailDeduplicator(db_session, pending_ttl=-1).claim(stale)
+    assert dedup.claim(stale)
+
+def test_deduplicator_purges_expired_records(db_session):
+    key = delivery_key("test", uuid.uuid4())
+    EmailDeduplicator(db_session, pending_ttl=-1).claim(key)
+    assert EmailDeduplicator(db_session).purge_expired() >= 1
+    assert db_session.query(EmailDelivery).filter_by(dedup_key=key).count() == 0
+
+def test_transactional_email_dedup_through_redis(mail_config, smtp_standin, shared_redis, user_factory):
+    mail_config(smtp_standin)
+    user = user_factory()
+
+    assert send_transactional_email.apply(args=("verify_email", user.id, {"token": "t1"})).get() == f"Sent to {user.email}"
+    assert send_transactional_email.apply(args=("verify_email", user.id, {"token": "t1"})).get() == "Duplicate"
+    # A new token is a new email
+    assert send_transactional_email.apply(args=("verify_email", user.id, {"token": "t2"})).get() == f"Sent to {user.email}"
+
+    assert smtp_standin.recipients == [user.email, user.email]
+    assert len(shared_redis.keys(f"{EmailDeduplicator.KEY_PREFIX}*")) == 2
+
+def _app_with_bytecode_cache(app, directory):
+    fresh = Flask("app", root_path=app.root_path)
+    fresh.config.update(JINJA_BYTECODE_CACHE_DIR=str(directory))
+    init_bytecode_cache(fresh)
+    return fresh
+
+def test_email_templates_precompile_into_shared_bytecode_cache(app, tmp_path):
+    first = _app_with_bytecode_cache(app, tmp_path)
+    assert precompile_templates(first) == 3
+    assert len(list(tmp_path.iterdir())) == 3
+
+    # Another process loads the bytecode instead of compiling
+    second = _app_with_bytecode_cache(app, tmp_path)
+    with patch.object(second.jinja_env, "compile", side_effect=AssertionError("compiled")):
+        assert precompile_templates(second) == 3
+        with second.test_request_context():
+            body = second.jinja_env.get_template("email/welcome_email.html").render(
+                user={"first_name": "Ann"}, year=2026, dashboard_url="http://x"
+            )
+    assert "Ann" in body
@@ -1,9 +1,21 @@
 import pytest
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from concurrent.futures import ThreadPoolExecutor
+from app.extensions import db
 from app.repository.finance.services import FinanceService
-from app.models import ServiceFeeRule
-from app.models.enums import PaymentStatus, InvoiceStatus, FeeType, BookingStatus
-from app.repository.finance.exceptions import InvalidAmount
-from datetime import datetime
+from app.models import ServiceFeeRule, SubscriptionPlan, NumberSequence, Payment, Booking, User, PaymentIdempotencyKey, BookingBalance, BookingLedgerEntry
+from app.utils.sequences import SequenceAllocator
+from app.repository.finance.fee_waivers import fee_waiver_evaluator
+from app.repository.finance.idempotency import PaymentIdempotency
+from app.manage.commands import rebuild_booking_balances
+from app.models.enums import PaymentStatus, InvoiceStatus, FeeType, BookingStatus, SubscriptionTier, BookingType
+from app.repository.finance.exceptions import InvalidAmount, IdempotencyKeyReused
+from datetime import datetime, timedelta, timezone
+import re
+import uuid
 
 def test_process_payment(db_session, booking_factory):
     service = FinanceService(db_session)
@@ -78,3 +90,324 @@ def test_process_refund(db_session, booking_factory):
     assert refund.id is not None
     assert refund.status == PaymentStatus.REFUNDED
     assert refund.amount == 50.0
+
+@pytest.fixture
+def group_fee_rules(db_session):
+    db_session.query(ServiceFeeRule).filter_by(fee_type=FeeType.GROUP_BOOKING).delete()
+    rules = [
+        ServiceFeeRule(name="Group handling", fee_type=FeeType.GROUP_BOOKING, amount_fixed=20.0, priority=0),
+        ServiceFeeRule(name="Large group surcharge", fee_type=FeeType.GROUP_BOOKING, amount_percent=2.5,
+                       min_order_amount=1000.0, priority=10),
+        ServiceFeeRule(name="Retired fee", fee_type=FeeType.GROUP_BOOKING, amount_fixed=99.0, is_active=False),
+    ]
+    db_session.add_all(rules)
+    db_session.commit()
+    yield rules
+    db_session.query(ServiceFeeRule).filter_by(fee_type=FeeType.GROUP_BOOKING).delete()
+    db_session.commit()
+
+def test_calculate_fees_honors_thresholds_and_priority(db_session, group_fee_rules):
+    service = FinanceService(db_session)
+
+    assert [(f['description'], f['amount']) for f in service.calculate_fees("group_booking", 999.99)] == [
+        ("Group handling", 20.0)
+    ]
+    assert [(f['description'], f['amount']) for f in service.calculate_fees("group_booking", 2000.0)] == [
+        ("Large group surcharge", 50.0), ("Group handling", 20.0)
+    ]
+    assert service.calculate_fees("not_a_fee_type", 100.0) == []
+
+def test_fee_quotes_run_no_queries_until_rules_change(db_session, group_fee_rules, count_queries):
+    service = FinanceService(db_session)
+    service.calculate_fees("group_booking", 100.0)
+
+    count_queries.clear()
+    for amount in range(100):
+        service.calculate_fees("group_booking", float(amount))
+    service.calculate_fee_totals("group_booking", [10.0, 20.0])
+    assert count_queries == []
+
+    group_fee_rules[0].amount_fixed = 25.0
+    db_session.commit()
+    assert service.calculate_fees("group_booking", 100.0)[0]['amount'] == 25.0
+
+    db_session.query(ServiceFeeRule).filter_by(fee_type=FeeType.GROUP_BOOKING).update({"is_active": False})
+    db_session.commit()
+    assert service.calculate_fees("group_booking", 100.0) == []
+
+def test_fee_rules_reloaded_after_rollback(db_session, group_fee_rules):
+    service = FinanceService(db_session)
+    group_fee_rules[0].amount_fixed = 25.0
+    db_session.flush()
+    # Quoting inside the transaction caches the uncommitted rule
+    assert service.calculate_fees("group_booking", 100.0)[0]['amount'] == 25.0
+
+    db_session.rollback()
+    assert service.calculate_fees("group_booking", 100.0)[0]['amount'] == 20.0
+
+def test_batch_fee_totals_match_single_quotes(db_session, group_fee_rules):
+    service = FinanceService(db_session)
+    amounts = np.random.default_rng(7).uniform(0, 5000, size=5000).round(2)
+
+    totals = service.calculate_fee_totals("group_booking", amounts)
+
+    assert totals.shape == amounts.shape
+    for amount, total in zip(amounts[:200], totals[:200]):
+        assert total == pytest.approx(sum(f['amount'] for f in service.calculate_fees("group_booking", amount)))
+    assert np.all(totals[amounts < 1000] == 20.0)
+    assert not service.calculate_fee_totals("not_a_fee_type", amounts).any()
+
+@pytest.fixture
+def gold_plan(db_session):
+    plan = db_session.query(SubscriptionPlan).filter_by(tier=SubscriptionTier.GOLD).first()
+    if plan is None:
+        plan = SubscriptionPlan(name="Gold", tier=SubscriptionTier.GOLD, price_monthly=49.0)
+        db_session.add(plan)
+    previous = plan.fee_waiver_rules
+    plan.fee_waiver_rules = [
+        {"fee_types": ["group_booking"], "waive_percent": 100, "max_order_amount": 1500},
+        {"waive_percent": 50, "max_waiver_amount": 30},
+        {"waive_percent": "lots"}
+    ]
+    db_session.commit()
+    yield plan
+    plan.fee_waiver_rules = previous
+    db_session.commit()
+
+@pytest.fixture
+def gold_member(user_factory, db_session):
+    user = user_factory()
+    user.subscription_tier = SubscriptionTier.GOLD
+    user.subscription_end = datetime.now(timezone.utc) + timedelta(days=30)
+    db_session.commit()
+    return user
+
+def test_subscription_waivers_apply_to_quotes(db_session, group_fee_rules, gold_plan, gold_member, user_factory):
+    service = FinanceService(db_session)
+
+    # First matching rule: everything waived up to 1500
+    fees = service.calculate_fees("group_booking", 1200.0, user=gold_member)
+    assert [(f['amount'], f['waived_amount']) for f in fees] == [(0.0, 30.0), (0.0, 20.0)]
+
+    # Above 1500 the 50% rule applies, capped at 30 per fee
+    fees = service.calculate_fees("group_booking", 4000.0, user=gold_member)
+    assert [(f['amount'], f['waived_amount']) for f in fees] == [(70.0, 30.0), (10.0, 10.0)]
+
+    assert [f['amount'] for f in service.calculate_fees("group_booking", 4000.0, user=user_factory())] == [100.0, 20.0]
+    gold_member.subscription_end = datetime.now(timezone.utc) - timedelta(days=1)
+    assert [f['amount'] for f in service.calculate_fees("group_booking", 4000.0, user=gold_member)] == [100.0, 20.0]
+
+def test_subscription_waivers_are_compiled_once(db_session, group_fee_rules, gold_plan, gold_member, count_queries):
+    service = FinanceService(db_session)
+    service.calculate_fees("group_booking", 100.0, user=gold_member)
+    compiles = fee_waiver_evaluator.stats["compiles"]
+
+    count_queries.clear()
+    for amount in range(50):
+        service.calculate_fees("group_booking", float(amount), user=gold_member)
+    totals = service.calculate_fee_totals("group_booking", np.array([1200.0, 4000.0]), user=gold_member)
+
+    assert count_queries == []
+    assert fee_waiver_evaluator.stats["compiles"] == compiles
+    assert totals.tolist() == [0.0, 80.0]
+
+    gold_plan.fee_waiver_rules = []
+    db_session.commit()
+    assert service.calculate_fees("group_booking", 1200.0, user=gold_member)[0]['amount'] == 30.0
+
+def test_subscription_waivers_follow_bulk_updates_and_rollbacks(db_session, group_fee_rules, gold_plan, gold_member):
+    service = FinanceService(db_session)
+    assert service.calculate_fees("group_booking", 1200.0, user=gold_member)[0]['amount'] == 0.0
+
+    db_session.query(SubscriptionPlan).filter_by(id=gold_plan.id).update({"fee_waiver_rules": []})
+    assert service.calculate_fees("group_booking", 1200.0, user=gold_member)[0]['amount'] == 30.0
+
+    db_session.rollback()
+    assert service.calculate_fees("group_booking", 1200.0, user=gold_member)[0]['amount'] == 0.0
+
+def test_document_numbers_are_sequential(db_session, booking_factory):
+    service = FinanceService(db_session)
+    booking = booking_factory()
+
+    first = service.generate_invoice(booking.id, 100.0).invoice_number
+    second = service.generate_invoice(booking.id, 100.0).invoice_number
+    payment = service.process_payment(booking.id, 50.0, "credit_card")
+    refund = service.process_refund(payment.id, 10.0)
+
+    assert re.fullmatch(r"INV-\d{9}", first)
+    assert int(second[4:]) == int(first[4:]) + 1
+    assert re.fullmatch(r"TXN-\d{9}", payment.transaction_id)
+    assert re.fullmatch(r"REF-\d{9}", refund.transaction_id)
+
+def test_sequence_blocks_are_disjoint_across_processes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sequences.db'}", connect_args={"timeout": 30})
+    NumberSequence.__table__.create(engine)
+    updates = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statement.startswith("UPDATE") and updates.append(statement))
+
+    # Two "processes", each issuing from four threads
+    allocators = [SequenceAllocator(block_size=50), SequenceAllocator(block_size=50)]
+    def issue(allocator):
+        return [allocator.next_value(engine, "TXN") for _ in range(250)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        batches = list(executor.map(issue, allocators * 4))
+
+    issued = [value for batch in batches for value in batch]
+    assert len(set(issued)) == len(issued) == 2000
+    assert all(batch == sorted(batch) for batch in batches)
+    reservations = sum(allocator.stats["reservations"] for allocator in allocators)
+    assert reservations == 40
+    # One round trip per block. The first reservation creates the row instead; an allocator that raced it
+    # to the insert pays one extra UPDATE before reserving from the created row.
+    assert len(updates) <= reservations + 1
+    engine.dispose()
+
+def test_forked_child_drops_inherited_blocks(db_session):
+    allocator = SequenceAllocator(block_size=10)
+    allocator.next_value(db_session, "TEST-FORK")
+    allocator._after_fork()
+    allocator.next_value(db_session, "TEST-FORK")
+    assert allocator.stats["reservations"] == 2
+
+def test_process_payment_replays_idempotency_key(db_session, booking_factory):
+    service = FinanceService(db_session)
+    booking = booking_factory()
+    key = f"pay-{uuid.uuid4().hex}"
+
+    first = service.process_payment(booking.id, 80.0, "credit_card", idempotency_key=key)
+    retry = service.process_payment(booking.id, 80.0, "credit_card", idempotency_key=key)
+
+    assert retry.id == first.id
+    assert db_session.query(Payment).filter_by(booking_id=booking.id).count() == 1
+    with pytest.raises(IdempotencyKeyReused):
+        service.process_payment(booking.id, 95.0, "credit_card", idempotency_key=key)
+
+@pytest.fixture(params=["redis", "database"])
+def idempotency_store(request, app):
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        app.extensions['redis'] = fakeredis.FakeRedis()
+    yield request.param
+    app.extensions.pop('redis', None)
+
+def test_concurrent_payments_with_one_key_charge_once(app, tmp_path, idempotency_store):
+    # A file database, so each thread gets its own connection and transaction; unpooled, since a payment
+    # holds its session's connection while the number sequence reserves a block on another
+    engine = create_engine(f"sqlite:///{tmp_path / 'payments.db'}", connect_args={"timeout": 30}, poolclass=NullPool)
+    db.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as setup:
+        user = User(email="payer@example.com", password_hash="x", first_name="Pay", last_name="Er")
+        setup.add(user)
+        setup.flush()
+        booking = Booking(reference_code="THRIVE-CONCUR01", user_id=user.id, booking_type=BookingType.FLIGHT,
+                          currency="USD", status=BookingStatus.PENDING)
+        setup.add(booking)
+        setup.commit()
+        booking_id = booking.id
+    payment_inserts = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statement.startswith("INSERT INTO payments ") and payment_inserts.append(1))
+
+    def pay(_):
+        with app.app_context(), Session() as session:
+            return FinanceService(session).process_payment(booking_id, 120.0, "credit_card",
+                                                           idempotency_key="checkout-42").id
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        payment_ids = list(executor.map(pay, range(32)))
+
+    assert len(set(payment_ids)) == 1
+    with Session() as check:
+        assert check.query(Payment).count() == 1
+        assert check.query(PaymentIdempotencyKey).one().payment_id == payment_ids[0]
+        assert check.get(Booking, booking_id).status == BookingStatus.CONFIRMED
+    if idempotency_store == "redis":
+        # Repeats waited for the stored result instead of attempting the payment
+        assert len(payment_inserts) == 1
+    engine.dispose()
+
+def test_idempotency_release_only_drops_own_claim(app, db_session):
+    fakeredis = pytest.importorskip("fakeredis")
+    app.extensions['redis'] = fakeredis.FakeRedis()
+    try:
+        first, second = PaymentIdempotency(db_session, lock_ttl=30), PaymentIdempotency(db_session, lock_ttl=30)
+        key = f"pay-{uuid.uuid4().hex}"
+        assert first.wait_for_turn(key) is None
+        # The first claim lapses and another request takes the key
+        app.extensions['redis'].delete(f"{PaymentIdempotency.KEY_PREFIX}{key}")
+        assert second.wait_for_turn(key) is None
+
+        first.release(key)
+        assert app.extensions['redis'].get(f"{PaymentIdempotency.KEY_PREFIX}{key}") is not None
+        second.release(key)
+        assert app.extensions['redis'].get(f"{PaymentIdempotency.KEY_PREFIX}{key}") is None
+    finally:
+        app.extensions.pop('redis', None)
+
+def test_booking_confirmed_once_balance_covers_total(db_session, booking_factory):
+    service = FinanceService(db_session)
+    booking = booking_factory(total_amount=300.0)
+
+    service.process_payment(booking.id, 100.0, "credit_card")
+    assert booking.status == BookingStatus.PENDING
+    assert service.get_booking_balance(booking.id)["amount_due"] == 200.0
+
+    service.process_payment(booking.id, 200.0, "credit_card")
+    balance = service.get_booking_balance(booking.id)
+    assert booking.status == BookingStatus.CONFIRMED
+    assert (balance["amount_paid"], balance["amount_due"]) == (300.0, 0.0)
+    assert db_session.query(BookingLedgerEntry).filter_by(booking_id=booking.id).count() == 2
+
+def test_refunds_are_limited_to_net_paid(db_session, booking_factory):
+    service = FinanceService(db_session)
+    booking = booking_factory(total_amount=100.0)
+    payment = service.process_payment(booking.id, 100.0, "credit_card")
+
+    service.process_refund(payment.id, 60.0)
+    with pytest.raises(InvalidAmount):
+        service.process_refund(payment.id, 60.0)
+
+    balance = service.get_booking_balance(booking.id)
+    assert (balance["amount_refunded"], balance["net_paid"]) == (60.0, 40.0)
+    assert db_session.query(Payment).filter_by(booking_id=booking.id, status=PaymentStatus.REFUNDED).count() == 1
+
+def test_refunds_are_limited_per_payment(db_session, booking_factory):
+    service = FinanceService(db_session)
+    booking = booking_factory(total_amount=200.0)
+    first = service.process_payment(booking.id, 100.0, "credit_card")
+    second = service.process_payment(booking.id, 100.0, "credit_card")
+
+    service.process_refund(first.id, 100.0)
+    # The booking still has 100 paid, but none of it went through the first payment's method
+    with pytest.raises(InvalidAmount):
+        service.process_refund(first.id, 100.0)
+    service.process_refund(second.id, 100.0)
+
+    assert service.get_booking_balance(booking.id)["amount_refunded"] == 200.0
+    sources = [entry.source_payment_id for entry in db_session.query(BookingLedgerEntry).filter_by(booking_id=booking.id)
+               .filter(BookingLedgerEntry.source_payment_id.isnot(None))]
+    assert sorted(sources) == sorted([first.id, second.id])
+
+def test_rebuild_booking_balances_backfills_and_repairs(app, db_session, booking_factory):
+    service = FinanceService(db_session)
+    posted, legacy = booking_factory(), booking_factory()
+    service.process_payment(posted.id, 80.0, "credit_card")
+    # Payments recorded before the ledger existed, and a balance that drifted
+    db_session.add_all([
+        Payment(booking_id=legacy.id, user_id=legacy.user_id, amount=amount, payment_method="credit_card",
+                status=status, transaction_id=f"LEGACY-{uuid.uuid4().hex[:8]}")
+        for amount, status in [(150.0, PaymentStatus.PAID), (30.0, PaymentStatus.REFUNDED), (99.0, PaymentStatus.FAILED)]
+    ])
+    db_session.query(BookingBalance).filter_by(booking_id=posted.id).update({"amount_paid": 1.0})
+    db_session.commit()
+
+    result = app.test_cli_runner().invoke(rebuild_booking_balances, ["--batch-size", "2"])
+    assert result.exit_code == 0 and "Rebuilt balances" in result.output
+
+    assert service.get_booking_balance(posted.id)["amount_paid"] == 80.0
+    legacy_balance = service.get_booking_balance(legacy.id)
+    assert (legacy_balance["amount_paid"], legacy_balance["amount_refunded"]) == (150.0, 30.0)
+    # Rerunning posts nothing twice
+    service.rebuild_booking_balances()
+    assert db_session.query(BookingLedgerEntry).filter_by(booking_id=legacy.id).count() == 2
@@ -1,8 +1,16 @@
 import pytest
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from app.repository.flight.services import FlightService
-from app.repository.flight.exceptions import FlightNotFound, SeatNotAvailable
-from app.models.enums import BookingStatus
+from app.repository.flight.exceptions import FlightNotFound, SeatNotAvailable, InvalidSearchCriteria, InvalidFlightData, BookingNotFound
+from app.repository.flight.ops.search import SearchFlights
+from app.repository.flight.ops.reserve import ReserveSeat
+from app.repository.flight.fanout import SupplierFanOut, InFlightLimiter, get_executor, merge_offers
+from app.repository.flight.suppliers import FakeFlightSupplier, SearchCriteria
+from app.utils.cache import TieredCache
+from app.models import FlightSeat
+from app.models.enums import BookingStatus, SeatStatus
 
 def test_search_flights(db_session):
     service = FlightService(db_session)
@@ -13,6 +21,16 @@ def test_search_flights(db_session):
     assert results[0]['departure_airport'] == "JFK"
     assert results[0]['arrival_airport'] == "LHR"
 
+def _flight_data(carrier_code, flight_number):
+    return {
+        "carrier_code": carrier_code,
+        "flight_number": flight_number,
+        "departure_airport": "JFK",
+        "arrival_airport": "LHR",
+        "departure_time": datetime(2024, 5, 1, 9, 0),
+        "arrival_time": datetime(2024, 5, 1, 21, 0)
+    }
+
 def test_reserve_seat_success(db_session, booking_factory):
     service = FlightService(db_session)
     booking = booking_factory()
@@ -30,21 +48,248 @@ def test_reserve_seat_success(db_session, booking_factory):
     
     assert flight_booking.booking_id == booking.id
     # Check if flight segment was created
-    assert flight_booking.segments.count() == 1
-    segment = flight_booking.segments.first()
+    assert len(flight_booking.segments) == 1
+    segment = flight_booking.segments[0]
     assert segment.carrier_code == "BA"
     assert segment.seat_assignment == "12A"
 
 def test_reserve_seat_unavailable(db_session, booking_factory):
     service = FlightService(db_session)
-    booking = booking_factory()
-    
-    flight_data = {} # Data doesn't matter for this mock check
-    
+    flight_data = _flight_data("BA", "113")
+
+    service.reserve_seat(booking_factory().id, flight_data, "14C")
+
     with pytest.raises(SeatNotAvailable):
-        service.reserve_seat(booking.id, flight_data, "X99")
+        service.reserve_seat(booking_factory().id, flight_data, "14C")
+
+def test_reserve_seat_requires_flight_details(db_session, booking_factory):
+    service = FlightService(db_session)
+    with pytest.raises(InvalidFlightData):
+        service.reserve_seat(booking_factory().id, {}, "12A")
+
+def test_reserve_seat_from_inventory(db_session, booking_factory):
+    service = FlightService(db_session)
+    flight_data = _flight_data("BA", "114")
+    instance = service.create_seat_inventory(flight_data, ["1A", "1B", "1C"])
+    assert service.get_available_seats(instance.id) == ["1A", "1B", "1C"]
+
+    service.reserve_seat(booking_factory().id, flight_data, "1B")
+    flight_booking = service.reserve_seat(booking_factory().id, flight_data)
+
+    assert flight_booking.segments[0].seat_assignment == "1A"
+    assert service.get_available_seats(instance.id) == ["1C"]
+
+    seat = db_session.query(FlightSeat).filter_by(flight_instance_id=instance.id, seat_number="1B").one()
+    assert seat.status == SeatStatus.RESERVED
+    assert seat.version == 1
+
+def test_reserve_seat_rejects_seat_missing_from_loaded_map(db_session, booking_factory):
+    service = FlightService(db_session)
+    flight_data = _flight_data("BA", "118")
+    instance = service.create_seat_inventory(flight_data, ["1A", "1B"])
+
+    with pytest.raises(SeatNotAvailable):
+        service.reserve_seat(booking_factory().id, flight_data, "ZZ77")
+    assert db_session.query(FlightSeat).filter_by(flight_instance_id=instance.id).count() == 2
+
+def test_reserve_seat_sold_out(db_session, booking_factory):
+    service = FlightService(db_session)
+    flight_data = _flight_data("BA", "115")
+    service.create_seat_inventory(flight_data, ["2A"])
+    service.reserve_seat(booking_factory().id, flight_data)
+
+    with pytest.raises(SeatNotAvailable):
+        service.reserve_seat(booking_factory().id, flight_data)
+
+def test_reserve_seat_keeps_looking_past_seats_lost_to_other_claims(db_session, booking_factory, monkeypatch):
+    flight_data = _flight_data("BA", "116")
+    seats = [f"{row}A" for row in range(10, 50)]
+    FlightService(db_session).create_seat_inventory(flight_data, seats)
+
+    # The first 30 candidates are taken by someone else between the SELECT and the UPDATE
+    op = ReserveSeat(db_session)
+    compare_and_set = op._compare_and_set
+    lost = []
+    def contended(seat_filter, *args):
+        if len(lost) < 30:
+            lost.append(seat_filter)
+            return 0
+        return compare_and_set(seat_filter, *args)
+    monkeypatch.setattr(op, "_compare_and_set", contended)
+
+    flight_booking = op.execute(booking_factory().id, flight_data)
+    assert flight_booking.segments[0].seat_assignment == seats[30]
+
+def test_reserve_seat_requires_existing_booking(db_session):
+    with pytest.raises(BookingNotFound):
+        FlightService(db_session).reserve_seat("no-such-booking", _flight_data("BA", "117"), "1A")
+
+def test_concurrent_seat_reservations_never_double_book(tmp_path):
+    """Stress test: many threads race for the seats of one flight on a shared file database."""
+    from benchmarks.seat_reservation import run_seat_stress
+    result = run_seat_stress(f"sqlite:///{tmp_path / 'seats.db'}", threads=12, attempts=60, seats=30)
+
+    assert result["reserved"] == 30
+    assert result["sold_out"] == 30
+    assert result["errors"] == 0
+    assert result["double_booked"] == 0
 
 def test_get_flight_not_found(db_session):
     service = FlightService(db_session)
     with pytest.raises(FlightNotFound):
         service.get_flight_by_id("non_existent_flight_id")
+
+@pytest.fixture
+def search_cache():
+    return TieredCache(namespace="test_flight_search")
+
+def test_search_criteria_normalization():
+    a = SearchCriteria.normalize(" jfk", "lhr ", "2023-12-25", None, "2")
+    b = SearchCriteria.normalize("JFK", "LHR", date(2023, 12, 25), "economy", 2)
+    assert a == b
+    assert a.cache_key == "JFK:LHR:2023-12-25:economy:2"
+
+@pytest.mark.parametrize("args", [
+    ("JFK", "JFK", "2023-12-25"),
+    ("JFKX", "LHR", "2023-12-25"),
+    ("JFK", "LHR", "25/12/2023"),
+    ("JFK", "LHR", "2023-12-25", "steerage"),
+    ("JFK", "LHR", "2023-12-25", "economy", 0),
+])
+def test_search_invalid_criteria(args):
+    with pytest.raises(InvalidSearchCriteria):
+        SearchCriteria.normalize(*args)
+
+def test_search_results_are_cached(app, search_cache):
+    supplier = FakeFlightSupplier()
+    op = SearchFlights(suppliers=[supplier], cache=search_cache)
+
+    first = op.execute("JFK", "LHR", "2023-12-25")
+    second = op.execute("jfk", "lhr", "2023-12-25")
+    assert first == second
+    assert supplier.calls == 1
+
+    # Only the offers are cached, not the timings of the call that loaded them
+    cached = op.search("JFK", "LHR", "2023-12-25")
+    assert (cached["cached"], cached["suppliers"], cached["offers"]) == (True, [], first)
+
+    op.execute("JFK", "LHR", "2023-12-25", passengers=2)
+    assert supplier.calls == 2
+
+def test_concurrent_identical_searches_are_coalesced(app, search_cache):
+    supplier = FakeFlightSupplier(latency=0.2)
+    op = SearchFlights(suppliers=[supplier], cache=search_cache)
+
+    def search():
+        with app.app_context():
+            return op.execute("JFK", "CDG", "2024-01-10")
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(lambda _: search(), range(20)))
+
+    assert supplier.calls == 1
+    assert all(r == results[0] for r in results)
+
+def test_search_uses_shared_redis_tier(app, search_cache):
+    fakeredis = pytest.importorskip("fakeredis")
+    app.extensions['redis'] = fakeredis.FakeRedis()
+    try:
+        supplier = FakeFlightSupplier()
+        SearchFlights(suppliers=[supplier], cache=search_cache).execute("JFK", "SFO", "2024-02-01")
+
+        # A second process has an empty local tier but shares Redis
+        other_process_cache = TieredCache(namespace="test_flight_search")
+        results = SearchFlights(suppliers=[supplier], cache=other_process_cache).execute("JFK", "SFO", "2024-02-01")
+        assert supplier.calls == 1
+        assert results[0]["departure_airport"] == "JFK"
+        assert app.extensions['redis'].ttl("test_flight_search:JFK:SFO:2024-02-01:economy:1") > 0
+    finally:
+        app.extensions.pop('redis', None)
+
+def test_fanout_queries_suppliers_in_parallel(app):
+    suppliers = [FakeFlightSupplier(name=f"supplier_{i}", latency=0.3) for i in range(4)]
+    criteria = SearchCriteria.normalize("JFK", "LHR", "2024-03-01")
+
+    started = time.monotonic()
+    result = SupplierFanOut(suppliers, deadline=2.0).search(criteria)
+    elapsed = time.monotonic() - started
+
+    # Sequential calls would take ~1.2s
+    assert elapsed < 0.9
+    assert result["complete"] is True
+    assert [r["status"] for r in result["suppliers"]] == ["ok"] * 4
+    # Every supplier returns AA101 and UA450, which de-duplicate to two offers
+    assert len(result["offers"]) == 2
+
+def test_fanout_returns_partial_results_on_deadline(app):
+    fast = FakeFlightSupplier(name="fast", latency=0.01)
+    slow = FakeFlightSupplier(name="slow", latency=1.0, schedule=[
+        {"carrier_code": "BA", "flight_number": "112", "departs": "09:00:00", "arrives": "21:00:00", "price": 600.0}
+    ])
+    criteria = SearchCriteria.normalize("JFK", "LHR", "2024-03-02")
+
+    started = time.monotonic()
+    result = SupplierFanOut([fast, slow], deadline=0.2).search(criteria)
+    assert time.monotonic() - started < 0.6
+
+    report = {r["supplier"]: r for r in result["suppliers"]}
+    assert result["complete"] is False
+    assert report["fast"]["status"] == "ok"
+    assert report["fast"]["offers"] == 2
+    assert report["slow"]["status"] == "timeout"
+    assert report["slow"]["elapsed_ms"] == 200.0
+    assert {o["carrier_code"] for o in result["offers"]} == {"AA", "UA"}
+
+def test_fanout_reports_supplier_errors(app):
+    healthy = FakeFlightSupplier(name="healthy")
+    broken = FakeFlightSupplier(name="broken", error=RuntimeError("upstream 503"))
+    result = SupplierFanOut([healthy, broken], deadline=1.0).search(SearchCriteria.normalize("JFK", "LHR", "2024-03-03"))
+
+    report = {r["supplier"]: r for r in result["suppliers"]}
+    assert report["broken"]["status"] == "error"
+    assert report["broken"]["error"] == "upstream 503"
+    assert len(result["offers"]) == 2
+
+def test_fanout_skips_supplier_with_calls_still_running(app):
+    hung = FakeFlightSupplier(name="hung", latency=0.5)
+    healthy = FakeFlightSupplier(name="healthy")
+    limiter = InFlightLimiter()
+    fanout = SupplierFanOut([hung, healthy], deadline=0.05, max_in_flight=2, limiter=limiter)
+    criteria = SearchCriteria.normalize("JFK", "LHR", "2024-03-05")
+
+    statuses = [[r["status"] for r in fanout.search(criteria)["suppliers"]] for _ in range(3)]
+
+    # Past the deadline the first two calls still hold workers, so the third search doesn't queue another
+    assert statuses == [["timeout", "ok"], ["timeout", "ok"], ["busy", "ok"]]
+    assert hung.calls == 2
+    time.sleep(0.6)
+    assert limiter.running("hung") == 0
+
+def test_get_executor_follows_configured_size():
+    assert get_executor(3) is get_executor(3)
+    assert get_executor(5)._max_workers == 5
+
+def test_merge_offers_keeps_cheapest_duplicate():
+    offers_a = [{"carrier_code": "AA", "flight_number": "1", "departure_time": "2024-01-01T08:00:00", "price": 300.0, "supplier": "a"}]
+    offers_b = [
+        {"carrier_code": "AA", "flight_number": "1", "departure_time": "2024-01-01T08:00:00", "price": 280.0, "supplier": "b"},
+        {"carrier_code": "AA", "flight_number": "1", "departure_time": "2024-01-02T08:00:00", "price": 100.0, "supplier": "b"},
+    ]
+    merged = merge_offers([offers_a, offers_b])
+    assert [(o["departure_time"], o["supplier"]) for o in merged] == [
+        ("2024-01-02T08:00:00", "b"),
+        ("2024-01-01T08:00:00", "b"),
+    ]
+
+def test_search_with_report_caches_partial_results_briefly(app, search_cache):
+    app.config['FLIGHT_SEARCH_DEADLINE'] = 0.1
+    try:
+        fast = FakeFlightSupplier(name="fast")
+        slow = FakeFlightSupplier(name="slow", latency=0.5)
+        result = SearchFlights(suppliers=[fast, slow], cache=search_cache).search("JFK", "MIA", "2024-03-04")
+    finally:
+        app.config['FLIGHT_SEARCH_DEADLINE'] = 8.0
+
+    assert result["complete"] is False
+    _, expires_at = search_cache.local._data["JFK:MIA:2024-03-04:economy:1"]
+    assert expires_at - time.monotonic() <= app.config['FLIGHT_SEARCH_PARTIAL_CACHE_TTL']
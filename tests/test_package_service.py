@@ -1,4 +1,14 @@
 import pytest
+from app.repository.package.exceptions import InvalidPackageData, PackageNotFound
+from app.repository.package.cache import package_cache
+from app.repository.package.ops import GetPackageDocument
+from app.utils.cache import TieredCache, cache_stats
+from app.manage.commands import reindex_packages
+from sqlalchemy import text
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import uuid
 from app.repository.package.services import PackageService
 from app.models.enums import ActivityType
 
@@ -57,7 +67,7 @@ def test_search_packages(db_session):
     service.create_package({"title": "Expensive Trip", "base_price": 5000.0, "duration_days": 10})
     
     # Test filters
-    results = service.search_packages({"max_price": 1000.0})
+    results = service.search_packages({"max_price": 1000.0}).items
     assert len(results) >= 1
     assert any(p.title == "Cheap Trip" for p in results)
     assert not any(p.title == "Expensive Trip" for p in results)
@@ -69,3 +79,198 @@ def test_update_package(db_session):
     updated = service.update_package(created.id, {"title": "New Title", "base_price": 150.00})
     assert updated.title == "New Title"
     assert updated.base_price == 150.00
+
+@pytest.fixture
+def search_catalog(db_session):
+    service = PackageService(db_session)
+    tag = "zq" + uuid.uuid4().hex[:6]
+    packages = {
+        "safari": service.create_package({
+            "title": f"Maasai Mara Safari {tag}", "description": "Game drives across the savannah",
+            "base_price": 1800.0, "duration_days": 5,
+            "itinerary": [{"day_number": 1, "title": "Drive", "location": "Narok", "activity_type": "adventure"}]
+        }),
+        "beach": service.create_package({
+            "title": f"Diani Beach Retreat {tag}", "description": "Relax on white sand, optional safari day trip",
+            "base_price": 900.0, "duration_days": 4,
+            "itinerary": [{"day_number": 1, "title": "Beach", "location": "Diani", "activity_type": "free_time"}]
+        }),
+        "city": service.create_package({
+            "title": f"Nairobi City Break {tag}", "description": "Museums and markets",
+            "base_price": 400.0, "duration_days": 2,
+            "itinerary": [{"day_number": 1, "title": "Museum", "location": "Nairobi", "activity_type": "cultural"}]
+        }),
+    }
+    return service, tag, packages
+
+def test_search_ranks_title_matches_first(search_catalog):
+    service, tag, packages = search_catalog
+    result = service.search_packages({"keyword": f"safari {tag}"})
+
+    assert [p.id for p in result.items] == [packages["safari"].id, packages["beach"].id]
+    assert result.total == 2
+    assert not result.total_is_estimate
+
+def test_search_matches_itinerary_locations_and_updates(search_catalog):
+    service, tag, packages = search_catalog
+    assert [p.id for p in service.search_packages({"keyword": f"narok {tag}"}).items] == [packages["safari"].id]
+
+    service.update_package(packages["city"].id, {"title": f"Nairobi Street Food Safari {tag}"})
+    assert packages["city"].id in {p.id for p in service.search_packages({"keyword": f"safari {tag}"}).items}
+
+def test_search_facets_and_filters(search_catalog):
+    service, tag, packages = search_catalog
+    result = service.search_packages({"keyword": tag})
+
+    assert result.facets["price_band"]["1000_2500"] == 1
+    assert result.facets["price_band"]["500_1000"] == 1
+    assert result.facets["duration_band"]["4_7"] == 2
+    assert result.facets["activity_type"] == {"adventure": 1, "free_time": 1, "cultural": 1}
+
+    filtered = service.search_packages({"keyword": tag, "price_band": "under_500", "activity_type": "cultural"})
+    assert [p.id for p in filtered.items] == [packages["city"].id]
+
+    with pytest.raises(InvalidPackageData):
+        service.search_packages({"price_band": "free"})
+
+def test_search_pagination(search_catalog):
+    service, tag, _ = search_catalog
+    first = service.search_packages({"keyword": tag}, page=1, per_page=2)
+    second = service.search_packages({"keyword": tag}, page=2, per_page=2)
+
+    assert first.total == 3 and first.has_more
+    assert len(second.items) == 1 and not second.has_more
+    assert not {p.id for p in first.items} & {p.id for p in second.items}
+
+def test_reindex_creates_missing_search_table(app, db_session, search_catalog):
+    service, tag, packages = search_catalog
+    # A database whose packages table predates the FTS5 table never ran its after_create hook
+    db_session.execute(text("DROP TABLE package_search"))
+    db_session.commit()
+
+    result = app.test_cli_runner().invoke(reindex_packages, ["--batch-size", "2"])
+    assert result.exit_code == 0, result.output
+    assert service.search_packages({"keyword": f"safari {tag}"}).items[0].id == packages["safari"].id
+
+@pytest.fixture
+def fresh_package_cache():
+    package_cache.local.clear()
+    package_cache.stats.reset()
+    yield package_cache
+    package_cache.local.clear()
+
+def test_package_document_is_cached_and_invalidated(db_session, fresh_package_cache, count_queries):
+    service = PackageService(db_session)
+    package = service.create_package({
+        "title": "Lamu Dhow Cruise", "base_price": 700.0, "duration_days": 3,
+        "itinerary": [{"day_number": 1, "title": "Sail", "location": "Lamu", "activity_type": "adventure"}],
+        "inclusions": [{"description": "Meals"}]
+    })
+
+    document = service.get_package_document(package.id)
+    assert document["itinerary"][0]["location"] == "Lamu"
+    assert document["inclusions"][0]["description"] == "Meals"
+
+    count_queries.clear()
+    assert service.get_package_document(package.id) == document
+    assert count_queries == []
+
+    service.update_package(package.id, {"title": "Lamu Sunset Cruise"})
+    assert service.get_package_document(package.id)["title"] == "Lamu Sunset Cruise"
+
+    stats = cache_stats()["package"]
+    assert stats["local_hits"] == 1
+    assert stats["loads"] == 2
+    assert stats["invalidations"] >= 2
+
+def test_missing_package_is_not_cached(db_session, fresh_package_cache):
+    with pytest.raises(PackageNotFound):
+        PackageService(db_session).get_package_document("missing-id")
+    assert len(fresh_package_cache.local) == 0
+
+def test_search_documents_invalidated_on_create(db_session, fresh_package_cache):
+    service = PackageService(db_session)
+    tag = "zc" + uuid.uuid4().hex[:6]
+    service.create_package({"title": f"Amboseli Views {tag}", "base_price": 1500.0, "duration_days": 3})
+
+    first = service.search_package_documents({"keyword": tag})
+    assert first["total"] == 1
+    assert "itinerary" not in first["items"][0]
+    assert service.search_package_documents({"keyword": tag}) == first
+
+    service.create_package({"title": f"Amboseli Camp {tag}", "base_price": 900.0, "duration_days": 2})
+    assert service.search_package_documents({"keyword": tag})["total"] == 2
+
+def test_package_cache_shares_redis_tier_and_tags(app, db_session):
+    fakeredis = pytest.importorskip("fakeredis")
+    app.extensions['redis'] = fakeredis.FakeRedis()
+    try:
+        package = PackageService(db_session).create_package({"title": "Tsavo Trek", "base_price": 300.0, "duration_days": 2})
+        worker_a = TieredCache(namespace="test_package_a")
+        worker_b = TieredCache(namespace="test_package_a")
+
+        GetPackageDocument(db_session, cache=worker_a).execute(package.id)
+        GetPackageDocument(db_session, cache=worker_b).execute(package.id)
+        assert worker_a.stats.snapshot()["loads"] == 1
+        assert worker_b.stats.snapshot()["redis_hits"] == 1
+        # Caches sharing a namespace are reported together, not one in place of the other
+        stats = cache_stats()["test_package_a"]
+        assert (stats["loads"], stats["redis_hits"]) == (1, 1)
+        assert not app.extensions['redis'].exists(f"test_package_a:detail:{package.id}:lock")
+
+        worker_a.invalidate_tags(f"package:{package.id}")
+        assert app.extensions['redis'].get(f"test_package_a:detail:{package.id}") is None
+        assert worker_a.get(f"detail:{package.id}") is None
+    finally:
+        app.extensions.pop('redis', None)
+
+def test_cache_stampede_runs_loader_once_across_workers(app):
+    fakeredis = pytest.importorskip("fakeredis")
+    app.extensions['redis'] = fakeredis.FakeRedis()
+    try:
+        workers = [TieredCache(namespace="test_stampede") for _ in range(4)]
+        calls = []
+        lock = threading.Lock()
+
+        def loader():
+            with lock:
+                calls.append(1)
+            time.sleep(0.2)
+            return {"value": 42}
+
+        def read(i):
+            with app.app_context():
+                return workers[i % len(workers)].get_or_load("hot", loader, ttl=30)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(read, range(16)))
+
+        assert len(calls) == 1
+        assert all(r == {"value": 42} for r in results)
+    finally:
+        app.extensions.pop('redis', None)
+
+def test_lock_release_keeps_lock_taken_over_by_another_worker(app):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = app.extensions['redis'] = fakeredis.FakeRedis()
+    try:
+        cache = TieredCache(namespace="test_lock_release")
+        token = cache._acquire_lock("k")
+        # Our lock timed out and another worker took it
+        client.set("test_lock_release:k:lock", "other-worker")
+
+        cache._release_lock("k", token)
+        assert client.get("test_lock_release:k:lock") == b"other-worker"
+    finally:
+        app.extensions.pop('redis', None)
+
+def test_invalidation_during_load_skips_caching(app):
+    cache = TieredCache(namespace="test_stale_load")
+
+    def loader():
+        cache.invalidate_tags("t")
+        return {"stale": True}
+
+    assert cache.get_or_load("k", loader, ttl=30, tags=("t",)) == {"stale": True}
+    assert cache.get("k") is None
+    assert cache.stats.snapshot()["stale_skips"] == 1
@@ -0,0 +1,97 @@
+import pytest
+from app.models import Booking, BookingHold, BookingRollup, Payment, RevenueRollup
+from app.models.enums import BookingStatus, BookingType, PaymentStatus
+from app.repository.booking.services import BookingService
+from app.repository.finance.services import FinanceService
+from app.repository.reporting import ReportingService, InvalidReportQuery
+from app.manage.commands import backfill_rollups
+from datetime import datetime, timedelta, timezone
+import uuid
+
+@pytest.fixture
+def currency():
+    # A currency of its own keeps each test's rollup rows apart in the shared database
+    return f"Z{uuid.uuid4().hex[:2].upper()}"
+
+@pytest.fixture
+def priced_booking(db_session, user_factory, currency):
+    def create(total_amount: float, booking_type=BookingType.FLIGHT) -> Booking:
+        booking = Booking(reference_code=f"THRIVE-{uuid.uuid4().hex[:8].upper()}", user_id=user_factory().id,
+                          booking_type=booking_type, currency=currency, total_amount=total_amount)
+        db_session.add(booking)
+        db_session.commit()
+        return booking
+    return create
+
+def summary(rows: list[dict]) -> dict:
+    return {(row["booking_type"], row["status"]): (row["count"], row["amount"]) for row in rows}
+
+def test_rollups_follow_bookings_and_payments(db_session, priced_booking, currency):
+    reporting, finance = ReportingService(db_session), FinanceService(db_session)
+    flight, package = priced_booking(300.0), priced_booking(120.0, BookingType.PACKAGE)
+    assert summary(reporting.booking_report(currency=currency)) == {
+        ("flight", "pending"): (1, 300.0), ("package", "pending"): (1, 120.0)
+    }
+
+    payment = finance.process_payment(flight.id, 300.0, "credit_card")
+    finance.process_refund(payment.id, 50.0)
+
+    today = datetime.now(timezone.utc).date()
+    for period in ("day", "month"):
+        bookings = reporting.booking_report(period, currency=currency)
+        # The confirmed booking moved out of its pending bucket
+        assert summary(bookings) == {("flight", "confirmed"): (1, 300.0), ("package", "pending"): (1, 120.0)}
+        assert summary(reporting.revenue_report(period, currency=currency)) == {
+            ("flight", "paid"): (1, 300.0), ("flight", "refunded"): (1, 50.0)
+        }
+    assert bookings[0]["period_start"] == today.replace(day=1).isoformat()
+    assert summary(reporting.revenue_report(currency=currency, booking_type="package")) == {}
+
+def test_rollups_roll_back_with_their_change(db_session, priced_booking, currency):
+    booking = priced_booking(80.0)
+    booking.status = BookingStatus.CANCELLED
+    db_session.flush()
+    db_session.rollback()
+
+    assert summary(ReportingService(db_session).booking_report(currency=currency)) == {("flight", "pending"): (1, 80.0)}
+
+def test_rollups_follow_expired_hold_release(db_session, priced_booking, currency):
+    reporting, bookings = ReportingService(db_session), BookingService(db_session)
+    booking = priced_booking(150.0)
+    hold = bookings.hold_seat(booking.id, {
+        "carrier_code": "RP", "flight_number": currency, "departure_airport": "NBO", "arrival_airport": "DXB",
+        "departure_time": datetime(2024, 7, 1, 9, 0), "arrival_time": datetime(2024, 7, 1, 15, 0)
+    }, "2A")
+    assert summary(reporting.booking_report(currency=currency)) == {("flight", "held"): (1, 150.0)}
+
+    db_session.get(BookingHold, hold.id).expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+    # Released with a bulk UPDATE that never goes through the flush
+    assert bookings.release_expired_holds() >= 1
+    assert summary(reporting.booking_report(currency=currency)) == {("flight", "pending"): (1, 150.0)}
+
+def test_rollups_follow_bulk_payment_updates(db_session, priced_booking, currency):
+    booking = priced_booking(90.0)
+    payment = FinanceService(db_session).process_payment(booking.id, 90.0, "credit_card")
+
+    db_session.query(Payment).filter_by(id=payment.id).update({"status": PaymentStatus.FAILED})
+    db_session.commit()
+    assert summary(ReportingService(db_session).revenue_report(currency=currency)) == {("flight", "failed"): (1, 90.0)}
+
+def test_backfill_rebuilds_rollups_from_history(app, db_session, priced_booking, currency):
+    reporting = ReportingService(db_session)
+    booking = priced_booking(200.0)
+    FinanceService(db_session).process_payment(booking.id, 200.0, "credit_card")
+    expected = (reporting.booking_report("month", currency=currency), reporting.revenue_report("month", currency=currency))
+
+    db_session.query(BookingRollup).filter_by(currency=currency).delete()
+    db_session.query(RevenueRollup).filter_by(currency=currency).update({"amount": 1.0})
+    db_session.commit()
+
+    result = app.test_cli_runner().invoke(backfill_rollups, ["--batch-size", "2"])
+    assert result.exit_code == 0 and "Aggregated" in result.output
+    assert (reporting.booking_report("month", currency=currency), reporting.revenue_report("month", currency=currency)) == expected
+
+def test_report_rejects_unknown_period(db_session):
+    with pytest.raises(InvalidReportQuery):
+        ReportingService(db_session).revenue_report("week")